@@ -0,0 +1,53 @@
+#AdaptiveInterval
+#    Picks the OCR interval of an "adaptive" stream from its stored readings:
+#    about two reads per typical time between value changes, longer while the
+#    meter stands still, short again as soon as it moves or a reading was unsure.
+
+import statistics
+
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_MAX_INTERVAL = 3600
+DEFAULT_MIN_CONFIDENCE = 0.5
+
+
+def adaptive_interval(history, now, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                      min_change=0.0, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """
+    Seconds until the next OCR run and why, as (seconds, reason).
+
+    history: stored OCR entries ({"aggregate": {"value", "confidence", "timestamp"}}), any order
+    min_change: value differences up to this much don't count as a change
+    """
+    readings = sorted(
+        (entry.get("aggregate") or {} for entry in history or []),
+        key=lambda aggregate: aggregate.get("timestamp") or 0,
+    )
+    readings = [r for r in readings if r.get("timestamp") and r.get("value") is not None]
+    if len(readings) < 2:
+        return min_interval, "not enough readings yet"
+
+    if (readings[-1].get("confidence") or 0) < min_confidence:
+        return min_interval, "last reading was unsure"
+
+    changes = [
+        current["timestamp"]
+        for previous, current in zip(readings, readings[1:])
+        if abs(current["value"] - previous["value"]) > min_change
+    ]
+    since_change = now - (changes[-1] if changes else readings[0]["timestamp"])
+    gaps = [b - a for a, b in zip(changes, changes[1:])]
+
+    if gaps:
+        typical = statistics.median(gaps)
+        if since_change > typical:
+            # standing still for longer than usual: back off with the quiet time
+            basis, reason = since_change, f"no change for {since_change:.0f}s"
+        else:
+            basis, reason = typical, f"changes every ~{typical:.0f}s"
+    elif changes:
+        basis, reason = max(changes[-1] - readings[0]["timestamp"], since_change), "changed once"
+    else:
+        basis, reason = since_change, f"no change for {since_change:.0f}s"
+
+    seconds = min(max(basis / 2, min_interval), max_interval)
+    return int(seconds), reason
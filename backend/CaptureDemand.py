@@ -0,0 +1,82 @@
+#CaptureDemand
+#    Decides whether a stream's source has to be open right now. Readers take
+#    a lease while they wait for a frame, dashboard viewers and the next
+#    scheduled OCR run are counted in on every check. Without any of them the
+#    stream stays open for a grace period and then goes idle.
+
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+DEFAULT_GRACE = 60.0  # seconds the source stays open after the last demand
+DEFAULT_WARMUP = 15.0  # seconds before a scheduled OCR run the source is opened
+
+
+class CaptureDemand:
+    """
+    Reference counted demand for one stream's capture.
+
+    - acquire(reason)/release(reason), or `with demand.hold(reason)`: in-flight reads
+    - wanted(now, viewers, next_run): True while a lease is held, a websocket
+      client watches the stream, a scheduled run is less than `warmup` seconds
+      away, or less than `grace` seconds after the last of those ended
+    """
+
+    def __init__(self, grace: float = None, warmup: float = None):
+        self.grace = grace if grace is not None else float(os.environ.get("CAPTURE_IDLE_GRACE_SECONDS", DEFAULT_GRACE))
+        self.warmup = warmup if warmup is not None else float(os.environ.get("CAPTURE_WARMUP_SECONDS", DEFAULT_WARMUP))
+        self._leases = Counter()
+        self._last_demand = None
+        self.reasons = []
+        self.idle_since = time.time()
+        self.warmups = 0
+        self.idles = 0
+
+    def acquire(self, reason: str):
+        self._leases[reason] += 1
+        self._last_demand = time.time()
+
+    def release(self, reason: str):
+        if self._leases[reason] <= 1:
+            del self._leases[reason]
+        else:
+            self._leases[reason] -= 1
+        self._last_demand = time.time()
+
+    def held(self, reason: str) -> int:
+        return self._leases.get(reason, 0)
+
+    @contextmanager
+    def hold(self, reason: str):
+        self.acquire(reason)
+        try:
+            yield self
+        finally:
+            self.release(reason)
+
+    def wanted(self, now: float = None, viewers: int = 0, next_run: float = None) -> bool:
+        """next_run: epoch seconds of the next scheduled OCR run, if any."""
+        now = time.time() if now is None else now
+        reasons = sorted(self._leases)
+        if viewers:
+            reasons.append("viewers")
+        if next_run is not None and next_run - now <= self.warmup:
+            reasons.append("scheduled")
+        self.reasons = reasons
+        if reasons:
+            self._last_demand = now
+            return True
+        return self._last_demand is not None and now - self._last_demand < self.grace
+
+    def stats(self):
+        return {
+            "leases": dict(self._leases),
+            "reasons": self.reasons,
+            "last_demand": self._last_demand,
+            "idle_since": self.idle_since,
+            "grace_seconds": self.grace,
+            "warmup_seconds": self.warmup,
+            "warmups": self.warmups,
+            "idles": self.idles,
+        }
@@ -0,0 +1,227 @@
+#CaptureScheduler
+#    Runs the blocking parts of frame grabs (waiting for a capture session,
+#    decoding a file, a preview snapshot) on its own bounded thread pool
+#    instead of the default executor. At most `per_host` grabs talk to the
+#    same camera host at once, and queued grabs are started round-robin per
+#    stream, so one busy stream or a slow NVR can't take all threads.
+#    It also hands out the connection slots of the long-lived capture
+#    sessions: at most `sessions_per_host` of them are connected to one host,
+#    for NVRs that refuse more simultaneous RTSP sessions.
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque, Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from backend.Timings import summarize_ms
+
+
+def capture_host(url: str) -> str:
+    """Host a source connects to; local files share the host "local"."""
+    try:
+        host = urlsplit(url).hostname if "://" in url else None
+    except ValueError:
+        host = None
+    return host or "local"
+
+
+class _Ticket:
+    def __init__(self, key, host, loop):
+        self.key = key
+        self.host = host
+        self.loop = loop
+        self.granted = loop.create_future()
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+
+    def grant(self):
+        if not self.granted.done():
+            self.granted.set_result(None)
+
+
+class CaptureScheduler:
+    """
+    run(key, url, fn, *args) awaits fn(*args) on the capture pool. `key` is
+    the stream the grab is for (the unit of fairness), `url` picks its host.
+
+    acquire_session(url)/release_session(url) are called by capture session
+    threads around every connection; acquire blocks while the host is full.
+
+    `host_limits` overrides both `per_host` and `sessions_per_host` for single
+    hosts. Local files are only bounded by the pool.
+    """
+
+    def __init__(self, workers=8, per_host=2, host_limits=None, sessions_per_host=4):
+        self.workers = workers
+        self.per_host = per_host
+        self.sessions_per_host = sessions_per_host
+        self.host_limits = dict(host_limits or {})
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="capture")
+        self._lock = threading.Lock()
+        self._queues = OrderedDict()  # key -> deque of waiting tickets, in round-robin order
+        self._host_running = Counter()
+        self._sessions_changed = threading.Condition(self._lock)
+        self._host_sessions = Counter()
+        self._sessions_waiting = Counter()
+        self.session_waits = 0
+        self.running = 0
+        self._busy_seconds = 0.0
+        self._started = time.monotonic()
+        self._wait_ms = deque(maxlen=500)
+        self._service_ms = deque(maxlen=500)
+        self.completed = 0
+        self.failed = 0
+
+    def limit(self, host):
+        # local files don't have a camera to protect
+        return self.host_limits.get(host, self.workers if host == "local" else self.per_host)
+
+    def session_limit(self, host):
+        """Connected capture sessions allowed for a host, None for no limit."""
+        if host == "local":
+            return None
+        return self.host_limits.get(host, self.sessions_per_host)
+
+    def acquire_session(self, url, cancelled=None, poll=0.5) -> bool:
+        """
+        Takes a connection slot for url's host, waiting while the host is full.
+        Blocks, call it from the session's thread. Returns False if `cancelled()`
+        became true while waiting.
+        """
+        host = capture_host(url)
+        limit = self.session_limit(host)
+        with self._sessions_changed:
+            if limit is not None and self._host_sessions[host] >= limit:
+                self.session_waits += 1
+                self._sessions_waiting[host] += 1
+                try:
+                    while self._host_sessions[host] >= limit:
+                        if cancelled is not None and cancelled():
+                            return False
+                        self._sessions_changed.wait(poll)
+                finally:
+                    self._sessions_waiting[host] -= 1
+                    if not self._sessions_waiting[host]:
+                        del self._sessions_waiting[host]
+            self._host_sessions[host] += 1
+            return True
+
+    def release_session(self, url):
+        host = capture_host(url)
+        with self._sessions_changed:
+            self._host_sessions[host] -= 1
+            if self._host_sessions[host] <= 0:
+                del self._host_sessions[host]
+            self._sessions_changed.notify_all()
+
+    async def run(self, key, url, fn, *args):
+        ticket = _Ticket(key, capture_host(url), asyncio.get_running_loop())
+        with self._lock:
+            self._queues.setdefault(key, deque()).append(ticket)
+        self._dispatch()
+
+        try:
+            await ticket.granted
+        except asyncio.CancelledError:
+            with self._lock:
+                queue = self._queues.get(key)
+                if queue is not None and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[key]
+                    raise
+            # granted meanwhile: the slot is freed when the (never started) call is skipped
+            self._release(ticket, ok=False)
+            raise
+
+        future = self._pool.submit(fn, *args)
+        # freed by the worker thread itself, even if the caller stops waiting
+        future.add_done_callback(lambda f: self._release(ticket, ok=not f.cancelled() and f.exception() is None))
+        return await asyncio.wrap_future(future)
+
+    def _dispatch(self):
+        """Starts queued grabs while there are free threads, round-robin over streams."""
+        while True:
+            with self._lock:
+                if self.running >= self.workers:
+                    return
+                ticket = None
+                for key, queue in self._queues.items():
+                    if self._host_running[queue[0].host] < self.limit(queue[0].host):
+                        ticket = queue.popleft()
+                        if queue:
+                            self._queues.move_to_end(key)
+                        else:
+                            del self._queues[key]
+                        break
+                if ticket is None:
+                    return
+                self.running += 1
+                self._host_running[ticket.host] += 1
+                ticket.started_at = time.monotonic()
+                self._wait_ms.append((ticket.started_at - ticket.enqueued_at) * 1000)
+            try:
+                ticket.loop.call_soon_threadsafe(ticket.grant)
+            except RuntimeError:
+                # its event loop is gone, nobody is waiting for this slot
+                self._release(ticket, ok=False, dispatch=False)
+
+    def _release(self, ticket, ok=True, dispatch=True):
+        with self._lock:
+            self.running -= 1
+            self._host_running[ticket.host] -= 1
+            if not self._host_running[ticket.host]:
+                del self._host_running[ticket.host]
+            elapsed = time.monotonic() - ticket.started_at
+            self._busy_seconds += elapsed
+            self._service_ms.append(elapsed * 1000)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if dispatch:
+            self._dispatch()
+
+    def stats(self):
+        with self._lock:
+            queued_by_host = Counter(ticket.host for queue in self._queues.values() for ticket in queue)
+            hosts = set(queued_by_host) | set(self._host_running) | set(self._host_sessions) | set(self._sessions_waiting)
+            uptime = max(time.monotonic() - self._started, 1e-9)
+            return {
+                "workers": self.workers,
+                "per_host": self.per_host,
+                "sessions_per_host": self.sessions_per_host,
+                "running": self.running,
+                "queued": sum(queued_by_host.values()),
+                "queued_streams": list(self._queues),
+                "utilization": round(self.running / self.workers, 3),
+                "avg_utilization": round(self._busy_seconds / (self.workers * uptime), 3),
+                "hosts": {
+                    host: {
+                        "running": self._host_running[host],
+                        "queued": queued_by_host[host],
+                        "limit": self.limit(host),
+                        "sessions": self._host_sessions[host],
+                        "sessions_waiting": self._sessions_waiting[host],
+                        "session_limit": self.session_limit(host),
+                    }
+                    for host in sorted(hosts)
+                },
+                "completed": self.completed,
+                "failed": self.failed,
+                "session_waits": self.session_waits,
+                "wait": summarize_ms(self._wait_ms),
+                "service": summarize_ms(self._service_ms),
+            }
+
+
+def host_limits_from_env(value: str):
+    """Parses per-host limits like "nvr.local=4,10.0.0.5=1"."""
+    limits = {}
+    for item in (value or "").split(","):
+        host, _, limit = item.partition("=")
+        if host.strip() and limit.strip():
+            limits[host.strip()] = int(limit)
+    return limits
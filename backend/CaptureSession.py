@@ -0,0 +1,211 @@
+#CaptureSession
+#    Keeps one video source (RTSP, HTTP, ...) open in a background thread.
+#    Readers get the latest decoded frame without paying for the
+#    DESCRIBE/SETUP/PLAY handshake or waiting for the next keyframe.
+
+import threading
+import time
+import av
+from backend.FrameDecoder import decode_keyframes, enable_threading, to_bgr
+
+
+class CaptureSession:
+    """
+    Long-lived capture of one video source.
+
+    A daemon thread keeps the container open and decodes continuously, keeping
+    only the newest frame. The frame is converted to a BGR ndarray lazily, once,
+    on the first read after it arrived. On errors the thread reconnects with
+    exponential backoff.
+
+    If `idle_timeout` is set, the thread closes the source after that many
+    seconds without a read; the next read reopens it.
+
+    `open_timeout` and `read_timeout` bound connecting and every read from the
+    source (seconds). A read fails right away when a connection attempt fails
+    before the first frame arrived, instead of waiting out its timeout.
+
+    With `keyframes_only` only keyframes are decoded, which costs a fraction
+    of the CPU but the newest frame can be up to one GOP old. `max_width`
+    scales frames down while converting them.
+
+    `slots` (a CaptureScheduler) limits how many sessions are connected to one
+    host: the thread takes a slot before every connection attempt, waits while
+    the host is full, and gives it back once the connection is closed.
+    """
+
+    def __init__(self, url, options=None, name=None, idle_timeout=None, min_backoff=1.0, max_backoff=30.0,
+                 keyframes_only=False, max_width=None, open_timeout=10.0, read_timeout=10.0, slots=None):
+        self.url = url
+        self.options = options or {}
+        self.name = name or url
+        self.idle_timeout = idle_timeout
+        self.keyframes_only = keyframes_only
+        self.max_width = max_width
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.slots = slots
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self.connected = False
+        self.last_error = None
+        self.reconnects = 0
+        self.failures = 0
+
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._last_read = time.time()
+
+        self._av_frame = None
+        self._frame_id = 0
+        self._frame_time = None
+        self._array = None
+        self._array_id = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            self._last_read = time.time()
+            if self.running:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name=f"Capture-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        with self._lock:
+            self._new_frame.notify_all()
+        t = self._thread
+        if t and t is not threading.current_thread():
+            t.join(timeout)
+
+    def peek(self):
+        """
+        Returns (frame, timestamp) if the newest frame has already been converted,
+        otherwise (None, None). Never blocks.
+        """
+        with self._lock:
+            self._last_read = time.time()
+            if self._array is not None and self._array_id == self._frame_id:
+                return self._array, self._frame_time
+        return None, None
+
+    def read(self, timeout: float = 15.0):
+        """
+        Returns (frame, timestamp) of the newest decoded frame, waiting up to
+        `timeout` seconds for the first one. The returned array is shared
+        between readers and therefore read-only.
+
+        Raises TimeoutError if no frame arrived in time and ConnectionError if
+        the source failed meanwhile.
+        """
+        self.start()
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._last_read = time.time()
+            failures = self.failures
+            while self._av_frame is None:
+                if self.failures != failures:
+                    raise ConnectionError(f"Capture of {self.name} failed: {self.last_error}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop_event.is_set():
+                    reason = f": {self.last_error}" if self.last_error else ""
+                    raise TimeoutError(f"No frame from {self.name} within {timeout}s{reason}")
+                self._new_frame.wait(remaining)
+
+            if self._array is not None and self._array_id == self._frame_id:
+                return self._array, self._frame_time
+            av_frame, frame_id, frame_time = self._av_frame, self._frame_id, self._frame_time
+
+        # convert outside the lock so the decoder thread isn't held up
+        array = self._to_bgr(av_frame)
+        array.flags.writeable = False
+
+        with self._lock:
+            if frame_id >= self._array_id:
+                self._array = array
+                self._array_id = frame_id
+        return array, frame_time
+
+    def _to_bgr(self, av_frame):
+        return to_bgr(av_frame, self.max_width)
+
+    def _frames(self, container):
+        if self.keyframes_only:
+            return decode_keyframes(container)
+        stream = container.streams.video[0]
+        enable_threading(stream)
+        return container.decode(stream)
+
+    def _idle(self):
+        return self.idle_timeout is not None and time.time() - self._last_read > self.idle_timeout
+
+    def _clear_frame(self):
+        with self._lock:
+            self._av_frame = None
+            self._array = None
+            self._frame_time = None
+
+    def _acquire_slot(self):
+        """Waits for a connection slot of the source's host. False if stopped or idle meanwhile."""
+        if self.slots is None:
+            return True
+        return self.slots.acquire_session(self.url, cancelled=lambda: self._stop_event.is_set() or self._idle())
+
+    def _run(self):
+        backoff = self.min_backoff
+        while not self._stop_event.is_set():
+            if not self._acquire_slot():
+                break
+            container = None
+            try:
+                container = av.open(self.url, options=self.options, timeout=(self.open_timeout, self.read_timeout))
+                self.connected = True
+                self.last_error = None
+                for frame in self._frames(container):
+                    if self._stop_event.is_set() or self._idle():
+                        break
+                    with self._lock:
+                        self._av_frame = frame
+                        self._frame_id += 1
+                        self._frame_time = time.time()
+                        self._new_frame.notify_all()
+                    backoff = self.min_backoff
+                else:
+                    self.last_error = "stream ended"
+            except Exception as e:
+                with self._lock:
+                    self.last_error = str(e) or type(e).__name__
+                    self.failures += 1
+                    self._new_frame.notify_all()
+                print(f"[CaptureSession] {self.name}: capture failed: {e}")
+            finally:
+                self.connected = False
+                if container is not None:
+                    try:
+                        container.close()
+                    except Exception:
+                        pass
+                if self.slots is not None:
+                    self.slots.release_session(self.url)
+
+            # Never hand out frames from a connection that is gone
+            self._clear_frame()
+
+            if self._idle():
+                print(f"[CaptureSession] {self.name}: idle for {self.idle_timeout}s, closing source")
+                break
+            if self._stop_event.wait(backoff):
+                break
+            backoff = min(backoff * 2, self.max_backoff)
+            self.reconnects += 1
+
+        with self._lock:
+            self._new_frame.notify_all()
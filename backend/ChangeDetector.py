@@ -0,0 +1,97 @@
+#ChangeDetector
+#    Decides which selection boxes changed since their last OCR run.
+#    Each box gets a small perceptual signature (downsampled grayscale,
+#    normalized for brightness and contrast), so sensor noise and JPEG
+#    artefacts don't count as a change but a new digit does.
+
+import cv2
+import numpy as np
+
+SIGNATURE_SIZE = (32, 16)  # (width, height)
+# floor for the normalization; keeps noise on blank boxes from being blown up
+MIN_STD = 4.0
+DEFAULT_CHANGE_THRESHOLD = 0.1
+
+
+def box_signature(snippet: np.ndarray):
+    """Zero-mean, unit-variance grayscale thumbnail of a box, or None for empty boxes."""
+    if snippet is None or snippet.size == 0:
+        return None
+    gray = cv2.cvtColor(snippet, cv2.COLOR_BGR2GRAY) if snippet.ndim == 3 else snippet
+    small = cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+    return (small - small.mean()) / max(float(small.std()), MIN_STD)
+
+
+def signature_distance(a, b) -> float:
+    """Mean absolute difference of two signatures; inf if they can't be compared."""
+    if a is None and b is None:
+        return 0.0
+    if a is None or b is None:
+        return float("inf")
+    return float(np.abs(a - b).mean())
+
+
+class ChangeDetector:
+    """
+    Signatures of the boxes as they were at their last OCR, per stream.
+
+    `changed()` returns the indices of boxes that moved more than the
+    threshold; `commit()` stores the signatures of the boxes that were
+    OCRed. Unchanged boxes keep their old signature, so a slow drift still
+    triggers once it adds up. Anything that changes the box layout (pass a
+    new `key`) makes every box count as changed.
+    """
+
+    def __init__(self):
+        self._signatures = None
+        self._key = None
+        self.runs = 0
+        self.skipped = 0
+        self.partial = 0
+        self.boxes_total = 0
+        self.boxes_reused = 0
+
+    def changed(self, signatures, key=None, threshold=DEFAULT_CHANGE_THRESHOLD):
+        if (
+            self._signatures is None
+            or key != self._key
+            or len(signatures) != len(self._signatures)
+            or threshold <= 0
+        ):
+            return list(range(len(signatures)))
+        return [
+            i for i, (old, new) in enumerate(zip(self._signatures, signatures))
+            if signature_distance(old, new) > threshold
+        ]
+
+    def commit(self, signatures, changed, key=None):
+        if self._signatures is None or key != self._key or len(signatures) != len(self._signatures):
+            self._signatures = list(signatures)
+        else:
+            for i in changed:
+                self._signatures[i] = signatures[i]
+        self._key = key
+
+    def reset(self):
+        self._signatures = None
+
+    def record(self, total, changed):
+        self.runs += 1
+        self.boxes_total += total
+        self.boxes_reused += total - changed
+        if changed == 0:
+            self.skipped += 1
+        elif changed < total:
+            self.partial += 1
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "partial": self.partial,
+            "skip_ratio": round(self.skipped / self.runs, 4) if self.runs else 0.0,
+            "partial_ratio": round(self.partial / self.runs, 4) if self.runs else 0.0,
+            "boxes_total": self.boxes_total,
+            "boxes_reused": self.boxes_reused,
+            "box_reuse_ratio": round(self.boxes_reused / self.boxes_total, 4) if self.boxes_total else 0.0,
+        }
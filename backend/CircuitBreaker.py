@@ -0,0 +1,78 @@
+#CircuitBreaker
+#    Stops hammering a source that keeps failing. After `failure_threshold`
+#    failures in a row the breaker opens and calls are rejected right away;
+#    once the backoff has passed one probe call is let through (half-open).
+#    A failed probe opens it again for twice as long, a successful one closes it.
+
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, min_backoff=5.0, max_backoff=300.0):
+        self.failure_threshold = failure_threshold
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.state = CLOSED
+        self.failures = 0  # in a row
+        self.backoff = 0.0
+        self.retry_at = None
+        self._probe_started = None
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self, now=None) -> bool:
+        """Whether a call may go through now. In half-open state only one probe at a time does."""
+        now = time.time() if now is None else now
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now >= self.retry_at:
+            self.state = HALF_OPEN
+            self._probe_started = now
+            return True
+        if self.state == HALF_OPEN and now - self._probe_started >= self.backoff:
+            # the probe never reported back (e.g. it was cancelled), let another one try
+            self._probe_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    @property
+    def tripped(self) -> bool:
+        """True while calls are rejected."""
+        return self.state == OPEN and time.time() < self.retry_at
+
+    def success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = 0.0
+        self.retry_at = None
+
+    def failure(self, now=None):
+        now = time.time() if now is None else now
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.backoff = min(self.backoff * 2, self.max_backoff) if self.backoff else self.min_backoff
+            self.state = OPEN
+            self.retry_at = now + self.backoff
+            self.trips += 1
+
+    def retry_after(self, now=None) -> float:
+        """Seconds until the next probe is let through, 0 if calls go through now."""
+        if self.state != OPEN:
+            return 0.0
+        now = time.time() if now is None else now
+        return max(0.0, self.retry_at - now)
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "backoff_seconds": self.backoff,
+            "retry_after_seconds": round(self.retry_after(), 1),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
@@ -3,88 +3,212 @@ import queue
 import threading
 from datetime import datetime
 import time as time_module
-import asyncio
+import json
 
 class ExecutionLogger:
-    def __init__(self, stream_manager, db_path="/data/logs.db", ws_manager=None):
+    """
+    Per-stream execution log, stored in SQLite.
+
+    A dedicated thread drains the queue in batches and writes each batch in a
+    single transaction. Retention (max age and max entries per stream) runs
+    every `retention_interval` seconds or after `retention_every_rows` new rows,
+    not per log line.
+    """
+
+    def __init__(self, stream_manager, db_path="/data/logs.db", ws_manager=None,
+                 batch_size=500, retention_interval=300, retention_every_rows=5000,
+                 max_entries_per_stream=50000, max_age_days=7):
         self.stream_manager = stream_manager
         self.db_path = db_path
         self.ws_manager = ws_manager
 
+        self.batch_size = batch_size
+        self.retention_interval = retention_interval
+        self.retention_every_rows = retention_every_rows
+        self.max_entries_per_stream = max_entries_per_stream
+        self.max_age_days = max_age_days
+
         self.queue = queue.Queue()
 
+        # create schema up front so readers never race the worker thread
+        conn = self._connect()
+        try:
+            self._setup_db(conn)
+        finally:
+            conn.close()
+
+        self._local = threading.local()
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "rows_written": 0,
+            "batches_written": 0,
+            "last_batch_size": 0,
+            "last_write_ms": 0.0,
+            "avg_write_ms": 0.0,
+            "max_write_ms": 0.0,
+            "rows_pruned": 0,
+            "retention_runs": 0,
+            "last_retention_ms": 0.0,
+            "last_retention_at": None,
+            "write_errors": 0,
+        }
+
         # Start dedicated sqlite thread
         self._thread = threading.Thread(target=self._worker, daemon=True)
         self._thread.start()
 
     def _worker(self):
         """Dedicated DB thread. Owns the sqlite connection."""
-        conn = sqlite3.connect(self.db_path)
-        self._setup_db(conn)
-
-        while True:
-            job = self.queue.get()  # blocks
+        conn = self._connect()
 
-            if job is None:
-                break  
-
-            stream_id, level, message = job
-            timestamp = int(datetime.now().timestamp())
+        rows_since_retention = 0
+        dirty_streams = set()
+        last_retention = time_module.monotonic()
 
+        while True:
             try:
-                conn.execute(
-                    "INSERT INTO logs (stream_id, level, message, timestamp) VALUES (?, ?, ?, ?)",
-                    (stream_id, level, message, timestamp),
-                )
+                job = self.queue.get(timeout=self.retention_interval)  # blocks
+            except queue.Empty:
+                job = ()
+
+            stop = job is None
+            batch = [job] if job else []
+            while not stop and len(batch) < self.batch_size:
                 try:
-                    conn.commit()
-                except sqlite3.Error as e:
-                    print(f"[ERROR][ExecutionLogger] Retention DB error: {e}")
+                    job = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                else:
+                    batch.append(job)
 
-                # retention: remove logs older than 7 days
-                cutoff = time_module.time() - 7 * 24 * 60 * 60
-                conn.execute("DELETE FROM logs WHERE timestamp < ?", (cutoff,))
+            if batch:
+                timestamp = int(datetime.now().timestamp())
+                rows = [(stream_id, level, message, timestamp) for stream_id, level, message in batch]
+                start = time_module.perf_counter()
                 try:
-                    conn.commit()
-                except sqlite3.Error as e:
-                    print(f"[ERROR][ExecutionLogger] Retention DB error: {e}")
-
-                # keep last n entries per stream
-                MAX_ENTRIES = 50000 # TODO: make configurable
-                conn.execute("""
-                    DELETE FROM logs
-                    WHERE id IN (
-                        SELECT id FROM (
-                            SELECT id,
-                                   ROW_NUMBER() OVER (PARTITION BY stream_id ORDER BY timestamp DESC) AS rn
-                            FROM logs
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO logs (stream_id, level, message, timestamp) VALUES (?, ?, ?, ?)",
+                            rows,
                         )
-                        WHERE rn > ?
-                    )
-                """, (MAX_ENTRIES,))
-                try:
-                    conn.commit()
                 except sqlite3.Error as e:
-                    print(f"[ERROR][ExecutionLogger] Retention DB error: {e}")
-
-            except sqlite3.Error as e:
-                print(f"[ERROR][ExecutionLogger] Worker DB error: {e}")
-
-            if self.ws_manager:
-                self.ws_manager.loop.call_soon_threadsafe(
-                    asyncio.create_task,
-                    self.ws_manager.broadcast({
-                        "type": "logger/log",
-                        "stream_id": stream_id,
-                        "message": message,
-                        "level": level,
-                        "timestamp": timestamp,
-                    })
-                )
-            else:
-                print(f"[WARN][ExecutionLogger] No WS manager to broadcast log.")
-
-            self.queue.task_done()
+                    print(f"[ERROR][ExecutionLogger] Worker DB error: {e}")
+                    with self._metrics_lock:
+                        self._metrics["write_errors"] += 1
+                else:
+                    self._record_write(len(rows), (time_module.perf_counter() - start) * 1000)
+                    rows_since_retention += len(rows)
+                    dirty_streams.update(row[0] for row in rows)
+
+                self._broadcast(rows)
+
+            if dirty_streams and (
+                rows_since_retention >= self.retention_every_rows
+                or time_module.monotonic() - last_retention >= self.retention_interval
+                or stop
+            ):
+                self._run_retention(conn, dirty_streams)
+                rows_since_retention = 0
+                dirty_streams = set()
+                last_retention = time_module.monotonic()
+
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self.queue.task_done()
+
+            if stop:
+                break
+
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run_retention(self, conn, stream_ids):
+        """Drops rows older than max_age_days and caps the streams that got new rows."""
+        start = time_module.perf_counter()
+        pruned = 0
+        try:
+            with conn:
+                cutoff = time_module.time() - self.max_age_days * 24 * 60 * 60
+                pruned += conn.execute("DELETE FROM logs WHERE timestamp < ?", (cutoff,)).rowcount
+
+                # keep last n entries per stream; the (stream_id, timestamp) index makes this a short range scan
+                for stream_id in stream_ids:
+                    boundary = conn.execute(
+                        "SELECT timestamp, id FROM logs WHERE stream_id = ? ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?",
+                        (stream_id, self.max_entries_per_stream),
+                    ).fetchone()
+                    if boundary is None:
+                        continue
+                    pruned += conn.execute(
+                        "DELETE FROM logs WHERE stream_id = ? AND (timestamp < ? OR (timestamp = ? AND id <= ?))",
+                        (stream_id, boundary[0], boundary[0], boundary[1]),
+                    ).rowcount
+        except sqlite3.Error as e:
+            print(f"[ERROR][ExecutionLogger] Retention DB error: {e}")
+
+        with self._metrics_lock:
+            self._metrics["rows_pruned"] += pruned
+            self._metrics["retention_runs"] += 1
+            self._metrics["last_retention_ms"] = round((time_module.perf_counter() - start) * 1000, 3)
+            self._metrics["last_retention_at"] = int(time_module.time())
+
+    def _record_write(self, rows, elapsed_ms):
+        with self._metrics_lock:
+            m = self._metrics
+            m["rows_written"] += rows
+            m["batches_written"] += 1
+            m["last_batch_size"] = rows
+            m["last_write_ms"] = round(elapsed_ms, 3)
+            m["max_write_ms"] = round(max(m["max_write_ms"], elapsed_ms), 3)
+            # exponential moving average, recent batches matter most
+            m["avg_write_ms"] = round(elapsed_ms if m["batches_written"] == 1 else 0.9 * m["avg_write_ms"] + 0.1 * elapsed_ms, 3)
+
+    def _broadcast(self, rows):
+        if not self.ws_manager or not self.ws_manager.loop:
+            print(f"[WARN][ExecutionLogger] No WS manager to broadcast log.")
+            return
+
+        messages = [
+            {
+                "type": "logger/log",
+                "stream_id": stream_id,
+                "message": message,
+                "level": level,
+                "timestamp": timestamp,
+            }
+            for stream_id, level, message, timestamp in rows
+        ]
+
+        def _publish():
+            for message in messages:
+                self.ws_manager.publish(message)
+
+        try:
+            self.ws_manager.loop.call_soon_threadsafe(_publish)
+        except RuntimeError:
+            # the loop is closed, nobody is listening anymore
+            pass
+
+    def get_metrics(self):
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics["queue_depth"] = self.queue.qsize()
+        return metrics
+
+    def flush(self):
+        """Blocks until everything queued so far is written."""
+        self.queue.join()
+
+    def stop(self, timeout: float = 2.0):
+        self.queue.put(None)
+        self._thread.join(timeout)
 
     def _setup_db(self, conn):
         conn.execute("""
@@ -96,6 +220,9 @@ class ExecutionLogger:
             timestamp INTEGER
         )
         """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_stream_timestamp ON logs (stream_id, timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_stream_level_timestamp ON logs (stream_id, level, timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp)")
         conn.commit()
 
     # -------------------------
@@ -134,11 +261,87 @@ class ExecutionLogger:
             method_name += ": "
         self._push(stream_id, "DEBUG", method_name + message)
 
-    def get_logs(self, stream_id, limit=1000):
+    # -------------------------
+    # Log queries
+    # -------------------------
+
+    MAX_LIMIT = 50000
+    TOTAL_COUNT_CAP = 100000
+    _COLUMNS = (
+        "id, stream_id, level, message, timestamp, "
+        "strftime('%Y-%m-%dT%H:%M:%S', timestamp, 'unixepoch', 'localtime') AS iso"
+    )
+
+    def _reader(self):
+        """Read connection of the calling thread, opened once and reused."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def encode_cursor(timestamp, log_id):
+        return f"{int(timestamp)}:{int(log_id)}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            timestamp, log_id = str(cursor).split(":")
+            return int(timestamp), int(log_id)
+        except ValueError:
+            raise ValueError(f"Invalid cursor '{cursor}'.")
+
+    @staticmethod
+    def _filters(stream_id, level=None, since=None, until=None, q=None):
+        where = ["stream_id = ?"]
+        params = [stream_id]
+        if level:
+            where.append("level = ?")
+            params.append(str(level).upper())
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(int(since))
+        if until is not None:
+            where.append("timestamp <= ?")
+            params.append(int(until))
+        if q:
+            escaped = str(q).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("message LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        return where, params
+
+    def _query_page(self, where, params, cursor, limit):
+        where = list(where)
+        params = list(params)
+        if cursor is not None:
+            timestamp, log_id = self.decode_cursor(cursor)
+            where.append("timestamp <= ? AND (timestamp < ? OR id < ?)")
+            params.extend([timestamp, timestamp, log_id])
+        query = (
+            f"SELECT {self._COLUMNS} FROM logs WHERE {' AND '.join(where)} "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?"
+        )
+        return self._reader().execute(query, params + [limit]).fetchall()
+
+    def _count(self, where, params):
+        """Number of matching rows, counted up to TOTAL_COUNT_CAP. Returns (count, capped)."""
+        query = f"SELECT count(*) FROM (SELECT 1 FROM logs WHERE {' AND '.join(where)} LIMIT ?)"
+        count = self._reader().execute(query, params + [self.TOTAL_COUNT_CAP + 1]).fetchone()[0]
+        if count > self.TOTAL_COUNT_CAP:
+            return self.TOTAL_COUNT_CAP, True
+        return count, False
+
+    def get_logs(self, stream_id, limit=1000, level=None, since=None, until=None, q=None,
+                 cursor=None, with_total=True):
         """
-        Retrieve logs for a given stream_id sorted by timestamp (newest first).
+        Retrieve logs for a given stream_id, newest first.
         limit caps the number of returned rows (default 1000, max 50000).
-        Returns a list of dicts: {id, stream_id, level, message, timestamp, iso}
+        level, since/until (unix seconds) and q (substring of the message) filter server side.
+        Pass the returned next_cursor as cursor to get the next page; it is None on the last page.
+        total counts the matching rows up to TOTAL_COUNT_CAP (total_capped tells if it was reached),
+        it is None when with_total is False.
+        Log rows are dicts: {id, stream_id, level, message, timestamp, iso}
         """
         self._validate_stream(stream_id)
 
@@ -148,53 +351,48 @@ class ExecutionLogger:
             limit = 1000
         if limit <= 0:
             limit = 1000
+        if limit > self.MAX_LIMIT:
+            limit = self.MAX_LIMIT
 
-        MAX_LIMIT = 50000
-        if limit > MAX_LIMIT:
-            limit = MAX_LIMIT
+        where, params = self._filters(stream_id, level, since, until, q)
+        rows = self._query_page(where, params, cursor, limit + 1)
 
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            cur = conn.execute(
-                "SELECT id, stream_id, level, message, timestamp FROM logs WHERE stream_id = ? ORDER BY timestamp DESC LIMIT ?",
-                (stream_id, limit),
-            )
-            rows = cur.fetchall()
-        finally:
-            conn.close()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
 
-        conn2 = sqlite3.connect(self.db_path)
-        conn2.row_factory = sqlite3.Row
-        try:
-            cur = conn2.execute(
-                "SELECT count(*) FROM logs WHERE stream_id = ?",
-                (stream_id,), # DONT FORGET THE COMMA
-            )
-            rowsTotal = cur.fetchall()
-            print(" [ExecutionLogger] Total logs for stream", stream_id, ":", rowsTotal[0][0])
-        finally:
-            conn2.close()
+        total, capped = (None, False)
+        if with_total:
+            total, capped = self._count(where, params)
 
-        result = []
-        for r in rows:
-            ts = r["timestamp"]
-            iso = None
-            try:
-                iso = datetime.fromtimestamp(int(ts)).isoformat()
-            except Exception:
-                iso = None
-            result.append({
-                "id": r["id"],
-                "stream_id": r["stream_id"],
-                "level": r["level"],
-                "message": r["message"],
-                "timestamp": ts,
-                "iso": iso,
-            })
         return {
             "stream_id": stream_id,
-            "logs": result,
-            "total": rowsTotal[0][0],
-            "limit": limit
+            "logs": [dict(r) for r in rows],
+            "total": total,
+            "total_capped": capped,
+            "limit": limit,
+            "next_cursor": next_cursor,
         }
+
+    def iter_logs_ndjson(self, stream_id, limit=None, level=None, since=None, until=None, q=None,
+                         cursor=None, page_size=1000):
+        """
+        Same filters as get_logs, but yields one JSON line per log row, page by page,
+        so exports of any size never sit in memory. limit=None streams every match.
+        """
+        self._validate_stream(stream_id)
+        where, params = self._filters(stream_id, level, since, until, q)
+        remaining = int(limit) if limit else None
+
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            rows = self._query_page(where, params, cursor, size)
+            if not rows:
+                break
+            yield "".join(json.dumps(dict(r)) + "\n" for r in rows)
+            if len(rows) < size:
+                break
+            cursor = self.encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+            if remaining is not None:
+                remaining -= len(rows)
@@ -0,0 +1,35 @@
+#Frame
+#    A decoded BGR image travelling through the StreamHandler pipeline.
+#    Stays an ndarray end to end; JPEG encoding only happens when a client
+#    actually asks for an image.
+
+import time
+import cv2
+import numpy as np
+
+
+class Frame:
+    """
+    BGR image plus the time it was captured.
+
+    `to_jpeg()` encodes lazily and caches the bytes per quality setting, so
+    several HTTP consumers of the same frame only pay for one encode.
+    """
+
+    def __init__(self, image: np.ndarray, timestamp: float = None):
+        self.image = image
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self._jpeg = {}
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def to_jpeg(self, quality: int = None) -> bytes:
+        if quality not in self._jpeg:
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)] if quality is not None else []
+            success, buffer = cv2.imencode(".jpg", self.image, params)
+            if not success:
+                raise RuntimeError("Failed to encode frame as JPEG")
+            self._jpeg[quality] = buffer.tobytes()
+        return self._jpeg[quality]
@@ -0,0 +1,58 @@
+#FrameDecoder
+#    Decoding helpers for stills. A meter reading needs one sharp picture, not
+#    every frame: keyframe-only decoding skips the P/B-frames, and frames go
+#    straight to a BGR ndarray through swscale instead of PIL + numpy + cvtColor.
+
+import av
+
+
+def enable_threading(stream):
+    """Lets the codec pick frame/slice threading and the thread count."""
+    stream.thread_type = "AUTO"
+
+
+def decode_keyframes(container, stream=None, threads=True):
+    """
+    Yields only the keyframes of a container. Other packets are dropped before
+    they reach the decoder.
+    """
+    stream = stream or container.streams.video[0]
+    ctx = stream.codec_context
+    ctx.skip_frame = "NONKEY"
+    if threads:
+        enable_threading(stream)
+    for packet in container.demux(stream):
+        if not packet.is_keyframe:
+            continue
+        # Drain right away: with B-frame reordering (and frame threading) the
+        # decoder would otherwise hold the picture back until later keyframes.
+        frames = ctx.decode(packet) + ctx.decode(None)
+        ctx.flush_buffers()
+        yield from frames
+
+
+def to_bgr(frame, max_width=None):
+    """
+    BGR ndarray of a decoded frame in a single swscale pass. With `max_width`
+    wider frames are scaled down in the same pass (keeping the aspect ratio).
+    The array is a view of the converted frame, no further copy is made.
+    """
+    if max_width and frame.width > max_width:
+        width = max(2, int(max_width) & ~1)
+        height = max(2, round(frame.height * width / frame.width) & ~1)
+        return frame.to_ndarray(format="bgr24", width=width, height=height, interpolation="AREA")
+    return frame.to_ndarray(format="bgr24")
+
+
+def decode_still(url, options=None, keyframes_only=True, max_width=None):
+    """First (key)frame of a source as a BGR ndarray, or None if it has none."""
+    with av.open(url, options=options) as container:
+        if keyframes_only:
+            frames = decode_keyframes(container)
+        else:
+            stream = container.streams.video[0]
+            enable_threading(stream)
+            frames = container.decode(stream)
+        for frame in frames:
+            return to_bgr(frame, max_width)
+    return None
@@ -0,0 +1,166 @@
+#MjpegBroadcaster
+#    Live view as multipart/x-mixed-replace MJPEG. All viewers of a stream
+#    asking for the same fps, width, quality and mode share one feed: it
+#    takes the stream's newest frame once per tick, encodes it only if it is
+#    new, and hands the same bytes to every viewer. A viewer only ever holds
+#    the newest part; one that doesn't take a frame for `max_lag` seconds
+#    is disconnected.
+
+import asyncio
+import time
+
+import cv2
+
+BOUNDARY = "frame"
+MEDIA_TYPE = f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+
+
+def encode_part(image, width=None, quality=80) -> bytes:
+    """One multipart part: headers, JPEG bytes (scaled down to `width`), CRLF."""
+    if width and image.shape[1] > width:
+        height = max(1, round(image.shape[0] * width / image.shape[1]))
+        image = cv2.resize(image, (int(width), height), interpolation=cv2.INTER_AREA)
+    success, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not success:
+        raise RuntimeError("Failed to encode live view frame")
+    jpeg = buffer.tobytes()
+    header = f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+    return header + jpeg + b"\r\n"
+
+
+class _Viewer:
+    def __init__(self):
+        self.part = None
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.waiting_since = None  # a part has been waiting for the viewer since
+        self.sent = 0
+        self.skipped = 0
+
+    def offer(self, part, now):
+        if self.part is not None:
+            self.skipped += 1
+        elif self.waiting_since is None:
+            self.waiting_since = now
+        self.part = part
+        self.ready.set()
+
+    def take(self):
+        part, self.part = self.part, None
+        self.waiting_since = None
+        self.ready.clear()
+        return part
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+
+class _Feed:
+    def __init__(self, key):
+        self.key = key
+        self.viewers = set()
+        self.task = None
+        self.ticks = 0
+        self.encodes = 0
+        self.errors = 0
+
+
+class MjpegBroadcaster:
+    """
+    stream(handler, fps, width, quality, processed) is the body of one
+    viewer's response. `handler` needs live_frame(processed, since) returning
+    a Frame, or None if there is no frame newer than the timestamp `since`,
+    and a `demand` the feed holds a "live" lease on.
+    """
+
+    def __init__(self, max_lag=5.0):
+        self.max_lag = max_lag
+        self._feeds = {}
+        self.viewers_total = 0
+        self.disconnected_slow = 0
+
+    async def stream(self, handler, fps=5.0, width=None, quality=80, processed=False):
+        key = (handler.id, float(fps), int(width) if width else None, int(quality), bool(processed))
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = _Feed(key)
+        viewer = _Viewer()
+        feed.viewers.add(viewer)
+        self.viewers_total += 1
+        if feed.task is None or feed.task.done():
+            feed.task = asyncio.create_task(self._produce(handler, feed))
+
+        try:
+            while True:
+                await viewer.ready.wait()
+                if viewer.closed:
+                    break
+                part = viewer.take()
+                if part is not None:
+                    yield part
+                    viewer.sent += 1
+            yield f"--{BOUNDARY}--\r\n".encode()
+        finally:
+            feed.viewers.discard(viewer)
+
+    async def _produce(self, handler, feed):
+        _, fps, width, quality, processed = feed.key
+        interval = 1 / max(fps, 0.01)
+        loop = asyncio.get_running_loop()
+        last_timestamp = None
+        handler.demand.acquire("live")
+        try:
+            while feed.viewers:
+                started = loop.time()
+                feed.ticks += 1
+                try:
+                    frame = await handler.live_frame(processed, since=last_timestamp)
+                    if frame is not None:
+                        last_timestamp = frame.timestamp
+                        part = await asyncio.to_thread(encode_part, frame.image, width, quality)
+                        feed.encodes += 1
+                        self._publish(feed, part)
+                except Exception as e:
+                    feed.errors += 1
+                    print(f"[MjpegBroadcaster] Live view of {handler.id} failed: {e}")
+                await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+        finally:
+            handler.demand.release("live")
+            for viewer in list(feed.viewers):
+                viewer.close()
+            if self._feeds.get(feed.key) is feed:
+                del self._feeds[feed.key]
+
+    def _publish(self, feed, part):
+        now = time.monotonic()
+        for viewer in list(feed.viewers):
+            if viewer.waiting_since is not None and now - viewer.waiting_since > self.max_lag:
+                # hasn't taken a frame for max_lag seconds: end its response
+                feed.viewers.discard(viewer)
+                viewer.close()
+                self.disconnected_slow += 1
+                print(f"[MjpegBroadcaster] Viewer of {feed.key[0]} can't keep up, disconnecting")
+                continue
+            viewer.offer(part, now)
+
+    def stats(self):
+        return {
+            "feeds": [
+                {
+                    "stream_id": feed.key[0],
+                    "fps": feed.key[1],
+                    "width": feed.key[2],
+                    "quality": feed.key[3],
+                    "processed": feed.key[4],
+                    "viewers": len(feed.viewers),
+                    "ticks": feed.ticks,
+                    "encodes": feed.encodes,
+                    "errors": feed.errors,
+                    "skipped": sum(viewer.skipped for viewer in feed.viewers),
+                }
+                for feed in self._feeds.values()
+            ],
+            "viewers_total": self.viewers_total,
+            "disconnected_slow": self.disconnected_slow,
+        }
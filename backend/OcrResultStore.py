@@ -0,0 +1,178 @@
+import sqlite3
+import queue
+import threading
+import json
+import os
+
+
+class OcrResultStore:
+    """
+    OCR result history, stored in SQLite (WAL mode).
+
+    One row per (stream_id, timestamp). Writes are queued to a dedicated writer
+    thread, like the ExecutionLogger, so callers on the event loop never wait
+    for the disk. Each batch of queued writes is committed in one transaction.
+
+    Entries have the same shape StreamHandler always used:
+        {"results": [...], "aggregate": {"value", "confidence", "timestamp", "image-fingerprint"}}
+    """
+
+    def __init__(self, db_path="/data/ocr.db", legacy_json_path="/data/ocr.json"):
+        self.db_path = db_path
+        self.queue = queue.Queue()
+        self._local = threading.local()
+
+        conn = self._connect()
+        try:
+            self._setup_db(conn)
+            if legacy_json_path:
+                self._migrate_json(conn, legacy_json_path)
+        finally:
+            conn.close()
+
+        self._thread = threading.Thread(target=self._worker, name="OcrResultStore", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _setup_db(self, conn):
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS ocr_results (
+            stream_id TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            value REAL,
+            confidence REAL,
+            fingerprint TEXT,
+            results TEXT,
+            PRIMARY KEY (stream_id, timestamp)
+        )
+        """)
+        conn.commit()
+
+    def _migrate_json(self, conn, json_path):
+        """Imports the latest results of the old /data/ocr.json once, then renames the file."""
+        if not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[ERROR][OcrResultStore] Could not migrate {json_path}: {e}")
+            return
+
+        rows = []
+        for stream_id, entry in data.items():
+            if isinstance(entry, dict) and "aggregate" in entry:
+                rows.append(self._to_row(stream_id, entry))
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO ocr_results (stream_id, timestamp, value, confidence, fingerprint, results) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        os.replace(json_path, json_path + ".migrated")
+        print(f"[OcrResultStore] Migrated {len(rows)} results from {json_path}")
+
+    @staticmethod
+    def _to_row(stream_id, entry):
+        aggregate = entry.get("aggregate", {})
+        return (
+            stream_id,
+            int(aggregate.get("timestamp", 0) or 0),
+            aggregate.get("value"),
+            aggregate.get("confidence"),
+            aggregate.get("image-fingerprint"),
+            json.dumps(entry.get("results", [])),
+        )
+
+    @staticmethod
+    def _from_row(row):
+        return {
+            "results": json.loads(row[5]) if row[5] else [],
+            "aggregate": {
+                "value": row[2],
+                "confidence": row[3],
+                "timestamp": row[1],
+                "image-fingerprint": row[4],
+            },
+        }
+
+    def _worker(self):
+        """Dedicated writer thread. Owns the write connection."""
+        conn = self._connect()
+        while True:
+            job = self.queue.get()  # blocks
+            if job is None:
+                self.queue.task_done()
+                break
+
+            # drain whatever else is queued into the same transaction
+            jobs = [job]
+            stop = False
+            while True:
+                try:
+                    job = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                jobs.append(job)
+
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO ocr_results (stream_id, timestamp, value, confidence, fingerprint, results) VALUES (?, ?, ?, ?, ?, ?)",
+                        [self._to_row(stream_id, entry) for stream_id, entry in jobs],
+                    )
+            except sqlite3.Error as e:
+                print(f"[ERROR][OcrResultStore] Worker DB error: {e}")
+
+            for _ in range(len(jobs) + (1 if stop else 0)):
+                self.queue.task_done()
+            if stop:
+                break
+        conn.close()
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def store(self, stream_id, entry):
+        """Queues an entry for writing. Returns immediately."""
+        self.queue.put((stream_id, entry))
+
+    def flush(self):
+        """Blocks until all queued writes are committed."""
+        self.queue.join()
+
+    def latest(self, stream_id):
+        """Newest stored entry for a stream, or None."""
+        row = self._reader().execute(
+            "SELECT stream_id, timestamp, value, confidence, fingerprint, results FROM ocr_results WHERE stream_id = ? ORDER BY timestamp DESC LIMIT 1",
+            (stream_id,),
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def history(self, stream_id, limit=100, since=None, until=None):
+        """Stored entries of a stream, newest first."""
+        query = "SELECT stream_id, timestamp, value, confidence, fingerprint, results FROM ocr_results WHERE stream_id = ?"
+        params = [stream_id]
+        if since is not None:
+            query += " AND timestamp >= ?"
+            params.append(int(since))
+        if until is not None:
+            query += " AND timestamp <= ?"
+            params.append(int(until))
+        query += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(int(limit))
+        return [self._from_row(row) for row in self._reader().execute(query, params).fetchall()]
+
+    def stop(self, timeout: float = 2.0):
+        self.queue.put(None)
+        self._thread.join(timeout)
@@ -0,0 +1,54 @@
+#OffsetCronTrigger
+#    A crontab trigger that fires a fixed number of seconds after every cron
+#    time. Used to spread streams with the same cron expression over the
+#    interval instead of firing them all in the same second.
+
+import hashlib
+from datetime import datetime, timedelta
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+
+
+def stable_offset(uid: str, spread: float) -> int:
+    """Whole seconds in [0, spread), always the same for the same uid."""
+    if spread < 1:
+        return 0
+    digest = int(hashlib.sha1(uid.encode()).hexdigest()[:8], 16)
+    return digest % int(spread)
+
+
+class OffsetCronTrigger(BaseTrigger):
+    def __init__(self, cron: CronTrigger, offset: float):
+        self.cron = cron
+        self.offset = timedelta(seconds=offset)
+
+    @classmethod
+    def from_crontab(cls, expr: str, uid: str, max_offset: float):
+        """
+        Cron trigger for `expr`, delayed by a stable per-uid offset of less than
+        `max_offset` seconds and less than the cron interval.
+        """
+        cron = CronTrigger.from_crontab(expr)
+        return cls(cron, stable_offset(uid, min(max_offset, cron_interval(cron))))
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        previous = previous_fire_time - self.offset if previous_fire_time else None
+        next_time = self.cron.get_next_fire_time(previous, now - self.offset)
+        return next_time + self.offset if next_time else None
+
+    def __str__(self):
+        return f"{self.cron} +{int(self.offset.total_seconds())}s"
+
+    def __repr__(self):
+        return f"<OffsetCronTrigger ({self.cron!r}, offset={self.offset.total_seconds():g}s)>"
+
+
+def cron_interval(cron: CronTrigger) -> float:
+    """Seconds between two consecutive fire times of a cron trigger (from now), inf if it fires once."""
+    now = datetime.now(cron.timezone)
+    first = cron.get_next_fire_time(None, now)
+    second = cron.get_next_fire_time(first, first) if first else None
+    if not second:
+        return float("inf")
+    return (second - first).total_seconds()
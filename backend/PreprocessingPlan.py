@@ -0,0 +1,208 @@
+#PreprocessingPlan
+#    Compiled form of a stream's processingSettings and selectionBoxes.
+#    Rotation, contrast/brightness and crop are only ever applied to the pixels
+#    that are actually needed: the crop window for a rendered frame, or the
+#    selection boxes for OCR.
+
+import time
+import cv2
+import numpy as np
+
+DEFAULT_PROCESSING_SETTINGS = {
+    "rotation": 0,
+    "contrast": 1.0,
+    "brightness": 0,
+    "crop_top": 0,
+    "crop_bottom": 0,
+    "crop_left": 0,
+    "crop_right": 0,
+}
+
+# cv2.rotate codes for right angles. OpenCV rotates counter-clockwise for positive angles.
+_RIGHT_ANGLE_ROTATIONS = {
+    90: cv2.ROTATE_90_COUNTERCLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_CLOCKWISE,
+}
+
+
+class _Geometry:
+    """Everything that depends on the source frame size, computed once per size."""
+
+    def __init__(self, plan, shape):
+        h, w = shape[:2]
+        self.shape = (h, w)
+        self.matrix = cv2.getRotationMatrix2D((w // 2, h // 2), plan.rotation, 1.0)
+        self.inverse = cv2.invertAffineTransform(self.matrix)
+
+        top = min(plan.crop_top, h)
+        bottom = max(h - plan.crop_bottom, 0)
+        left = min(plan.crop_left, w)
+        right = max(w - plan.crop_right, 0)
+        self.crop = (left, top, max(right, left), max(bottom, top))
+
+        # selection boxes are relative to the cropped frame; clip them like numpy slicing would
+        crop_w = self.crop[2] - left
+        crop_h = self.crop[3] - top
+        self.boxes = []
+        for box in plan.boxes:
+            x0 = left + min(max(box[0], 0), crop_w)
+            y0 = top + min(max(box[1], 0), crop_h)
+            x1 = left + min(max(box[0] + box[2], 0), crop_w)
+            y1 = top + min(max(box[1] + box[3], 0), crop_h)
+            self.boxes.append((x0, y0, max(x1, x0), max(y1, y0)))
+
+        self._window_matrices = {}
+
+    def window_matrix(self, rect):
+        """Rotation matrix shifted so that warpAffine renders just `rect` of the rotated frame."""
+        matrix = self._window_matrices.get(rect)
+        if matrix is None:
+            matrix = self.matrix.copy()
+            matrix[0, 2] -= rect[0]
+            matrix[1, 2] -= rect[1]
+            self._window_matrices[rect] = matrix
+        return matrix
+
+    def source_rect(self, rect):
+        """Bounding rect (x0, y0, x1, y1) of the source pixels that feed `rect` of the rotated frame."""
+        x0, y0, x1, y1 = rect
+        if x1 <= x0 or y1 <= y0:
+            return (0, 0, 0, 0)
+        # map the outermost pixel centres, interpolation may also touch the next pixel
+        corners = np.array([[x0, y0, 1], [x1 - 1, y0, 1], [x0, y1 - 1, 1], [x1 - 1, y1 - 1, 1]], dtype=np.float64)
+        src = corners @ self.inverse.T
+        h, w = self.shape
+        sx0 = int(np.clip(np.floor(src[:, 0].min() + 1e-6), 0, w))
+        sy0 = int(np.clip(np.floor(src[:, 1].min() + 1e-6), 0, h))
+        sx1 = int(np.clip(np.ceil(src[:, 0].max() - 1e-6) + 1, 0, w))
+        sy1 = int(np.clip(np.ceil(src[:, 1].max() - 1e-6) + 1, 0, h))
+        return (sx0, sy0, sx1, sy1)
+
+
+class PreprocessingPlan:
+    """
+    Compiled preprocessing for one stream.
+
+    Build it once per settings/boxes change; it caches the rotation matrices per
+    frame size and a 256-entry LUT for contrast/brightness. Timings of the last
+    render()/extract_rois() call are kept in `timings` (milliseconds).
+    """
+
+    def __init__(self, processingSettings: dict, selectionBoxes):
+        settings = {**DEFAULT_PROCESSING_SETTINGS, **(processingSettings or {})}
+
+        self.rotation = float(settings["rotation"] or 0) % 360
+        self.contrast = float(settings["contrast"] if settings["contrast"] is not None else 1.0)
+        self.brightness = float(settings["brightness"] or 0)
+        self.crop_top = int(settings["crop_top"] or 0)
+        self.crop_bottom = int(settings["crop_bottom"] or 0)
+        self.crop_left = int(settings["crop_left"] or 0)
+        self.crop_right = int(settings["crop_right"] or 0)
+
+        self.boxes = [
+            (int(box["box_left"]), int(box["box_top"]), int(box["box_width"]), int(box["box_height"]))
+            for box in (selectionBoxes or [])
+        ]
+
+        self.right_angle = None
+        nearest = round(self.rotation / 90) * 90 % 360
+        if abs(self.rotation - nearest) < 1e-9 or abs(self.rotation - nearest - 360) < 1e-9:
+            self.right_angle = int(nearest)
+
+        self.lut = None
+        if self.contrast != 1.0 or self.brightness != 0.0:
+            # let convertScaleAbs fill the table so rounding matches it exactly
+            ramp = np.arange(256, dtype=np.uint8).reshape(1, 256)
+            self.lut = cv2.convertScaleAbs(ramp, alpha=self.contrast, beta=self.brightness).reshape(256)
+
+        self._geometries = {}
+        self.timings = {}
+
+    def geometry(self, shape):
+        key = tuple(shape[:2])
+        geometry = self._geometries.get(key)
+        if geometry is None:
+            geometry = self._geometries[key] = _Geometry(self, shape)
+        return geometry
+
+    def source_boxes(self, shape):
+        """Selection boxes mapped back to (x0, y0, x1, y1) rects in source frame coordinates."""
+        geometry = self.geometry(shape)
+        return [geometry.source_rect(rect) for rect in geometry.boxes]
+
+    def render(self, image: np.ndarray) -> np.ndarray:
+        """Full processed frame (rotated, adjusted, cropped). Always returns a writable array."""
+        start = time.perf_counter()
+        geometry = self.geometry(image.shape)
+        out = self._transform(image, geometry, geometry.crop)
+        transformed = time.perf_counter()
+        out = self._adjust(out)
+        if not out.flags.writeable or out.base is not None:
+            out = out.copy()
+        done = time.perf_counter()
+        self.timings["render"] = {
+            "geometry_ms": round((transformed - start) * 1000, 3),
+            "adjust_ms": round((done - transformed) * 1000, 3),
+            "total_ms": round((done - start) * 1000, 3),
+        }
+        return out
+
+    def extract_rois(self, image: np.ndarray):
+        """
+        One processed snippet per selection box, computed from the source frame
+        directly. Boxes outside the frame yield an empty array. Snippets may be
+        read-only views of `image` when no transformation is needed.
+        """
+        start = time.perf_counter()
+        geometry = self.geometry(image.shape)
+        transformed_rois = [self._transform(image, geometry, rect) for rect in geometry.boxes]
+        transformed = time.perf_counter()
+        rois = [self._adjust(roi) for roi in transformed_rois]
+        done = time.perf_counter()
+        self.timings["rois"] = {
+            "geometry_ms": round((transformed - start) * 1000, 3),
+            "adjust_ms": round((done - transformed) * 1000, 3),
+            "total_ms": round((done - start) * 1000, 3),
+            "pixels": int(sum(roi.shape[0] * roi.shape[1] for roi in rois)),
+        }
+        return rois
+
+    def _adjust(self, roi):
+        if self.lut is None or roi.size == 0:
+            return roi
+        return cv2.LUT(roi, self.lut)
+
+    def _transform(self, image, geometry, rect):
+        x0, y0, x1, y1 = rect
+        if x1 <= x0 or y1 <= y0:
+            return image[0:0, 0:0]
+
+        if self.right_angle == 0:
+            return image[y0:y1, x0:x1]
+        if self.right_angle is not None:
+            return self._rotate_right_angle(image, geometry, rect)
+
+        # arbitrary angle: warp only the requested window of the rotated frame
+        return cv2.warpAffine(image, geometry.window_matrix(rect), (x1 - x0, y1 - y0))
+
+    def _rotate_right_angle(self, image, geometry, rect):
+        x0, y0, x1, y1 = rect
+        inverse = np.rint(geometry.inverse)
+        # source pixels of two opposite corners of the window
+        corners = np.array([[x0, y0, 1], [x1 - 1, y1 - 1, 1]], dtype=np.float64) @ inverse.T
+        sx0, sx1 = int(corners[:, 0].min()), int(corners[:, 0].max()) + 1
+        sy0, sy1 = int(corners[:, 1].min()), int(corners[:, 1].max()) + 1
+
+        h, w = image.shape[:2]
+        if sx0 >= 0 and sy0 >= 0 and sx1 <= w and sy1 <= h:
+            region = image[sy0:sy1, sx0:sx1]
+        else:
+            # window reaches outside the source: pad with black like warpAffine does
+            region = np.zeros((sy1 - sy0, sx1 - sx0) + image.shape[2:], dtype=image.dtype)
+            cx0, cy0 = max(sx0, 0), max(sy0, 0)
+            cx1, cy1 = min(sx1, w), min(sy1, h)
+            if cx1 > cx0 and cy1 > cy0:
+                region[cy0 - sy0:cy1 - sy0, cx0 - sx0:cx1 - sx0] = image[cy0:cy1, cx0:cx1]
+
+        return cv2.rotate(region, _RIGHT_ANGLE_ROTATIONS[self.right_angle])
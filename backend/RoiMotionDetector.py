@@ -0,0 +1,137 @@
+#RoiMotionDetector
+#    Cheap change detection on the selection boxes for the "watch" execution
+#    mode. Every sampled box is shrunk to a small grayscale thumbnail and
+#    compared (mean absolute difference) with a slowly updated running
+#    background. OCR is due once a box moved away from the background and the
+#    picture has settled again, so a meter that is still rolling isn't read
+#    half way.
+
+import time
+
+import cv2
+import numpy as np
+
+THUMBNAIL_WIDTH = 64
+DEFAULT_THRESHOLD = 8.0  # grey levels
+DEFAULT_SETTLE = 2.0  # seconds without movement before OCR
+DEFAULT_MIN_INTERVAL = 10.0  # seconds between two triggered OCR runs
+BACKGROUND_ALPHA = 0.05
+
+
+def roi_thumbnail(snippet: np.ndarray):
+    """Small float32 grayscale copy of a box, or None for empty boxes."""
+    if snippet is None or snippet.size == 0:
+        return None
+    gray = cv2.cvtColor(snippet, cv2.COLOR_BGR2GRAY) if snippet.ndim == 3 else snippet
+    h, w = gray.shape
+    if w > THUMBNAIL_WIDTH:
+        gray = cv2.resize(gray, (THUMBNAIL_WIDTH, max(1, h * THUMBNAIL_WIDTH // w)), interpolation=cv2.INTER_AREA)
+    return gray.astype(np.float32)
+
+
+def _mad(a, b):
+    if a is None or b is None:
+        return 0.0 if a is None and b is None else float("inf")
+    if a.shape != b.shape:
+        return float("inf")
+    return float(np.abs(a - b).mean())
+
+
+class RoiMotionDetector:
+    """
+    observe() takes the boxes of every sample and says whether OCR should run now,
+    acknowledge() tells it that this OCR run went through.
+
+    - changed: a box differs from the running background by more than `threshold`
+    - settled: no box moved more than `threshold` since the previous sample,
+      for `settle` seconds
+    - OCR runs when a change is pending and the boxes settled, or when they keep
+      moving for longer than `min_interval`; never twice within `min_interval`.
+    Once acknowledged, the background jumps to the picture that triggered. A
+    trigger that is never acknowledged (the OCR run failed) stays pending and
+    fires again after `min_interval`.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, settle=DEFAULT_SETTLE, min_interval=DEFAULT_MIN_INTERVAL):
+        self.threshold = threshold
+        self.settle = settle
+        self.min_interval = min_interval
+        self._background = None
+        self._previous = None
+        self._pending_since = None
+        self._last_motion = None
+        self._last_trigger = None
+        self._triggered = None  # thumbnails of the trigger waiting for acknowledge()
+        self.samples = 0
+        self.triggers = 0
+        self.last_scores = []
+        self.sample_ms = 0.0
+
+    def reset(self):
+        """Forget the background, e.g. after the boxes changed."""
+        self._background = None
+        self._previous = None
+        self._pending_since = None
+        self._last_motion = None
+        self._triggered = None
+
+    def observe(self, snippets, now=None) -> bool:
+        now = time.time() if now is None else now
+        start = time.perf_counter()
+        current = [roi_thumbnail(snippet) for snippet in snippets]
+        self.samples += 1
+
+        if self._background is None or len(self._background) != len(current):
+            # first sample: nothing to compare with, read once to have a baseline value
+            self._background = [None if c is None else c.copy() for c in current]
+            self._previous = current
+            self._pending_since = now
+            self._last_motion = None
+            self.last_scores = [0.0] * len(current)
+        else:
+            scores = [_mad(c, b) for c, b in zip(current, self._background)]
+            motion = [_mad(c, p) for c, p in zip(current, self._previous)]
+            self.last_scores = [round(score, 2) if score != float("inf") else None for score in scores]
+            if any(score > self.threshold for score in scores) and self._pending_since is None:
+                self._pending_since = now
+            if any(m > self.threshold for m in motion):
+                self._last_motion = now
+            for b, c in zip(self._background, current):
+                if b is not None and c is not None and b.shape == c.shape:
+                    cv2.accumulateWeighted(c, b, BACKGROUND_ALPHA)
+            self._previous = current
+
+        due = self._due(now)
+        if due:
+            self._last_trigger = now
+            self._triggered = current
+        self.sample_ms = round((time.perf_counter() - start) * 1000, 3)
+        return due
+
+    def acknowledge(self):
+        """The OCR run of the last trigger succeeded: its picture becomes the background."""
+        if self._triggered is None:
+            return
+        self._background = [None if c is None else c.copy() for c in self._triggered]
+        self._pending_since = None
+        self._triggered = None
+        self.triggers += 1
+
+    def _due(self, now):
+        if self._pending_since is None:
+            return False
+        if self._last_trigger is not None and now - self._last_trigger < self.min_interval:
+            return False
+        settled = self._last_motion is None or now - self._last_motion >= self.settle
+        return settled or now - self._pending_since >= self.min_interval
+
+    def stats(self):
+        return {
+            "samples": self.samples,
+            "triggers": self.triggers,
+            "pending": self._pending_since is not None,
+            "last_scores": self.last_scores,
+            "last_trigger": self._last_trigger,
+            "sample_ms": self.sample_ms,
+            "threshold": self.threshold,
+        }
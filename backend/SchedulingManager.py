@@ -1,17 +1,38 @@
 from backend.StreamManager import StreamManager
 from backend.StreamHandler import StreamHandler
+from backend.OffsetCronTrigger import OffsetCronTrigger
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from datetime import datetime, timedelta
 import asyncio
+import os
+from backend.ocr.OcrJobQueue import OcrPriority, OcrQueueFull
 
 class SchedulingManager:
 
     """
     Manager for scheduling OCR jobs.
+
+    Every job fires at a stable per-stream offset after its cron time (at most
+    max_offset seconds, never more than the interval), so streams sharing an
+    expression don't all connect and OCR in the same second. At most
+    max_concurrent scheduled runs are in flight, the others wait their turn.
+    Runs missed while the server was down or busy are coalesced into one.
+
+    Streams in "adaptive" execution mode get a one-shot job that reschedules
+    itself after every run, with the interval StreamHandler.get_adaptive_interval picks.
     """
-    def __init__(self, streamManager: StreamManager):
+    def __init__(self, streamManager: StreamManager, max_offset: float = None, max_concurrent: int = None, misfire_grace_time: int = 60):
         self.streamManager = streamManager
         self.scheduler = AsyncIOScheduler()
+        self.max_offset = max_offset if max_offset is not None else float(os.environ.get("SCHEDULER_MAX_OFFSET_SECONDS", 300))
+        self.max_concurrent = max_concurrent or int(os.environ.get("SCHEDULER_MAX_CONCURRENT", 2))
+        self.misfire_grace_time = misfire_grace_time
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
 
     def start(self):
         self.scheduler.start()
@@ -19,19 +40,45 @@ class SchedulingManager:
 
     def add_job(self, cron_expression: str, uid: str):
         try:
-            trigger = CronTrigger.from_crontab(cron_expression)
+            trigger = OffsetCronTrigger.from_crontab(cron_expression, uid, self.max_offset)
             self.scheduler.add_job(
                 self.executeScheduling,
                 trigger,
                 args=[uid],
                 id=f"ocr-job-{uid}",
-                replace_existing=True
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=self.misfire_grace_time,
             )
-            print(f"[SchedulingManager, add_job]: Added job {uid} with {cron_expression}")
+            print(f"[SchedulingManager, add_job]: Added job {uid} with {cron_expression} (offset {trigger.offset.total_seconds():g}s)")
         except Exception as e:
             print(f"[SchedulingManager, add_job]: Invalid cron expression: {cron_expression} → {e}")
 
 
+    def add_adaptive_job(self, uid: str, delay: float = None):
+        """
+        Schedules the next OCR run of an adaptive stream, `delay` seconds from now
+        (default: the stream's current adaptive interval).
+        """
+        if delay is None:
+            stream: StreamHandler = self.streamManager.get_stream(uid)
+            if stream is None:
+                return
+            delay = stream.get_adaptive_interval()["interval_seconds"]
+        run_date = datetime.now().astimezone() + timedelta(seconds=delay)
+        self.scheduler.add_job(
+            self.executeAdaptive,
+            DateTrigger(run_date),
+            args=[uid],
+            id=f"ocr-job-{uid}",
+            replace_existing=True,
+            # the job re-arms itself from its own run, a dropped misfire would stop polling for good
+            coalesce=True,
+            misfire_grace_time=None,
+        )
+        print(f"[SchedulingManager, add_adaptive_job]: Next OCR of {uid} in {delay:g}s")
+
     def remove_job(self, uid: str):
         """
         Removes a cron job by the given unique identifier.
@@ -50,14 +97,75 @@ class SchedulingManager:
         jobs = self.scheduler.get_jobs()
         out = []
         for job in jobs:
+            offset = getattr(job.trigger, "offset", None)
             out.append({
                 "id": job.id,
-                "next_run_time": job.next_run_time,
-                "trigger": str(job.trigger)
+                "next_run_time": getattr(job, "next_run_time", None),  # unset until the scheduler starts
+                "trigger": str(job.trigger),
+                "offset_seconds": offset.total_seconds() if offset is not None else None,
             })
         return out
 
+    def next_run_time(self, uid: str):
+        """Next scheduled OCR run of a stream, or None."""
+        job = self.scheduler.get_job(f"ocr-job-{uid}")
+        return getattr(job, "next_run_time", None) if job else None
+
+    def projected_load(self, minutes: int = 60, now: datetime = None):
+        """
+        How many scheduled runs start in each of the next `minutes` minutes,
+        as [{"minute": datetime, "runs": n, "jobs": [...]}], empty minutes left out.
+        """
+        now = now or datetime.now().astimezone()
+        end = now + timedelta(minutes=minutes)
+        buckets = {}
+        for job in self.scheduler.get_jobs():
+            fire_time = job.trigger.get_next_fire_time(None, now)
+            while fire_time is not None and fire_time < end:
+                minute = fire_time.replace(second=0, microsecond=0)
+                buckets.setdefault(minute, []).append(job.id)
+                fire_time = job.trigger.get_next_fire_time(fire_time, fire_time)
+        return [
+            {"minute": minute, "runs": len(jobs), "jobs": jobs}
+            for minute, jobs in sorted(buckets.items())
+        ]
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_offset_seconds": self.max_offset,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
     async def executeScheduling(self, uid:str):
         stream: StreamHandler = self.streamManager.get_stream(uid.removeprefix("ocr-job-"))
-        if stream:
-            await stream.run_ocr()
+        if not stream:
+            return
+        self.waiting += 1
+        async with self._slots:
+            self.waiting -= 1
+            self.running += 1
+            try:
+                with stream.demand.hold("scheduled"):
+                    await stream.run_ocr(priority=OcrPriority.SCHEDULED)
+                self.completed += 1
+            except OcrQueueFull:
+                self.failed += 1
+                print(f"[SchedulingManager, executeScheduling]: OCR queue full, skipping this run of {uid}")
+            except Exception as e:
+                self.failed += 1
+                print(f"[SchedulingManager, executeScheduling]: Scheduled OCR of {uid} failed → {e}")
+            finally:
+                self.running -= 1
+
+    async def executeAdaptive(self, uid: str):
+        try:
+            await self.executeScheduling(uid)
+        finally:
+            stream: StreamHandler = self.streamManager.get_stream(uid)
+            if stream and stream.get_scheduling_settings().get("execution_mode") == "adaptive":
+                await stream.load_ocr_results()
+                self.add_adaptive_job(uid)
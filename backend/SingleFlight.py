@@ -0,0 +1,62 @@
+#SingleFlight
+#    Coalesces concurrent calls for the same key into one execution.
+#    Everyone asking for (stream, mode) while a capture is running gets that
+#    capture's result instead of opening another session.
+
+import asyncio
+import time
+
+
+class SingleFlight:
+    """
+    Per-key request coalescing with an optional freshness window.
+
+    `do(key, fn)` runs the coroutine function `fn` once for all concurrent
+    callers of the same key. Successful results are kept for `freshness`
+    seconds and served from memory during that time; failures are never
+    cached. A caller that goes away does not cancel the shared call.
+    """
+
+    def __init__(self, freshness: float = 0.0):
+        self.freshness = freshness
+        self._inflight = {}
+        self._results = {}
+        self.hits = 0
+        self.shared = 0
+        self.calls = 0
+
+    async def do(self, key, fn, cacheable=lambda result: result is not None):
+        cached = self._results.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.freshness:
+            self.hits += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(self._run(key, fn, cacheable))
+            self._inflight[key] = task
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key, fn, cacheable):
+        try:
+            result = await fn()
+            if self.freshness > 0 and cacheable(result):
+                now = time.monotonic()
+                # drop expired results so keys that are never asked for again don't pile up
+                self._results = {k: v for k, v in self._results.items() if now - v[0] < self.freshness}
+                self._results[key] = (now, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "fresh_hits": self.hits,
+            "inflight": len(self._inflight),
+            "freshness_seconds": self.freshness,
+        }
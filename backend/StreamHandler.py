@@ -6,17 +6,28 @@
 #        Config
 
 import cv2
-import av
 import numpy as np
 import os
 import time
 from enum import Enum
-from backend.globalRessources import ocr_worker
-from .ocr.OcrFactory import get_ocr_engine
+from backend.globalRessources import ocr_worker, ocr_engine_registry, glyph_cache, capture_scheduler
+from backend.ocr.GlyphCache import split_cells, glyph_hash
+from backend.ocr.OcrProcessWorker import EngineSpec
+from backend.ocr.OcrJobQueue import OcrPriority, OcrQueueFull
+from backend.CaptureSession import CaptureSession
+from backend.CaptureDemand import CaptureDemand
+from backend.FrameDecoder import decode_still
+from backend.CircuitBreaker import CircuitBreaker
+from backend.ThumbnailCache import ThumbnailCache
+from backend.Frame import Frame
+from backend.PreprocessingPlan import PreprocessingPlan, DEFAULT_PROCESSING_SETTINGS
+from backend.ChangeDetector import ChangeDetector, box_signature, DEFAULT_CHANGE_THRESHOLD
+from backend.RoiMotionDetector import RoiMotionDetector, DEFAULT_THRESHOLD as DEFAULT_WATCH_THRESHOLD, DEFAULT_SETTLE as DEFAULT_WATCH_SETTLE, DEFAULT_MIN_INTERVAL as DEFAULT_WATCH_MIN_INTERVAL
+from backend.AdaptiveInterval import adaptive_interval, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL, DEFAULT_MIN_CONFIDENCE
 import numpy as np
 import asyncio
-import json
 import re
+import hashlib
 
 class StreamStatus(str, Enum):
     """Enum for stream status."""
@@ -28,13 +39,13 @@ class StreamStatus(str, Enum):
     UNKNOWN = "UNKNOWN"
 
 def create_thumbnail(frame_bytes, target_width=320, target_height=240, noDecode=False):
+    """frame_bytes may be JPEG bytes or an already decoded BGR ndarray."""
     if frame_bytes is None:
         return None
     
-    nparr = np.frombuffer(frame_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    
-    if img is None:
+    try:
+        img = ensure_ndarray(frame_bytes)
+    except ValueError:
         print("[StreamHandler] Failed to decode JPEG")
         return None
     
@@ -76,34 +87,135 @@ def ensure_ndarray(frame):
     return frame
 
 CACHE_DIR = "/data/cache"
+CAPTURE_OPEN_TIMEOUT = float(os.environ.get("CAPTURE_OPEN_TIMEOUT_SECONDS", 5))
+CAPTURE_READ_TIMEOUT = float(os.environ.get("CAPTURE_READ_TIMEOUT_SECONDS", 5))
+THUMBNAIL_INTERVAL = 30  # seconds between thumbnail refreshes while the stream is viewed
+# for dashboards that get every stream's updates without subscribing to this one;
+# longer than the idle grace period, so the capture can close in between
+IDLE_THUMBNAIL_INTERVAL = 300
+DEMAND_POLL_INTERVAL = 1.0
+RECENT_OCR_RESULTS = 20  # newest stored results kept in memory, enough for the adaptive interval
 
 class StreamHandler:
     async def routine(self):
-        """Routine to handle stream processing."""
+        """
+        Routine to handle stream processing. Keeps the capture open only while
+        somebody needs it (see capture_wanted) and refreshes the thumbnail while
+        the stream is on a dashboard (slowly if no dashboard subscribed to it).
+        """
         self.logger.info(self.id, f"Starting routine for stream {self.id}", method_name="[StreamHandler.routine]")
+        last_thumbnail = None
+        await self.load_ocr_results()
         while True:
+            if self.schedulingSettings.get("execution_mode") == "watch":
+                # the watch samples keep the capture busy anyway, the thumbnail is made from them
+                refresh = last_thumbnail is None or time.monotonic() - last_thumbnail >= THUMBNAIL_INTERVAL
+                if refresh:
+                    last_thumbnail = time.monotonic()
+                await self.watch_step(refresh_thumbnail=refresh)
+                await asyncio.sleep(1 / max(float(self.schedulingSettings.get("watch_fps", 1)), 0.01))
+                continue
+
             try:
-                frame = await self.grab_frame_raw()
-                if frame is None:
-                    self.logger.info(self.id, f"[StreamHandler] No frame received for stream {self.id}, updating status to NO_STREAM")
-                    await self.update_status(StreamStatus.NO_STREAM)
-                    await asyncio.sleep(30)
-                    continue
+                await self.update_capture()
+                interval = THUMBNAIL_INTERVAL if self.viewers() else IDLE_THUMBNAIL_INTERVAL if self.thumbnail_receivers() else None
+                if interval is not None and (last_thumbnail is None or time.monotonic() - last_thumbnail >= interval):
+                    last_thumbnail = time.monotonic()
+                    frame = await self.grab_frame_raw()
+                    if frame is None:
+                        self.logger.info(self.id, f"[StreamHandler] No frame received for stream {self.id}, updating status to NO_STREAM")
+                        await self.update_status(StreamStatus.NO_STREAM)
 
-                self.lastFrame = np.array(frame)
-                self.lastFrameTimestamp = time.time()
+                # lastFrame/lastFrameTimestamp are kept fresh by _grabFrameFromStream
 
             except Exception as e:
                 self.logger.error(self.id, f"[StreamHandler] Error in routine for stream {self.id}: {e}")
                 await self.update_status(StreamStatus.ERROR)
                 break
 
-            await asyncio.sleep(30)
+            await asyncio.sleep(DEMAND_POLL_INTERVAL)
+
+    def viewers(self):
+        """Dashboard clients that subscribed to this stream."""
+        return self.ws_manager.viewers(self.id) if self.ws_manager is not None else 0
+
+    def thumbnail_receivers(self):
+        """Dashboard clients that get this stream's thumbnail updates, subscribed or not."""
+        return self.ws_manager.receivers(self.id) if self.ws_manager is not None else 0
+
+    def capture_wanted(self, now=None):
+        """
+        Whether the source should be open: while a read is in flight, a dashboard
+        shows the stream, the next scheduled OCR is close, or "watch" mode samples it.
+        """
+        if self.schedulingSettings.get("execution_mode") == "watch":
+            return True
+        next_run = self.scheduler.next_run_time(self.id) if self.scheduler is not None else None
+        return self.demand.wanted(
+            now,
+            viewers=self.viewers(),
+            next_run=next_run.timestamp() if next_run is not None else None,
+        )
+
+    async def update_capture(self):
+        """
+        Opens the capture ahead of demand and releases decoder and sockets once
+        nobody needs it, or while the breaker says the source is unreachable.
+        """
+        if self._is_local_source(self.rtsp_url):
+            return
+        wanted = self.capture_wanted()
+        running = self.capture is not None and self.capture.running
+        if wanted and not running and not self.breaker.tripped:
+            self.logger.info(self.id, f"[StreamHandler, update_capture] Opening {self.id} ({', '.join(self.demand.reasons) or 'grace period'})")
+            self._capture_session(self.rtsp_url, options={"rtsp_transport": "tcp"}).start()
+            self.demand.warmups += 1
+        elif running and self.breaker.tripped:
+            self.logger.info(self.id, f"[StreamHandler, update_capture] {self.id} is unreachable, closing it for {self.breaker.retry_after():.0f}s")
+            await asyncio.to_thread(self.capture.stop)
+        elif not wanted and running:
+            self.logger.info(self.id, f"[StreamHandler, update_capture] No demand for {self.demand.grace:g}s, closing {self.id}")
+            await asyncio.to_thread(self.capture.stop)
+            self.demand.idle_since = time.time()
+            self.demand.idles += 1
+
+    async def watch_step(self, refresh_thumbnail=False):
+        """
+        One sample of the "watch" execution mode: compares the boxes with their
+        running background and runs OCR once a change has settled. With
+        refresh_thumbnail the sampled frame also becomes the stream's thumbnail.
+        """
+        settings = self.schedulingSettings
+        detector = self.motion_detector
+        detector.threshold = float(settings.get("watch_threshold", DEFAULT_WATCH_THRESHOLD))
+        detector.settle = float(settings.get("watch_settle", DEFAULT_WATCH_SETTLE))
+        detector.min_interval = float(settings.get("watch_min_interval", DEFAULT_WATCH_MIN_INTERVAL))
+        if self._watch_version != self.settings_version:
+            detector.reset()
+            self._watch_version = self.settings_version
+
+        try:
+            frame = await self._grab_checked_frame()
+            if frame is None:
+                return
+            snippets = self.get_preprocessing_plan().extract_rois(frame)
+            await self.update_status(StreamStatus.OK)
+            if refresh_thumbnail:
+                await self._publish_thumbnail(frame, self.lastFrameTimestamp)
+            if not detector.observe(snippets):
+                return
+            self.logger.info(self.id, f"[StreamHandler, watch] Boxes changed (scores {detector.last_scores}), running OCR")
+            await self.run_ocr(priority=OcrPriority.SCHEDULED)
+            detector.acknowledge()
+        except OcrQueueFull:
+            self.logger.info(self.id, f"[StreamHandler, watch] OCR queue full, trying again in {detector.min_interval:g}s")
+        except Exception as e:
+            self.logger.error(self.id, f"[StreamHandler, watch] OCR after a change failed, trying again in {detector.min_interval:g}s: {e}")
 
     def OCR_value_changed(old, new):
         print(f"[StreamHandler] OCR running state changed from {old} to {new}")
 
-    def __init__(self, exec_logger, stream_id, rtsp_url, config, processingSettings, ocrSettings, selectionBoxes, ws_manager=None, schedulingSettings=None):
+    def __init__(self, exec_logger, stream_id, rtsp_url, config, processingSettings, ocrSettings, selectionBoxes, ws_manager=None, schedulingSettings=None, result_store=None):
         self.id = stream_id
         self.rtsp_url = rtsp_url
         self.config = config
@@ -120,6 +232,26 @@ class StreamHandler:
         self.last_ocr_timestamp = 0
         self.scheduler = None
         self.logger = exec_logger
+        self.capture: CaptureSession = None
+        self.demand = CaptureDemand()
+        self.thumbnails = ThumbnailCache(self._thumbnail_path())
+        # dead cameras fail fast instead of tying up a thread per request
+        self.breaker = CircuitBreaker()
+        self.capture_error: StreamStatus = None
+        self.routine_task = None
+        self._preprocessing_plan: PreprocessingPlan = None
+        # bumped on every settings/boxes change, so cached renders can tell they are outdated
+        self.settings_version = 0
+        self.change_detector = ChangeDetector()
+        # last interval picked in "adaptive" execution mode
+        self.effective_interval = None
+        # "watch" execution mode
+        self.motion_detector = RoiMotionDetector()
+        self._watch_version = None
+        self.preprocessing_timings = {}
+        self.result_store = result_store
+        self._latest_ocr = None
+        self._recent_ocr = None  # newest first, None until loaded from the result store
 
         self.logger.ws_manager = ws_manager
         if schedulingSettings:
@@ -139,10 +271,48 @@ class StreamHandler:
                 "deltaTimespanUnit": "minutes",
             }
 
+    def _thumbnail_path(self):
+        return os.path.join(CACHE_DIR, "thumbnails", f"{self.id}.jpg")
+
     def start_routine(self):
         # schedule routine without blocking
         self.routine_task = asyncio.create_task(self.routine())
 
+    def _is_local_source(self, url):
+        return url.startswith("file://") or os.path.isfile(url)
+
+    def _capture_session(self, url, options=None):
+        """
+        Returns the long-lived capture session for url, replacing it if the url
+        changed. Only "watch" mode and live views need every frame decoded,
+        otherwise keyframes are enough.
+        """
+        keyframes_only = self.schedulingSettings.get("execution_mode") != "watch" and not self.demand.held("live")
+        if self.capture is None or self.capture.url != url or self.capture.keyframes_only != keyframes_only:
+            if self.capture is not None:
+                self.capture.stop()
+            open_timeout, read_timeout = self.capture_timeouts()
+            self.capture = CaptureSession(url, options=options, name=self.id, keyframes_only=keyframes_only,
+                                          open_timeout=open_timeout, read_timeout=read_timeout, slots=capture_scheduler)
+        return self.capture
+
+    def capture_timeouts(self):
+        """(open, read) timeouts of the source in seconds, from the stream config or the defaults."""
+        config = self.config if isinstance(self.config, dict) else {}
+        return (
+            float(config.get("open_timeout", CAPTURE_OPEN_TIMEOUT)),
+            float(config.get("read_timeout", CAPTURE_READ_TIMEOUT)),
+        )
+
+    def close(self):
+        """Stops the background routine and releases the capture session."""
+        if self.routine_task is not None:
+            self.routine_task.cancel()
+            self.routine_task = None
+        if self.capture is not None:
+            self.capture.stop()
+            self.capture = None
+
     async def _grabFrameFromStream(self, url, bustCache=False, options=None):
         def grab():
             # Cache check
@@ -166,17 +336,8 @@ class StreamHandler:
                     raise RuntimeError(f"Failed to load image file: {url}")
                 frame_data = img
             else:
-                # Normal RTSP/video handling
-                container = av.open(url, options=options)
-                for packet in container.demux(video=0):
-                    for frame in packet.decode():
-                        img = frame.to_image()
-                        frame_data = np.array(img, dtype=np.uint8)  # ensure uint8
-                        # Convert from RGB (PIL format) to BGR (OpenCV format) for consistency
-                        frame_data = cv2.cvtColor(frame_data, cv2.COLOR_RGB2BGR)
-                        break
-                    if frame_data is not None:
-                        break
+                # Local video files are read once, there is no connection worth keeping open
+                frame_data = decode_still(url, options=options)
 
             if frame_data is None:
                 raise RuntimeError(f"No frame extracted from {url}")
@@ -185,11 +346,42 @@ class StreamHandler:
             self.lastFrameTimestamp = time.time()
             return frame_data
 
-        return await asyncio.to_thread(grab)
+        if self._is_local_source(url):
+            return await capture_scheduler.run(self.id, url, grab)
 
+        # Network sources: read the newest frame of the persistent session.
+        # While the source is down the last good frame is served without trying.
+        if not self.breaker.allow():
+            if self.lastFrame is not None:
+                return self.lastFrame
+            raise ConnectionError(f"{url} is unreachable, next attempt in {self.breaker.retry_after():.0f}s")
 
-    async def grab_frame_raw(self, generateThumbnail=True):
+        with self.demand.hold("read"):
+            session = self._capture_session(url, options=options)
+            frame_data, frame_time = session.peek()
+            if frame_data is None:
+                open_timeout, read_timeout = self.capture_timeouts()
+                timeout = read_timeout if session.connected else open_timeout + read_timeout
+                try:
+                    frame_data, frame_time = await capture_scheduler.run(self.id, url, session.read, timeout)
+                except Exception as e:
+                    self.breaker.failure()
+                    if self.breaker.tripped:
+                        # no reconnecting in the background until the breaker lets a probe through
+                        await asyncio.to_thread(session.stop)
+                    self.capture_error = StreamStatus.TIMEOUT if isinstance(e, TimeoutError) else StreamStatus.NO_CONNECTION
+                    await self.update_status(self.capture_error)
+                    raise
+        self.breaker.success()
+        self.capture_error = None
+
+        self.lastFrame = frame_data
+        self.lastFrameTimestamp = frame_time
+        return frame_data
 
+
+    async def grab_frame_raw(self, generateThumbnail=True):
+        """Unprocessed frame as JPEG bytes. Also refreshes the thumbnail unless generateThumbnail is False."""
         self.logger.info(self.id, f"[StreamHandler, grab_frame_raw] Trying to open the RTSP stream at {self.rtsp_url}")
         
         if self.rtsp_url.startswith("file://"):
@@ -210,47 +402,8 @@ class StreamHandler:
                 }
             
             try:
-                container = av.open(file_path)
-                frame = None
-                for packet in container.demux(video=0):
-                    for frame in packet.decode():
-                        img = frame.to_image()  # Convert frame to PIL Image
-                        frame = ensure_ndarray(frame)
-                        frame = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)  # Convert to NumPy array (BGR)
-                        break  # Grab only one frame
-                    if frame is not None:
-                        break
-
-                if frame is not None:
-                    _, buffer = cv2.imencode(".jpg", frame)
-                    await self.update_status(StreamStatus.OK)
-                    resized_image = create_thumbnail(buffer, noDecode=True)
-                    cv2.imwrite(f"{CACHE_DIR}/thumbnails/{self.id}.jpg", resized_image)
-                    if self.ws_manager:
-                        await self.ws_manager.broadcast({
-                            "type": "stream/thumbnail_update",
-                            "stream_id": self.id,
-                            "status": self.status
-                        })
-                    if generateThumbnail:
-                        resized_image = create_thumbnail(buffer.tobytes(), noDecode=True)
-                        if resized_image is None:
-                            await self.update_status(StreamStatus.ERROR)
-
-                        os.makedirs(f"{CACHE_DIR}/thumbnails/", exist_ok=True)
-                        cache_path = f"{CACHE_DIR}/thumbnails/{self.id}.jpg"
-
-                        cv2.imwrite(cache_path, resized_image)
-                        success, tBuffer = cv2.imencode(".jpg", resized_image)
-                        if not success:
-                            self.logger.error(self.id, "[StreamHandler] Failed to encode thumbnail JPEG")
-                            await self.update_status(StreamStatus.ERROR)
-                    return buffer.tobytes()
-                else:
-                    await self.update_status(StreamStatus.NO_STREAM)
-                    self.logger.error(self.id, f"[StreamHandler] No frames found in the file {file_path}")
-                    return None
-
+                frame = await capture_scheduler.run(self.id, file_path, decode_still, file_path)
+                frame_time = time.time()
             except Exception as e:
                 await self.update_status(StreamStatus.ERROR)
                 self.logger.error(self.id, f"[StreamHandler] Error opening file {file_path}: {e}")
@@ -259,148 +412,202 @@ class StreamHandler:
         else:
             try:
                 frame = await self._grabFrameFromStream(self.rtsp_url, options={"rtsp_transport": "tcp"})
-            
-                if frame is not None:
-                    frame = ensure_ndarray(frame)
-                    # Frame is already in BGR format from _grabFrameFromStream
-                    _, buffer = cv2.imencode(".jpg", frame)
-                    await self.update_status(StreamStatus.OK)
-                    resized_image = create_thumbnail(buffer, noDecode=True)
-                    cv2.imwrite(f"{CACHE_DIR}/thumbnails/{self.id}.jpg", resized_image)
-                    if self.ws_manager:
-                        await self.ws_manager.broadcast({
-                            "type": "stream/thumbnail_update",
-                            "stream_id": self.id,
-                            "status": self.status
-                        })
-
-                    if generateThumbnail:
-                        resized_image = create_thumbnail(buffer.tobytes(), noDecode=True)
-                        if resized_image is None:
-                            await self.update_status(StreamStatus.ERROR)
-
-                        os.makedirs(f"{CACHE_DIR}/thumbnails/", exist_ok=True)
-                        cache_path = f"{CACHE_DIR}/thumbnails/{self.id}.jpg"
-
-                        cv2.imwrite(cache_path, resized_image)
-                        success, tBuffer = cv2.imencode(".jpg", resized_image)
-                        if not success:
-                            self.logger.error(self.id, "[StreamHandler] Failed to encode thumbnail JPEG")
-                            await self.update_status(StreamStatus.ERROR)
-                    return buffer.tobytes()
-                else:
-                    await self.update_status(StreamStatus.NO_STREAM)
-                    self.logger.error(self.id, f"[StreamHandler] No frames found in the RTSP stream at {self.rtsp_url}")
-                    return None
-
+                frame_time = self.lastFrameTimestamp
             except Exception as e:
-                await self.update_status(StreamStatus.ERROR)
+                await self.update_status(self.capture_error or StreamStatus.ERROR)
                 self.logger.error(self.id, f"[StreamHandler] Error opening RTSP stream with url {self.rtsp_url}: {e}")
                 return None
 
-    async def grab_frame(self, displayBoxes=True, displayOcrResults=False, ocrResults=None, color=(0, 255, 0)):
+        if frame is None:
+            await self.update_status(StreamStatus.NO_STREAM)
+            self.logger.error(self.id, f"[StreamHandler] No frames found at {self.rtsp_url}")
+            return None
+
+        # Frame is already in BGR format
+        frame = ensure_ndarray(frame)
+        success, buffer = cv2.imencode(".jpg", frame)
+        if not success:
+            await self.update_status(StreamStatus.ERROR)
+            self.logger.error(self.id, "[StreamHandler] Failed to encode frame JPEG")
+            return None
+        await self.update_status(StreamStatus.OK)
+
+        if generateThumbnail:
+            await self._publish_thumbnail(frame, frame_time)
+        return buffer.tobytes()
+
+    async def _publish_thumbnail(self, frame, frame_time):
+        """Refreshes the thumbnail from a frame and tells the dashboards if it changed."""
+        if self._update_thumbnail(frame, frame_time) and self.ws_manager:
+            await self.ws_manager.broadcast({
+                "type": "stream/thumbnail_update",
+                "stream_id": self.id,
+                "status": self.status
+            })
+
+    def _update_thumbnail(self, frame, frame_time):
+        """Encodes the thumbnail of a frame it wasn't made from yet. Returns whether it changed."""
+        current = self.thumbnails.entry
+        if current is not None and frame_time is not None and current.source_time == frame_time:
+            return False
+        data = create_thumbnail(frame)
+        if data is None:
+            self.logger.error(self.id, "[StreamHandler] Failed to encode thumbnail JPEG")
+            return False
+        self.thumbnails.put(data, source_time=frame_time)
+        return current is None or current.etag != self.thumbnails.entry.etag
+
+    async def _grab_source_frame(self):
+        """Unprocessed BGR frame from the source (still image, video file or stream)."""
+        if os.path.isfile(self.rtsp_url) and self.rtsp_url.lower().endswith((".png", ".jpg", ".jpeg")):
+            frame = cv2.imread(self.rtsp_url, cv2.IMREAD_COLOR)
+            if frame is None:
+                raise RuntimeError(f"Failed to read static image: {self.rtsp_url}")
+            return frame
+
+        frame = await self._grabFrameFromStream(self.rtsp_url, options={"rtsp_transport": "tcp"})
+        if frame is None:
+            return None
+        return ensure_ndarray(frame)
+
+    def get_preprocessing_plan(self) -> PreprocessingPlan:
+        """Compiled processing settings/boxes; rebuilt only after they change."""
+        if self._preprocessing_plan is None:
+            if not self.processingSettings:
+                self.processingSettings = dict(DEFAULT_PROCESSING_SETTINGS)
+            for key, value in DEFAULT_PROCESSING_SETTINGS.items():
+                self.processingSettings.setdefault(key, value)
+            self._preprocessing_plan = PreprocessingPlan(self.processingSettings, self.selectionBoxes)
+        return self._preprocessing_plan
+
+    def get_preprocessing_timings(self):
+        """Per-stage timings (ms) of the last grab, render and ROI extraction."""
+        plan = self._preprocessing_plan
+        return {
+            **self.preprocessing_timings,
+            **(plan.timings if plan else {}),
+        }
+
+    async def _timed_source_frame(self):
+        start = time.perf_counter()
+        frame = await self._grab_source_frame()
+        self.preprocessing_timings["grab"] = {"total_ms": round((time.perf_counter() - start) * 1000, 3)}
+        return frame
+
+    async def grab_processed_frame(self, displayBoxes=True, displayOcrResults=False, ocrResults=None, color=(0, 255, 0)):
+        """
+        Grabs the current frame and applies rotation, contrast/brightness and crop.
+        Returns a Frame (BGR ndarray), or None if no frame could be grabbed.
+        """
         # switch R and B of color for OpenCV
         color = (color[2], color[1], color[0])
         
         try:
-            if os.path.isfile(self.rtsp_url) and self.rtsp_url.lower().endswith((".png", ".jpg", ".jpeg")):
-                frame = cv2.imread(self.rtsp_url, cv2.IMREAD_COLOR)
-                if frame is None:
-                    raise RuntimeError(f"Failed to read static image: {self.rtsp_url}")
-            else:
-                frame = await self._grabFrameFromStream(self.rtsp_url, options={"rtsp_transport": "tcp"})
-
+            frame = await self._timed_source_frame()
             if frame is None:
                 await self.update_status(StreamStatus.NO_STREAM)
                 self.logger.info(self.id, f"[StreamHandler] No frames found at {self.rtsp_url}")
                 return None
-            frame = ensure_ndarray(frame)
+            frame_timestamp = self.lastFrameTimestamp
 
             self.logger.info(self.id, f"[StreamHandler, grab_frame] Trying to open the RTSP stream at {self.rtsp_url}")
             self.logger.debug(self.id, f"[StreamHandler, grab_frame] Current processing settings: {self.processingSettings}")
 
-            if not self.processingSettings:
-                self.processingSettings = {
-                    "rotation": 0, "contrast": 1.0, "brightness": 0,
-                    "crop_top": 0, "crop_bottom": 0, "crop_left": 0, "crop_right": 0
-                }
-            for key in ["rotation", "contrast", "brightness", "crop_top", "crop_bottom", "crop_left", "crop_right"]:
-                if key not in self.processingSettings:
-                    self.processingSettings[key] = 0 if key != "contrast" else 1.0
-
-            if self.processingSettings["rotation"] != 0:
-                h, w = frame.shape[:2]
-                center = (w // 2, h // 2)
-                matrix = cv2.getRotationMatrix2D(center, self.processingSettings["rotation"], 1.0)
-                frame = cv2.warpAffine(frame, matrix, (w, h))
-
-            frame = cv2.convertScaleAbs(
-                frame,
-                alpha=float(self.processingSettings.get("contrast", 1.0)),
-                beta=float(self.processingSettings.get("brightness", 0.0))
-            )
+            frame = self.get_preprocessing_plan().render(frame)
 
-            h, w, _ = frame.shape
-            top = min(self.processingSettings["crop_top"], h)
-            bottom = max(h - self.processingSettings["crop_bottom"], 0)
-            left = min(self.processingSettings["crop_left"], w)
-            right = max(w - self.processingSettings["crop_right"], 0)
-            frame = frame[top:bottom, left:right]
+            if self.selectionBoxes and displayBoxes:
+                self._draw_boxes(frame, ocrResults if displayOcrResults else None, color)
 
-            if self.selectionBoxes:
-                if displayOcrResults and ocrResults and len(self.selectionBoxes) == len(ocrResults):
-                    for box, result in zip(self.selectionBoxes, ocrResults):
-                        cv2.rectangle(frame, (box["box_left"], box["box_top"]),
-                                    (box["box_left"]+box["box_width"], box["box_top"]+box["box_height"]),
-                                    color, 2)
-                        cv2.putText(frame, f'"{result["text"]}", {result["confidence"]}%',
-                                    (box["box_left"], box["box_top"]-10),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                else:
-                    for box in self.selectionBoxes:
-                        cv2.rectangle(frame, (box["box_left"], box["box_top"]),
-                                    (box["box_left"]+box["box_width"], box["box_top"]+box["box_height"]),
-                                    color, 2)
-                        cv2.putText(frame, f'ID: {box["id"]}',
-                                    (box["box_left"], box["box_top"]-10),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-            frame_bgr = frame  # Frame is already in BGR format
-            _, buffer = cv2.imencode(".jpg", frame_bgr)
             await self.update_status(StreamStatus.OK)
-            return buffer.tobytes()
+            return Frame(frame, frame_timestamp)
 
         except Exception as e:
-            await self.update_status(StreamStatus.NO_CONNECTION)
+            await self.update_status(self.capture_error or StreamStatus.NO_CONNECTION)
             self.logger.error(self.id, f"[StreamHandler] Error opening stream {self.rtsp_url}: {e}")
             return None
 
+    def _draw_boxes(self, frame, ocrResults=None, color=(0, 255, 0)):
+        """Draws the selection boxes onto frame, labelled with their OCR results if given. `color` is BGR."""
+        if ocrResults and len(self.selectionBoxes) == len(ocrResults):
+            for box, result in zip(self.selectionBoxes, ocrResults):
+                cv2.rectangle(frame, (box["box_left"], box["box_top"]),
+                            (box["box_left"]+box["box_width"], box["box_top"]+box["box_height"]),
+                            color, 2)
+                cv2.putText(frame, f'"{result["text"]}", {result["confidence"]}%',
+                            (box["box_left"], box["box_top"]-10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        else:
+            for box in self.selectionBoxes:
+                cv2.rectangle(frame, (box["box_left"], box["box_top"]),
+                            (box["box_left"]+box["box_width"], box["box_top"]+box["box_height"]),
+                            color, 2)
+                cv2.putText(frame, f'ID: {box["id"]}',
+                            (box["box_left"], box["box_top"]-10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    async def live_frame(self, processed=False, since=None):
+        """
+        Newest frame for the live view as a Frame, processed (with boxes) or as
+        captured. None if there is no frame, or if it is still the one taken at
+        `since`; then nothing is rendered. Runs several times a second per live
+        view, so unlike grab_processed_frame it doesn't log.
+        """
+        frame = await self._grab_source_frame()
+        if frame is None:
+            return None
+        timestamp = self.lastFrameTimestamp
+        if timestamp is not None and timestamp == since:
+            return None
+        if processed:
+            frame = self.get_preprocessing_plan().render(frame)
+            if self.selectionBoxes:
+                self._draw_boxes(frame)
+        return Frame(frame, timestamp)
 
-    async def grab_computed_frame(self):
-        frame = await self.grab_frame(displayBoxes=False) 
+    async def grab_frame(self, displayBoxes=True, displayOcrResults=False, ocrResults=None, color=(0, 255, 0)):
+        """Processed frame as JPEG bytes (for HTTP responses)."""
+        frame = await self.grab_processed_frame(displayBoxes, displayOcrResults, ocrResults, color)
         if frame is None:
-            await self.update_status(StreamStatus.ERROR)
-            "Error: Could not retrieve frame", 500
+            return None
+        return frame.to_jpeg()
 
-        np_frame = np.frombuffer(frame, np.uint8)
-        image = cv2.imdecode(np_frame, cv2.IMREAD_COLOR)
+    async def grab_snippets(self):
+        """
+        Returns one processed BGR ndarray per selection box. Only the box pixels are
+        rotated/adjusted; untouched boxes are read-only views of the source frame.
+        Boxes that lie outside the frame yield an empty array. Returns None if no
+        frame could be grabbed.
+        """
+        frame = await self._grab_checked_frame()
+        if frame is None:
+            return None
 
-        if image is None:
-            await self.update_status(StreamStatus.ERROR)
-            return "Error: Could not decode frame", 500
+        snippets = self.get_preprocessing_plan().extract_rois(frame)
+        await self.update_status(StreamStatus.OK)
+        return snippets
 
-        
-        snippets = []
-        for box in self.selectionBoxes:
-            box_top = box["box_top"]
-            box_left = box["box_left"]
-            box_width = box["box_width"]
-            box_height = box["box_height"]
+    async def _grab_checked_frame(self):
+        """Source frame for reading the boxes, or None (with the status updated) if none could be grabbed."""
+        try:
+            frame = await self._timed_source_frame()
+        except Exception as e:
+            await self.update_status(self.capture_error or StreamStatus.NO_CONNECTION)
+            self.logger.error(self.id, f"[StreamHandler] Error opening stream {self.rtsp_url}: {e}")
+            return None
+
+        if frame is None:
+            await self.update_status(StreamStatus.NO_STREAM)
+            self.logger.info(self.id, f"[StreamHandler] No frames found at {self.rtsp_url}")
+            return None
+        return frame
 
-            snippet = image[box_top:box_top + box_height, box_left:box_left + box_width]
-            if snippet.size > 0:
-                snippets.append(snippet)
+    async def grab_computed_frame(self):
+        snippets = await self.grab_snippets()
+        if snippets is None:
+            await self.update_status(StreamStatus.ERROR)
+            return "Error: Could not retrieve frame", 500
 
+        snippets = [snippet for snippet in snippets if snippet.size > 0]
         if not snippets:
             await self.update_status(StreamStatus.ERROR)
             return "Error: No valid boxes to process", 400
@@ -410,56 +617,37 @@ class StreamHandler:
 
         stitched_image = cv2.hconcat(resized_snippets)
 
-        _, buffer = cv2.imencode(".jpg", stitched_image)
         await self.update_status(StreamStatus.OK)
-        return buffer.tobytes()
-
-    async def grab_thumbnail(self):
-        os.makedirs(f"{CACHE_DIR}/thumbnails/", exist_ok=True)
-        cache_path = f"{CACHE_DIR}/thumbnails/{self.id}.jpg"
-
-        # Check if thumbnail exists
-        if os.path.exists(cache_path):
-            file_age_seconds = time.time() - os.path.getmtime(cache_path)
-            if file_age_seconds > 3600:  # older than 1 hour
-                self.logger.debug(self.id, f"[StreamHandler] Thumbnail \"{self.id}.jpg\" is stale, deleting")
-                os.remove(cache_path)
-            else:
-                self.logger.debug(self.id, f"[StreamHandler] Thumbnail \"{self.id}.jpg\" already exists, loading from cache instead")
-                thumbnail = cv2.imread(cache_path)
-                _, buffer = cv2.imencode(".jpg", thumbnail)
-                return buffer.tobytes()
-
-        # If we get here, we need to generate a new one
-        frame_bytes = await self.grab_frame_raw(False)
-        if frame_bytes is None:
-            await self.update_status(StreamStatus.ERROR)
-            return None
+        return Frame(stitched_image).to_jpeg()
 
-        resized_image = create_thumbnail(frame_bytes, noDecode=True)
-        if resized_image is None:
-            await self.update_status(StreamStatus.ERROR)
-            return None
+    async def get_thumbnail(self):
+        """
+        The stream's Thumbnail (JPEG bytes and ETag). Served from memory while
+        it is younger than an hour, otherwise a new frame is grabbed.
+        """
+        thumbnail = self.thumbnails.get()
+        if thumbnail is not None:
+            return thumbnail
 
-        cv2.imwrite(cache_path, resized_image)
-        success, buffer = cv2.imencode(".jpg", resized_image)
-        if not success:
-            self.logger.error(self.id, "[StreamHandler] Failed to encode thumbnail JPEG")
+        if await self.grab_frame_raw() is None:
             await self.update_status(StreamStatus.ERROR)
             return None
+        return self.thumbnails.get()
 
-        await self.update_status(StreamStatus.OK)
-        return buffer.tobytes()
+    async def grab_thumbnail(self):
+        thumbnail = await self.get_thumbnail()
+        return thumbnail.data if thumbnail is not None else None
         
     async def delete_cache(self):
-        cache_path = os.path.join(CACHE_DIR, "thumbnails", f"{self.id}.jpg")
-        if os.path.exists(cache_path):
-            os.remove(cache_path)
+        if self.thumbnails.clear():
             self.logger.info(self.id, f"[StreamHandler] Cache for stream {self.id} deleted.")
         else:
             self.logger.info(self.id, f"[StreamHandler] No cache found for stream {self.id}.")
 
     async def update_status(self, new_status):
+        if new_status == StreamStatus.OK and self.capture_error is not None:
+            # a frame was served from cache, the source itself is still down
+            new_status = self.capture_error
         if self.status != new_status:
             self.logger.info(self.id, f"[StreamHandler] Stream {self.id} status changed: {self.status} -> {new_status}")
             self.status = new_status
@@ -470,60 +658,92 @@ class StreamHandler:
                     "status": self.status
                 })
 
-    async def run_ocr(self, forceCacheBust=False):
-        def decode_jpeg_to_array(jpeg_bytes):
-            nparr = np.frombuffer(jpeg_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            if img is None:
-                raise ValueError("Failed to decode JPEG bytes to image")
-            return img
+    async def _recognize(self, engine, engine_type, images, ocr_config, priority, key):
+        """
+        Runs the OCR engine on the boxes. With ocrConfig["digits"] set, every box is
+        split into that many character cells and only cells the glyph cache hasn't
+        seen go to the engine, one character at a time.
+        """
+        digits = int(ocr_config.get("digits") or 0)
+        if digits <= 0 or not glyph_cache.max_entries:
+            return await ocr_worker.submit(engine, images, ocr_config, priority=priority, key=key)
+
+        cell_config = {k: v for k, v in ocr_config.items() if k not in ("digits", "grid")}
+        namespace = glyph_cache.namespace(engine_type, cell_config)
+        cells = []  # per box: [cell result or None, ...]
+        missing = []  # (box, cell, image, hash)
+        for b, image in enumerate(images):
+            box_cells = []
+            for c, cell in enumerate(split_cells(image, digits)):
+                cell_hash = glyph_hash(cell)
+                if cell_hash is None:
+                    box_cells.append({"text": "", "confidence": None})
+                    continue
+                cached = glyph_cache.lookup(self.id, namespace, cell_hash)
+                box_cells.append(cached)
+                if cached is None:
+                    missing.append((b, c, cell, cell_hash))
+            cells.append(box_cells)
+
+        if missing:
+            cell_engine = EngineSpec(engine_type, cell_config) if isinstance(engine, EngineSpec) else engine
+            # only a queued job for exactly the same cells may be joined, results are matched by position
+            cell_results = await ocr_worker.submit(
+                cell_engine, [cell for _, _, cell, _ in missing], cell_config,
+                priority=priority, key=key + ("cells", tuple(cell_hash for _, _, _, cell_hash in missing)),
+            )
+            for (b, c, _, cell_hash), result in zip(missing, cell_results):
+                glyph_cache.store(namespace, cell_hash, result)
+                cells[b][c] = result
+
+        results = []
+        for box_cells in cells:
+            confidences = [cell["confidence"] for cell in box_cells if cell["confidence"] is not None]
+            results.append({
+                "text": "".join(cell["text"] for cell in box_cells).strip(),
+                "confidence": round(sum(confidences) / len(confidences), 3) if confidences else 0.0,
+            })
+        return results
+
+    async def run_ocr(self, forceCacheBust=False, priority=OcrPriority.API):
+        await self.load_ocr_results()
         try:
-            stitched_jpeg = await self.grab_computed_frame()
-            if stitched_jpeg is None:
-                await self.update_status(StreamStatus.ERROR)
-                raise RuntimeError("Failed to grab computed frame for OCR")
-
-            if type(stitched_jpeg) is tuple:
-                raise RuntimeError(f"Failed to grab computed frame for OCR: {stitched_jpeg[0]}, {stitched_jpeg}")    
-
-
-            stitched_img = decode_jpeg_to_array(stitched_jpeg)
+            snippets = await self.grab_snippets()
+            if snippets is None:
+                raise RuntimeError("Failed to grab frame for OCR")
+            if not any(snippet.size > 0 for snippet in snippets):
+                raise RuntimeError("No valid boxes to process")
         except Exception as e:
-            await self.update_status(StreamStatus.ERROR)
+            await self.update_status(self.capture_error or StreamStatus.ERROR)
             raise RuntimeError(f"Failed to get computed frame for OCR: {e}")
 
-        image_fingerprint = str(hash(stitched_jpeg))
+        fingerprint = hashlib.sha1()
+        for snippet in snippets:
+            fingerprint.update(np.ascontiguousarray(snippet).data)
+        image_fingerprint = fingerprint.hexdigest()
 
         oldOcrData = self.getOcrResult()
+        old_results = oldOcrData.get("results") or []
+        signatures = [box_signature(snippet) for snippet in snippets]
+
+        if forceCacheBust or len(old_results) != len(snippets):
+            changed = list(range(len(snippets)))
+        elif oldOcrData.get("aggregate", {}).get("image-fingerprint") == image_fingerprint:
+            changed = []
+        else:
+            threshold = float((self.ocrSettings or {}).get("change_threshold", DEFAULT_CHANGE_THRESHOLD))
+            changed = self.change_detector.changed(signatures, self.settings_version, threshold)
+        self.change_detector.record(len(snippets), len(changed))
 
-        if oldOcrData.get("aggregate", {}).get("image-fingerprint") == image_fingerprint and not forceCacheBust:
-            self.logger.info(self.id, "[StreamHandler, run_ocr] Image fingerprint matches previous OCR run, skipping OCR")
+        if not changed:
+            self.logger.info(self.id, "[StreamHandler, run_ocr] No box changed since the previous OCR run, skipping OCR")
+            self.change_detector.commit(signatures, changed, self.settings_version)
             await self.update_status(StreamStatus.OK)
             return {
                 **oldOcrData,
                 "last_ocr_timestamp": self.last_ocr_timestamp or oldOcrData.get("aggregate", {}).get("timestamp", 0)
             }
 
-        try:
-            widths = [box["box_width"] for box in self.selectionBoxes]
-            heights = [box["box_height"] for box in self.selectionBoxes]
-
-            height = stitched_img.shape[0]
-
-            snippets = []
-            x_offset = 0
-            for w in widths:
-                snippet = stitched_img[0:height, x_offset:x_offset + w]
-                snippets.append(snippet)
-                x_offset += w
-
-            if not snippets:
-                await self.update_status(StreamStatus.ERROR)
-                raise RuntimeError("No valid boxes after splitting stitched image")
-        except Exception as e:
-            await self.update_status(StreamStatus.ERROR)
-            raise RuntimeError(f"Splitting stitched image failed: {e}")
-
         self.ocrRunning = True
         await self.ws_manager.broadcast({
             "type": "stream/ocr_status",
@@ -533,12 +753,34 @@ class StreamHandler:
 
         engine_type = self.processingSettings.get("ocrEngine", "easyocr")
         ocr_config = self.processingSettings.get("ocrConfig", {})
-        engine = get_ocr_engine(engine_type, ocr_config)
+        if ocr_worker.loads_engines:
+            engine = EngineSpec(engine_type, ocr_config)
+        else:
+            engine = await ocr_engine_registry.get_engine_async(engine_type, ocr_config)
 
         try:
-            self.logger.info(self.id, f"[StreamHandler, run_ocr] Running OCR with engine: {engine.__class__.__name__}")
-            results = await ocr_worker.submit(engine, snippets, ocr_config)
+            engine_name = engine_type if ocr_worker.loads_engines else engine.__class__.__name__
+            self.logger.info(self.id, f"[StreamHandler, run_ocr] Running OCR with engine: {engine_name}")
+            if len(changed) < len(snippets):
+                self.logger.info(self.id, f"[StreamHandler, run_ocr] {len(snippets) - len(changed)} of {len(snippets)} boxes unchanged, reusing their results")
+            # unchanged boxes keep their previous result, boxes outside the frame get an empty one
+            results = [dict(result) for result in old_results] if len(changed) < len(snippets) else [None] * len(snippets)
+            to_run = [i for i in changed if snippets[i].size > 0]
+            for i in changed:
+                results[i] = {"text": "", "confidence": 0.0}
+            if to_run:
+                # a run for the same boxes that is still queued is joined instead of queued again
+                run_results = await self._recognize(
+                    engine, engine_type, [snippets[i] for i in to_run], ocr_config,
+                    priority=priority, key=(self.id, tuple(to_run)),
+                )
+                for i, result in zip(to_run, run_results):
+                    results[i] = result
             await self.update_status(StreamStatus.OK)
+        except OcrQueueFull:
+            # backpressure, not a stream problem: the caller retries later
+            self.ocrRunning = False
+            raise
         except Exception as e:
             await self.update_status(StreamStatus.ERROR)
             raise RuntimeError(f"OCR execution failed: {e}")
@@ -548,7 +790,11 @@ class StreamHandler:
         self.last_ocr_timestamp = int(time.time())
         
         stored = self.storeOcrResult(results, image_fingerprint=image_fingerprint)
-        
+        # only a stored reading counts as the boxes' last OCR; a rejected one (decreasing
+        # value, delta tracking) is read again next run, when it may be accepted
+        if stored.get("results") is results:
+            self.change_detector.commit(signatures, changed, self.settings_version)
+
         await self.ws_manager.broadcast({
             "type": "stream/ocr_status",
             "stream_id": self.id,
@@ -567,34 +813,19 @@ class StreamHandler:
     async def show_ocr_results(self, ocrResults, color=(255,0,0)):
         # Try to get the latest frame with OCR results overlay
         try:
-            frame_bytes = await self.grab_frame(displayBoxes=True, displayOcrResults=True, ocrResults=ocrResults, color=color)
-            if frame_bytes is None:
-                await self.update_status(StreamStatus.ERROR)
-                return None
-
-            np_frame = np.frombuffer(frame_bytes, np.uint8)
-            image = cv2.imdecode(np_frame, cv2.IMREAD_COLOR)
-            if image is None:
+            frame = await self.grab_processed_frame(displayBoxes=True, displayOcrResults=True, ocrResults=ocrResults, color=color)
+            if frame is None:
                 await self.update_status(StreamStatus.ERROR)
                 return None
 
             await self.update_status(StreamStatus.OK)
-            return frame_bytes
+            return frame.to_jpeg()
         except Exception as e:
             await self.update_status(StreamStatus.ERROR)
             self.logger.error(self.id, f"[StreamHandler] show_ocr_results error: {e}")
             return None
 
     def storeOcrResult(self, _results, image_fingerprint="none"):
-        filename = "/data/ocr.json"
-
-        data = {}
-        try:
-            with open(filename, "r") as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            self.logger.info(self.id, f"[StreamHandler, storeOcrResult] No previous OCR file found ({filename}). Starting fresh.")
-
         # Parse results
         result_text = "".join([str(r.get("text", "")) for r in _results])
         average_conf = sum(float(r.get("confidence", 0.0)) for r in _results) / max(len(_results), 1)
@@ -606,11 +837,13 @@ class StreamHandler:
         except ValueError:
             parsed_value = 0.0
 
-        delta_tracking_allows: bool = self.delta_tracking(
-            parsed_value,
-            self.schedulingSettings.get("delta_amount", 0.0),
-            self.schedulingSettings.get("delta_timespan", 0) * (60 if self.schedulingSettings.get("delta_timespan_unit", "minutes") == "minutes" else 3600 if self.schedulingSettings.get("delta_timespan_unit", "minutes") == "hours" else 1)
-        )
+        delta_tracking_allows: bool = True
+        if self.schedulingSettings.get("delta_tracking", False):
+            delta_tracking_allows = self.delta_tracking(
+                parsed_value,
+                self.schedulingSettings.get("delta_amount", 0.0),
+                self.schedulingSettings.get("delta_timespan", 0) * (60 if self.schedulingSettings.get("delta_timespan_unit", "minutes") == "minutes" else 3600 if self.schedulingSettings.get("delta_timespan_unit", "minutes") == "hours" else 1)
+            )
 
         aggregate = {
             "value": parsed_value,
@@ -619,8 +852,7 @@ class StreamHandler:
             "image-fingerprint": image_fingerprint
         }
 
-        # Update storage
-        data[self.id] = {
+        entry = {
             "results": _results,
             "aggregate": aggregate
         }
@@ -635,38 +867,73 @@ class StreamHandler:
 
         if self.schedulingSettings.get("delta_tracking", False):
             if delta_tracking_allows:
-                with open(filename, "w") as f:
-                    json.dump(data, f, indent=2)
+                self._persistOcrResult(entry)
                 self.logger.info(self.id, f"[StreamHandler, storeOcrResult, D] Stored OCR for stream {self.id}: {aggregate}")
             else:
                 self.logger.info(self.id, f"[StreamHandler, storeOcrResult, D_b] Delta tracking blocked storing OCR for stream {self.id}: {aggregate}")
                 #return last stored value
                 return self.getOcrResult()
         else:
-            with open(filename, "w") as f:
-                json.dump(data, f, indent=2)
+            self._persistOcrResult(entry)
             self.logger.info(self.id, f"[StreamHandler, storeOcrResult, n_D] Stored OCR for stream {self.id}: {aggregate}")
 
 
         self.last_ocr_results = _results
         self.last_ocr_timestamp = int(time.time())
-        return data[self.id]
+        return entry
 
-    def getOcrResult(self):
-        filename = "/data/ocr.json"
+    def _persistOcrResult(self, entry):
+        # the in-memory copy is authoritative for this process, the store write happens in the background
+        self._latest_ocr = entry
+        if self._recent_ocr is not None:
+            self._recent_ocr = [entry] + self._recent_ocr[:RECENT_OCR_RESULTS - 1]
+        if self.result_store is not None:
+            self.result_store.store(self.id, entry)
+
+    async def load_ocr_results(self):
+        """
+        Reads the newest stored results into memory once, on a worker thread.
+        Afterwards getOcrResult and get_adaptive_interval don't touch SQLite.
+        """
+        if self._recent_ocr is not None:
+            return
+        if self.result_store is None:
+            self._recent_ocr = [self._latest_ocr] if self._latest_ocr else []
+            return
         try:
-            with open(filename, "r") as f:
-                data = json.load(f)
-                if self.id in data:
-                    return data[self.id]
-                else:
+            history = await asyncio.to_thread(self.result_store.history, self.id, limit=RECENT_OCR_RESULTS)
+        except Exception as e:
+            self.logger.error(self.id, f"[StreamHandler, load_ocr_results] Could not read OCR results: {e}")
+            return
+        if self._recent_ocr is not None:
+            return  # loaded meanwhile
+        latest = self._latest_ocr
+        # a result stored while this was loading may not be in the store yet
+        if latest and (not history or latest.get("aggregate", {}).get("timestamp", 0) > history[0].get("aggregate", {}).get("timestamp", 0)):
+            history = [latest] + history[:RECENT_OCR_RESULTS - 1]
+        self._recent_ocr = history
+        if self._latest_ocr is None and history:
+            self._latest_ocr = history[0]
+
+    def getOcrResult(self):
+        if self._latest_ocr is None:
+            stored = None
+            if self.result_store is not None:
+                try:
+                    stored = self.result_store.latest(self.id)
+                except Exception as e:
+                    self.logger.error(self.id, f"[StreamHandler, getOcrResult] Could not read OCR results: {e}")
                     return {"value": 0.0, "confidence": 0.0, "timestamp": 0}
-        except FileNotFoundError:
-            self.logger.info(self.id, f"[StreamHandler, getOcrResult] No OCR file found ({filename}).")
-            return {"value": 0.0, "confidence": 0.0, "timestamp": 0}
-        except json.JSONDecodeError:
-            self.logger.error(self.id, f"[StreamHandler, getOcrResult] OCR file ({filename}) is corrupted.")
-            return {"value": 0.0, "confidence": 0.0, "timestamp": 0}
+            if stored is None:
+                self.logger.info(self.id, f"[StreamHandler, getOcrResult] No stored OCR result for stream {self.id}.")
+                return {"value": 0.0, "confidence": 0.0, "timestamp": 0}
+            self._latest_ocr = stored
+        return self._latest_ocr
+
+    def getOcrHistory(self, limit=100, since=None, until=None):
+        if self.result_store is None:
+            return [self._latest_ocr] if self._latest_ocr else []
+        return self.result_store.history(self.id, limit=limit, since=since, until=until)
 
     def process_frame(self):
         # Return image with overlay
@@ -683,6 +950,8 @@ class StreamHandler:
         if not hasattr(self, 'processingSettings'):
             self.processingSettings = {}
         self.processingSettings.update(settings)
+        self._preprocessing_plan = None
+        self.settings_version += 1
 
     def set_ocrsettings(self, settings):
         if not hasattr(self, 'ocrSettings'):
@@ -694,9 +963,18 @@ class StreamHandler:
     
     def set_boxes(self, boxes):
         self.selectionBoxes = boxes
+        self._preprocessing_plan = None
+        self.settings_version += 1
 
     def set_streamID(self, stream_id):
         self.id = stream_id
+        self.thumbnails.path = self._thumbnail_path()
+
+    def set_rtsp_url(self, rtsp_url):
+        self.rtsp_url = rtsp_url
+        # a new source starts with a closed breaker
+        self.breaker = CircuitBreaker()
+        self.capture_error = None
 
     def get_last_ocr_results(self):
         if self.last_ocr_results is None:
@@ -723,9 +1001,42 @@ class StreamHandler:
             if settings.get("execution_mode") == "interval" and settings.get("cron_expression") != "":
                 # TODO: add cron expression validation and sanitization
                 self.scheduler.add_job(settings.get("cron_expression"), self.id)
+            elif self.schedulingSettings.get("execution_mode") == "adaptive":
+                self.scheduler.add_adaptive_job(self.id)
         else:
             self.logger.error(self.id, f"[StreamHandler] No scheduler available to update jobs for stream {self.id}; THIS SHOULD NOT HAPPEN, WHAT DID YOU DO???")
 
+    def get_adaptive_interval(self):
+        """
+        Interval until the next OCR run in "adaptive" execution mode, between
+        adaptive_min_interval and adaptive_max_interval (seconds), from the recent readings.
+        """
+        settings = self.schedulingSettings
+        if self._recent_ocr is not None:
+            history = self._recent_ocr
+        else:
+            # not loaded yet (startup): read the store directly
+            history = self.getOcrHistory(limit=RECENT_OCR_RESULTS)
+            latest = self._latest_ocr
+            # the newest reading may still be on its way into the result store
+            if latest and (not history or latest.get("aggregate", {}).get("timestamp", 0) > history[0].get("aggregate", {}).get("timestamp", 0)):
+                history = [latest] + history
+
+        min_interval = float(settings.get("adaptive_min_interval", DEFAULT_MIN_INTERVAL))
+        max_interval = max(float(settings.get("adaptive_max_interval", DEFAULT_MAX_INTERVAL)), min_interval)
+        seconds, reason = adaptive_interval(
+            history, time.time(), min_interval, max_interval,
+            min_change=float(settings.get("adaptive_min_change", 0.0)),
+            min_confidence=float(settings.get("adaptive_min_confidence", DEFAULT_MIN_CONFIDENCE)),
+        )
+        self.effective_interval = {
+            "interval_seconds": seconds,
+            "reason": reason,
+            "min_interval": min_interval,
+            "max_interval": max_interval,
+        }
+        return self.effective_interval
+
     def delta_tracking(self, new_value: float, increase: float, timespan_seconds: float) -> bool:
         """
         Delta tracking is a functionality that stops the OCR from storing faulty values. 
@@ -6,6 +6,7 @@
 
 from backend.StreamHandler import StreamHandler
 from backend.ExecutionLogger import ExecutionLogger
+from backend.OcrResultStore import OcrResultStore
 import json
 
 class StreamManager:
@@ -13,13 +14,15 @@ class StreamManager:
     StreamManager
     Keeps track of all the active StreamHandler instances.
     """
-    def __init__(self, ws_manager=None, verbose_logging=False):
+    def __init__(self, ws_manager=None, verbose_logging=False, result_store=None):
         self.streams = {}
         self.ws_manager = ws_manager
         self.VERBOSE_LOGGING = verbose_logging
         self.store_location = "/data/streams.json"
         self._scheduler = None
         self.execution_logger = ExecutionLogger(self)
+        # shared with other managers if given, so there is only one writer per database
+        self.result_store = result_store if result_store is not None else OcrResultStore()
 
     @property
     def scheduler(self):
@@ -33,7 +36,7 @@ class StreamManager:
                 stream.scheduler = self._scheduler
 
     def add_stream(self, stream_id, rtsp_url, config, processingSettings, ocrSettings, selectionBoxes, schedulingSettings):
-        self.streams[stream_id] = StreamHandler(self.execution_logger, stream_id, rtsp_url, config, processingSettings, ocrSettings, selectionBoxes, ws_manager=self.ws_manager, schedulingSettings=schedulingSettings)
+        self.streams[stream_id] = StreamHandler(self.execution_logger, stream_id, rtsp_url, config, processingSettings, ocrSettings, selectionBoxes, ws_manager=self.ws_manager, schedulingSettings=schedulingSettings, result_store=self.result_store)
         if self._scheduler:
             self.streams[stream_id].scheduler = self._scheduler
 
@@ -47,6 +50,7 @@ class StreamManager:
     def delete_stream(self, stream_id):
         """Remove the stream handler for the given stream ID."""
         if stream_id in self.streams:
+            self.streams[stream_id].close()
             del self.streams[stream_id]
             if self.VERBOSE_LOGGING:
                 print(f"[StreamManager] Removed stream with ID: {stream_id}")
@@ -0,0 +1,115 @@
+#ThumbnailCache
+#    The encoded dashboard thumbnail of one stream, kept in memory with a
+#    content hash as ETag. It is encoded once per new frame; the copy on disk
+#    is only there so a restarted server has something to show right away,
+#    and is written in the background.
+
+import hashlib
+import os
+import threading
+import time
+
+
+class Thumbnail:
+    def __init__(self, data: bytes, created: float, source_time=None):
+        self.data = data
+        self.etag = '"' + hashlib.sha1(data).hexdigest()[:20] + '"'
+        self.created = created
+        self.source_time = source_time
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header covers `etag` (weak comparison, lists and "*")."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ThumbnailCache:
+    def __init__(self, path: str, max_age: float = 3600):
+        self.path = path
+        self.max_age = max_age
+        self.entry: Thumbnail = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._writing = False
+        self.encodes = 0
+        self.disk_writes = 0
+
+    def get(self, now: float = None):
+        """The thumbnail if it is younger than max_age; after a restart the one on disk."""
+        now = time.time() if now is None else now
+        if self.entry is None and not self._loaded:
+            self._loaded = True
+            self.entry = self._load()
+        if self.entry is not None and now - self.entry.created > self.max_age:
+            return None
+        return self.entry
+
+    def put(self, data: bytes, source_time=None) -> Thumbnail:
+        self.entry = Thumbnail(data, time.time(), source_time)
+        self._loaded = True
+        self.encodes += 1
+        self._schedule_write()
+        return self.entry
+
+    def clear(self):
+        self.entry = None
+        self._loaded = True
+        with self._lock:
+            self._dirty = False
+        try:
+            os.remove(self.path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _load(self):
+        try:
+            created = os.path.getmtime(self.path)
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return Thumbnail(data, created) if data else None
+
+    def _schedule_write(self):
+        with self._lock:
+            self._dirty = True
+            if self._writing:
+                return  # the running writer picks up the newest entry
+            self._writing = True
+        threading.Thread(target=self._writer, name="ThumbnailWriter", daemon=True).start()
+
+    def _writer(self):
+        while True:
+            with self._lock:
+                entry = self.entry
+                if not self._dirty or entry is None:
+                    self._writing = False
+                    return
+                self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(entry.data)
+                os.replace(tmp_path, self.path)
+                self.disk_writes += 1
+            except OSError as e:
+                print(f"[ThumbnailCache] Could not write {self.path}: {e}")
+
+    def stats(self):
+        entry = self.entry
+        return {
+            "etag": entry.etag if entry else None,
+            "bytes": len(entry.data) if entry else 0,
+            "age_seconds": round(time.time() - entry.created, 1) if entry else None,
+            "encodes": self.encodes,
+            "disk_writes": self.disk_writes,
+        }
@@ -0,0 +1,15 @@
+#Timings
+#    Summaries of the wait/service time windows the queues and pools report
+#    in their /metrics endpoints.
+
+
+def summarize_ms(values):
+    """Average, 95th percentile and maximum of durations in milliseconds."""
+    if not values:
+        return {"avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(values)
+    return {
+        "avg_ms": round(sum(ordered) / len(ordered), 3),
+        "p95_ms": round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
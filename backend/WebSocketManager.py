@@ -1,23 +1,176 @@
+import asyncio
+from collections import deque
+
+# Only the latest message per stream matters, a queued one is replaced in place.
+COALESCED_TYPES = {"stream/thumbnail_update"}
+# High rate and lossy by nature: when a client's queue is full the oldest of these goes first.
+DROPPABLE_TYPES = {"logger/log"}
+
+
+class _Client:
+    """One connected websocket: its subscriptions, outgoing queue and writer task."""
+
+    def __init__(self, websocket, max_queue, streams=None, types=None):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.streams = set(streams) if streams else None
+        self.types = set(types) if types else None
+        self.queue = deque()
+        self.ready = asyncio.Event()
+        self.writer = None
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closing = False
+
+    def wants(self, message):
+        if self.types is not None and message.get("type") not in self.types:
+            return False
+        stream_id = message.get("stream_id")
+        if self.streams is not None and stream_id is not None and stream_id not in self.streams:
+            return False
+        return True
+
+    def enqueue(self, message):
+        """Queues a message without blocking. Returns False if the client can't keep up."""
+        msg_type = message.get("type")
+        if msg_type in COALESCED_TYPES:
+            for i, queued in enumerate(self.queue):
+                if queued.get("type") == msg_type and queued.get("stream_id") == message.get("stream_id"):
+                    self.queue[i] = message
+                    self.coalesced += 1
+                    return True
+
+        if len(self.queue) >= self.max_queue:
+            for i, queued in enumerate(self.queue):
+                if queued.get("type") in DROPPABLE_TYPES:
+                    del self.queue[i]
+                    self.dropped += 1
+                    break
+            else:
+                if msg_type in DROPPABLE_TYPES:
+                    self.dropped += 1
+                    return True
+                return False
+
+        self.queue.append(message)
+        self.ready.set()
+        return True
+
+
 class WebSocketManager:
-    def __init__(self):
-        self.connections = set()
+    """
+    Fans messages out to the dashboard websockets.
+
+    broadcast() only puts the message into the queue of every subscribed
+    client; one writer task per client does the actual sending, so a slow
+    or dead tab never holds up the others. Clients whose queue overflows
+    with messages that can't be dropped are disconnected.
+    """
+
+    def __init__(self, max_queue=256, send_timeout=10.0):
+        self.connections = {}
         self.loop = None
-        
-    async def register(self, websocket):
-        self.connections.add(websocket)
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.disconnected_slow = 0
+
+    async def register(self, websocket, streams=None, types=None):
+        client = _Client(websocket, self.max_queue, streams, types)
+        self.connections[websocket] = client
+        client.writer = asyncio.create_task(self._writer(client))
         print("[WebSocketManager] New connection registered")
+        return client
 
     async def unregister(self, websocket):
-        self.connections.remove(websocket)
+        client = self.connections.pop(websocket, None)
+        if client is None:
+            return
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
         print("[WebSocketManager] Connection removed")
 
+    def subscribe(self, websocket, streams=None, types=None):
+        """Replaces a client's filters. None (or empty) means everything."""
+        client = self.connections.get(websocket)
+        if client is None:
+            return
+        client.streams = set(streams) if streams else None
+        client.types = set(types) if types else None
+
+    def handle_client_message(self, websocket, message):
+        """Handles a message sent by a client, e.g. {"type": "subscribe", "streams": [...], "types": [...]}."""
+        if not isinstance(message, dict):
+            return
+        if message.get("type") == "subscribe":
+            self.subscribe(websocket, message.get("streams"), message.get("types"))
+        elif message.get("type") == "unsubscribe":
+            self.subscribe(websocket)
+
+    def viewers(self, stream_id):
+        """
+        Clients that subscribed to a stream by id, i.e. have it on screen. A client
+        without a stream filter gets every stream's updates but isn't counted.
+        """
+        message = {"type": "stream/thumbnail_update", "stream_id": stream_id}
+        return sum(
+            1 for client in self.connections.values()
+            if not client.closing and client.streams is not None and client.wants(message)
+        )
+
+    def receivers(self, stream_id):
+        """Clients that receive the thumbnail updates of a stream, subscribed to it by id or not."""
+        message = {"type": "stream/thumbnail_update", "stream_id": stream_id}
+        return sum(1 for client in self.connections.values() if not client.closing and client.wants(message))
+
+    def publish(self, message):
+        """Queues a message for every subscribed client. Must run on the event loop, never blocks."""
+        for websocket, client in list(self.connections.items()):
+            if client.closing or not client.wants(message):
+                continue
+            if not client.enqueue(message):
+                client.closing = True
+                print("[WebSocketManager] Client can't keep up, disconnecting")
+                self.disconnected_slow += 1
+                asyncio.create_task(self._drop(websocket))
+
     async def broadcast(self, message):
-        to_remove = set()
-        for ws in self.connections:
-            try:
-                await ws.send_json(message)
-            except Exception as e:
-                print(f"[WebSocketManager] Failed to send message: {e}")
-                to_remove.add(ws)
-        
-        self.connections -= to_remove  # Remove broken connections
+        self.publish(message)
+
+    async def _writer(self, client):
+        try:
+            while True:
+                while not client.queue:
+                    client.ready.clear()
+                    await client.ready.wait()
+                message = client.queue.popleft()
+                await asyncio.wait_for(client.websocket.send_json(message), self.send_timeout)
+                client.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WebSocketManager] Failed to send message: {e}")
+            await self._drop(client.websocket)
+
+    async def _drop(self, websocket):
+        await self.unregister(websocket)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            "clients": [
+                {
+                    "streams": sorted(client.streams) if client.streams is not None else None,
+                    "types": sorted(client.types) if client.types is not None else None,
+                    "queue_depth": len(client.queue),
+                    "sent": client.sent,
+                    "dropped": client.dropped,
+                    "coalesced": client.coalesced,
+                }
+                for client in self.connections.values()
+            ],
+            "disconnected_slow": self.disconnected_slow,
+        }
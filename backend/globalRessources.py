@@ -1,2 +1,48 @@
+import os
 from backend.ocr.OcrWorker import OcrWorker
-ocr_worker = OcrWorker(num_workers=1)
\ No newline at end of file
+from backend.ocr.OcrProcessWorker import OcrProcessWorker
+from backend.ocr.EngineRegistry import EngineRegistry
+from backend.ocr.GlyphCache import GlyphCache
+from backend.CaptureScheduler import CaptureScheduler, host_limits_from_env
+
+# "thread": one in-process worker thread sharing the engines of ocr_engine_registry.
+# "process": OCR_WORKERS processes with their own engines, OCR_TORCH_THREADS torch threads each.
+# Past OCR_QUEUE_MAX_DEPTH waiting jobs the OCR routes answer 429.
+OCR_QUEUE_MAX_DEPTH = int(os.environ.get("OCR_QUEUE_MAX_DEPTH", 32))
+# Queued jobs of different streams with the same engine and config run as one batch
+# of at most OCR_MAX_BATCH snippets. OCR_BATCH_WINDOW_MS > 0 also waits that long for
+# more jobs; see benchmarks/ocr_batching.py before raising it.
+OCR_BATCH_WINDOW = float(os.environ.get("OCR_BATCH_WINDOW_MS", 0)) / 1000
+OCR_MAX_BATCH = int(os.environ.get("OCR_MAX_BATCH", 32))
+if os.environ.get("OCR_WORKER_BACKEND", "thread") == "process":
+    ocr_worker = OcrProcessWorker(
+        num_workers=int(os.environ.get("OCR_WORKERS", 2)),
+        torch_threads=int(os.environ.get("OCR_TORCH_THREADS", 0)) or None,
+        idle_ttl=float(os.environ.get("OCR_ENGINE_IDLE_TTL", 3600)),
+        max_queue_depth=OCR_QUEUE_MAX_DEPTH,
+        batch_window=OCR_BATCH_WINDOW,
+        max_batch=OCR_MAX_BATCH,
+    )
+else:
+    ocr_worker = OcrWorker(
+        num_workers=1,
+        max_queue_depth=OCR_QUEUE_MAX_DEPTH,
+        batch_window=OCR_BATCH_WINDOW,
+        max_batch=OCR_MAX_BATCH,
+    )
+ocr_engine_registry = EngineRegistry(
+    idle_ttl=float(os.environ.get("OCR_ENGINE_IDLE_TTL", 3600)),
+    memory_budget_mb=float(os.environ.get("OCR_ENGINE_MEMORY_BUDGET_MB", 0)) or None,
+)
+# Recognized character cells of boxes with a fixed digit count (ocrConfig "digits"),
+# shared by all streams. 0 turns the cache off.
+glyph_cache = GlyphCache(max_entries=int(os.environ.get("OCR_GLYPH_CACHE_SIZE", 4096)))
+# Blocking frame grabs of all streams and previews: CAPTURE_WORKERS threads, at most
+# CAPTURE_MAX_PER_HOST at once per camera host. At most CAPTURE_MAX_SESSIONS_PER_HOST
+# capture sessions are connected to one host (CAPTURE_HOST_LIMITS="nvr.local=4,..." sets both per host).
+capture_scheduler = CaptureScheduler(
+    workers=int(os.environ.get("CAPTURE_WORKERS", 8)),
+    per_host=int(os.environ.get("CAPTURE_MAX_PER_HOST", 2)),
+    sessions_per_host=int(os.environ.get("CAPTURE_MAX_SESSIONS_PER_HOST", 4)),
+    host_limits=host_limits_from_env(os.environ.get("CAPTURE_HOST_LIMITS", "")),
+)
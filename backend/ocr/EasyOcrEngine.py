@@ -1,6 +1,10 @@
 # backend/ocr/engines/easyocr_engine.py
 from .OCREngineBase import OCREngine
+import cv2
 import easyocr
+from easyocr.easyocr import imgH
+from easyocr.recognition import get_text
+from easyocr.utils import get_image_list
 import numpy as np
 
 class EasyOCREngine(OCREngine):
@@ -10,6 +14,9 @@ class EasyOCREngine(OCREngine):
 
     def recognize_sync(self, images, config: dict):
         # images: list of numpy arrays
+        if (config or {}).get("mode") == "recognize":
+            return self.recognize_lines(images, config)
+
         results = []
         for img in images:
             detections = self.reader.readtext(img)
@@ -18,6 +25,60 @@ class EasyOCREngine(OCREngine):
             results.append({"text": full_text.strip(), "confidence": round(confidence, 3)})
         return results
 
+    def recognize_lines(self, images, config: dict):
+        """
+        Recognition only, no text detection: every image (the selection box) is
+        read as one text line, or split into a config["grid"] = [rows, cols] of
+        lines. All lines of all images go through the recognizer in one batch.
+        config["allowlist"] restricts the characters, e.g. "0123456789.".
+        """
+        rows, cols = (config.get("grid") or [1, 1])
+        rows, cols = max(1, int(rows)), max(1, int(cols))
+
+        image_list = []
+        owners = []  # (image index, row) of every line in image_list
+        max_width = imgH
+        for index, img in enumerate(images):
+            grey = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+            h, w = grey.shape
+            for row in range(rows):
+                for col in range(cols):
+                    cell = [w * col // cols, w * (col + 1) // cols, h * row // rows, h * (row + 1) // rows]
+                    lines, width = get_image_list([cell], [], grey, model_height=imgH, sort_output=False)
+                    if lines:
+                        image_list.extend(lines)
+                        owners.extend([(index, row)] * len(lines))
+                        max_width = max(max_width, width)
+
+        if not image_list:
+            return [{"text": "", "confidence": 0.0} for _ in images]
+
+        reader = self.reader
+        allowlist = config.get("allowlist")
+        if allowlist:
+            ignore_char = "".join(set(reader.character) - set(allowlist))
+        else:
+            ignore_char = "".join(set(reader.character) - set(reader.lang_char))
+
+        predictions = get_text(
+            reader.character, imgH, int(max_width), reader.recognizer, reader.converter, image_list,
+            ignore_char, "greedy", 5, len(image_list), 0.1, 0.5, 0.003, 0, reader.device,
+        )
+
+        texts = [[[] for _ in range(rows)] for _ in images]
+        confidences = [[] for _ in images]
+        for (index, row), (_, text, confidence) in zip(owners, predictions):
+            texts[index][row].append(text)
+            confidences[index].append(float(confidence))
+
+        results = []
+        for index in range(len(images)):
+            # cells of a row form one reading, rows are separate lines
+            text = " ".join("".join(cells) for cells in texts[index] if cells)
+            confidence = sum(confidences[index]) / len(confidences[index]) if confidences[index] else 0
+            results.append({"text": text.strip(), "confidence": round(confidence, 3)})
+        return results
+
     # Keep async wrapper if you want:
     async def recognize(self, images, config: dict):
         return self.recognize_sync(images, config)
@@ -0,0 +1,190 @@
+# backend/ocr/EngineRegistry.py
+import asyncio
+import gc
+import os
+import threading
+import time
+import traceback
+
+from .OcrFactory import get_ocr_engine, engine_key
+
+
+def _rss_bytes():
+    """Resident set size of this process in bytes (0 if it can't be determined)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KiB on linux; better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return 0
+
+
+class _EngineEntry:
+    def __init__(self, key, engine, load_seconds, memory_bytes):
+        self.key = key
+        self.engine = engine
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+
+
+class EngineRegistry:
+    """
+    Process-wide cache of loaded OCR engines.
+
+    Engines are keyed by (engine type, language, config hash), loaded once and
+    shared by every stream. Idle engines are evicted after `idle_ttl` seconds,
+    and least recently used engines are evicted while the summed engine memory
+    is above `memory_budget_mb`.
+
+    Usage:
+      - engine = ocr_engine_registry.get_engine("easyocr", {"language": "en"})
+      - engine = await ocr_engine_registry.get_engine_async(...)  (from asyncio code)
+    """
+
+    def __init__(self, factory=get_ocr_engine, idle_ttl: float = 3600, memory_budget_mb: float = None, sweep_interval: float = 60):
+        self._factory = factory
+        self.idle_ttl = idle_ttl
+        self.memory_budget_mb = memory_budget_mb
+        self._engines = {}
+        self._lock = threading.Lock()
+        # Loads are serialized: loading two models at once doesn't make either faster
+        # on CPU, and it keeps the per-engine memory measurement meaningful.
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        if sweep_interval and sweep_interval > 0:
+            self._sweeper = threading.Thread(target=self._sweep_loop, args=(sweep_interval,), name="OCR-Engine-Sweeper", daemon=True)
+            self._sweeper.start()
+
+    def get_engine(self, engine_type: str, config: dict = {}):
+        """Returns the shared engine for the given type/config, loading it on first use. Blocking."""
+        key = engine_key(engine_type, config)
+
+        entry = self._touch(key)
+        if entry:
+            return entry.engine
+
+        with self._load_lock:
+            # somebody else may have loaded it while we waited for the lock
+            entry = self._touch(key)
+            if entry:
+                return entry.engine
+
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            engine = self._factory(engine_type, config)
+            load_seconds = time.perf_counter() - start
+            memory_bytes = max(_rss_bytes() - rss_before, 0)
+
+            entry = _EngineEntry(key, engine, load_seconds, memory_bytes)
+            entry.uses = 1
+            with self._lock:
+                self._engines[key] = entry
+
+        print(f"[EngineRegistry] Loaded {key} in {load_seconds:.2f}s (~{memory_bytes / (1024 * 1024):.1f} MB)")
+        self.evict(keep=key)
+        return engine
+
+    async def get_engine_async(self, engine_type: str, config: dict = {}):
+        """Same as get_engine, but loads off the event loop if the engine isn't cached yet."""
+        entry = self._touch(engine_key(engine_type, config))
+        if entry:
+            return entry.engine
+        return await asyncio.to_thread(self.get_engine, engine_type, config)
+
+    def warmup(self, specs):
+        """
+        Loads the given (engine_type, config) pairs in a background thread so the
+        first OCR run doesn't pay for the model load.
+        """
+        specs = list(specs)
+
+        def _run():
+            for engine_type, config in specs:
+                try:
+                    self.get_engine(engine_type, config)
+                except Exception as e:
+                    print(f"[EngineRegistry] Warmup of {engine_type} failed: {e}")
+                    traceback.print_exc()
+
+        t = threading.Thread(target=_run, name="OCR-Engine-Warmup", daemon=True)
+        t.start()
+        return t
+
+    def evict(self, keep=None):
+        """Drops idle engines and enforces the memory budget. Returns the evicted keys."""
+        now = time.time()
+        evicted = []
+        with self._lock:
+            if self.idle_ttl and self.idle_ttl > 0:
+                for key, entry in list(self._engines.items()):
+                    if key != keep and now - entry.last_used > self.idle_ttl:
+                        del self._engines[key]
+                        evicted.append(key)
+
+            if self.memory_budget_mb:
+                budget = self.memory_budget_mb * 1024 * 1024
+                by_age = sorted(self._engines.values(), key=lambda e: e.last_used)
+                total = sum(e.memory_bytes for e in by_age)
+                for entry in by_age:
+                    if total <= budget:
+                        break
+                    if entry.key == keep:
+                        continue
+                    del self._engines[entry.key]
+                    evicted.append(entry.key)
+                    total -= entry.memory_bytes
+
+        if evicted:
+            gc.collect()
+            print(f"[EngineRegistry] Evicted engines: {evicted}")
+        return evicted
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            engines = [
+                {
+                    "engine_type": e.key[0],
+                    "language": e.key[1],
+                    "config_hash": e.key[2],
+                    "load_seconds": round(e.load_seconds, 3),
+                    "memory_mb": round(e.memory_bytes / (1024 * 1024), 1),
+                    "uses": e.uses,
+                    "loaded_at": int(e.loaded_at),
+                    "idle_seconds": round(now - e.last_used, 1),
+                }
+                for e in self._engines.values()
+            ]
+        return {
+            "engines": engines,
+            "process_rss_mb": round(_rss_bytes() / (1024 * 1024), 1),
+            "idle_ttl": self.idle_ttl,
+            "memory_budget_mb": self.memory_budget_mb,
+        }
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _touch(self, key):
+        with self._lock:
+            entry = self._engines.get(key)
+            if entry:
+                entry.last_used = time.time()
+                entry.uses += 1
+            return entry
+
+    def _sweep_loop(self, interval):
+        while not self._stop_event.wait(interval):
+            try:
+                self.evict()
+            except Exception:
+                traceback.print_exc()
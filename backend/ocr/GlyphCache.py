@@ -0,0 +1,119 @@
+# backend/ocr/GlyphCache.py
+import json
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+HASH_SIZE = (24, 32)  # (width, height) of the thumbnail a cell is hashed from
+# cells with less contrast than this are blank
+MIN_CONTRAST = 24
+# bits out of 24 * 32; the closest seven-segment digits (0 and 8) are ~24 bits apart.
+# Too noisy a cell misses and goes to the engine, which only costs time.
+DEFAULT_TOLERANCE = 8
+
+
+def split_cells(snippet: np.ndarray, digits: int):
+    """Splits a box with a fixed digit count into `digits` equal-width character cells."""
+    w = snippet.shape[1]
+    return [snippet[:, w * i // digits:w * (i + 1) // digits] for i in range(digits)]
+
+
+def glyph_hash(cell: np.ndarray):
+    """
+    Perceptual hash of a character cell: a 24x32 thumbnail thresholded halfway
+    between its darkest and brightest block, packed into 96 bytes. Area
+    averaging absorbs sensor noise, the threshold absorbs brightness and contrast.
+    None for blank cells.
+    """
+    if cell.size == 0:
+        return None
+    grey = cv2.cvtColor(cell, cv2.COLOR_BGR2GRAY) if cell.ndim == 3 else cell
+    small = cv2.resize(grey, HASH_SIZE, interpolation=cv2.INTER_AREA)
+    lo, hi = int(small.min()), int(small.max())
+    if hi - lo < MIN_CONTRAST:
+        return None
+    return np.packbits(small > (lo + hi) / 2).tobytes()
+
+
+class GlyphCache:
+    """
+    Recognitions of single character cells, keyed by their glyph_hash.
+
+    Meters show the same few glyphs over and over, so most cells of a
+    fixed-width reading were already recognized in an earlier run. Entries are
+    kept per engine + config (`namespace()`), at most `max_entries` per
+    namespace, least recently used first out. A lookup that misses the exact
+    hash falls back to the closest stored hash within `tolerance` bits.
+    """
+
+    def __init__(self, max_entries: int = 4096, tolerance: int = DEFAULT_TOLERANCE, min_confidence: float = 0.3):
+        self.max_entries = max_entries
+        self.tolerance = tolerance
+        self.min_confidence = min_confidence
+        self._entries = {}  # namespace -> OrderedDict(hash -> result)
+        self._lock = threading.Lock()
+        self._streams = {}  # stream id -> [hits, misses]
+        self.evictions = 0
+
+    @staticmethod
+    def namespace(engine_type: str, config: dict) -> str:
+        return f"{engine_type}:{json.dumps(config or {}, sort_keys=True, default=str)}"
+
+    def lookup(self, stream_id, namespace, key: bytes):
+        """Cached result for a cell hash, or None."""
+        with self._lock:
+            counts = self._streams.setdefault(stream_id, [0, 0])
+            entries = self._entries.get(namespace)
+            result = None
+            if entries:
+                if key in entries:
+                    entries.move_to_end(key)
+                    result = entries[key]
+                elif self.tolerance > 0:
+                    result = self._nearest(entries, key)
+            counts[0 if result is not None else 1] += 1
+            return dict(result) if result is not None else None
+
+    def _nearest(self, entries, key):
+        keys = list(entries)
+        stored = np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(len(keys), -1)
+        distances = np.unpackbits(stored ^ np.frombuffer(key, dtype=np.uint8), axis=1).sum(axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] > self.tolerance:
+            return None
+        entries.move_to_end(keys[best])
+        return entries[keys[best]]
+
+    def store(self, namespace, key: bytes, result: dict):
+        if not self.max_entries or result.get("confidence", 0) < self.min_confidence:
+            return
+        with self._lock:
+            entries = self._entries.setdefault(namespace, OrderedDict())
+            entries[key] = {"text": result.get("text", ""), "confidence": result.get("confidence", 0.0)}
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": sum(len(entries) for entries in self._entries.values()),
+                "namespaces": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "streams": {
+                    stream_id: {
+                        "hits": hits,
+                        "misses": misses,
+                        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                    }
+                    for stream_id, (hits, misses) in self._streams.items()
+                },
+            }
@@ -1,8 +1,36 @@
-from .EasyOcrEngine import EasyOCREngine
+import hashlib
+import json
+
+from .SevenSegmentEngine import SevenSegmentEngine
+
+# Config keys that change how an engine is constructed (i.e. which model gets loaded).
+# Everything else in ocrConfig is a per-call option and must not force a reload.
+ENGINE_CONSTRUCTION_KEYS = {
+    "easyocr": ("language", "gpu"),
+    "sevensegment": (),
+}
 
 def get_ocr_engine(engine_type: str, config: dict = {}):
     if engine_type == "easyocr":
+        # imported on demand: easyocr pulls in torch, which engines like sevensegment don't need
+        from .EasyOcrEngine import EasyOCREngine
         lang = config.get("language", "en")
-        return EasyOCREngine(lang=lang)
+        return EasyOCREngine(lang=lang, gpu=bool(config.get("gpu", False)))
+    elif engine_type == "sevensegment":
+        return SevenSegmentEngine()
     else:
         raise ValueError(f"Unsupported OCR engine: {engine_type}")
+
+def engine_key(engine_type: str, config: dict = {}):
+    """
+    Returns the (engine type, language, config hash) tuple that identifies a loaded engine.
+    Two configs with the same key can share one engine instance.
+    """
+    config = config or {}
+    relevant = {
+        k: config[k]
+        for k in ENGINE_CONSTRUCTION_KEYS.get(engine_type, ())
+        if k in config and k != "language"
+    }
+    config_hash = hashlib.sha1(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:12]
+    return (engine_type, config.get("language", "en"), config_hash)
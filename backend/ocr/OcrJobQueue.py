@@ -0,0 +1,296 @@
+# backend/ocr/OcrJobQueue.py
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+
+from backend.Timings import summarize_ms
+
+
+class OcrPriority(IntEnum):
+    """Lower value runs first."""
+    INTERACTIVE = 0  # someone clicked "run OCR" in the dashboard
+    API = 1          # polling clients, e.g. Home Assistant
+    SCHEDULED = 2    # cron / interval jobs
+
+
+class OcrQueueFull(Exception):
+    """The OCR queue is at its maximum depth. Try again after `retry_after` seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"OCR queue is full, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class OcrDeadlineExceeded(TimeoutError):
+    """The job waited in the queue past its deadline and was dropped."""
+
+
+DEFAULT_DEADLINES = {
+    OcrPriority.INTERACTIVE: 60.0,
+    OcrPriority.API: 30.0,
+    OcrPriority.SCHEDULED: 300.0,
+}
+
+
+class OcrJob:
+    def __init__(self, engine, images, config, priority, deadline, key, future, loop):
+        self.engine = engine
+        self.images = images
+        self.config = config
+        self.priority = priority
+        self.deadline = deadline
+        self.key = key
+        self.future = future
+        self.loop = loop
+        self.enqueued_at = time.monotonic()
+
+    def resolve(self, result=None, error=None):
+        """Completes the job's future from any thread."""
+        future = self.future
+
+        def _set():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        try:
+            self.loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            # The loop may be closed; just ignore if can't set future
+            pass
+
+
+def resolve_batch(jobs, results=None, error=None):
+    """Hands every job of a batch its slice of `results` (one per snippet, in job order), or `error`."""
+    if error is None and len(results) != sum(len(job.images) for job in jobs):
+        error = RuntimeError(f"OCR engine returned {len(results)} results for {sum(len(job.images) for job in jobs)} snippets")
+    offset = 0
+    for job in jobs:
+        if error is not None:
+            job.resolve(error=error)
+        else:
+            job.resolve(result=results[offset:offset + len(job.images)])
+        offset += len(job.images)
+
+
+class OcrJobQueue:
+    """
+    Thread-safe priority queue between the asyncio side and the OCR workers.
+
+    - Jobs run by OcrPriority, FIFO within one priority.
+    - A job submitted with the `key` of a job that is still waiting joins that
+      job instead of queueing a second one: it gets the same result, the pending
+      job takes over the newer images, engine and config, and keeps the higher
+      of both priorities. Every caller gets its own shielded awaitable, so one
+      caller giving up doesn't cancel the job for the others.
+    - Jobs still waiting when their deadline passes are dropped with
+      OcrDeadlineExceeded instead of being run for nobody.
+    - At `max_depth` waiting jobs, new jobs are refused with OcrQueueFull.
+    - get_batch() hands out several jobs for the same engine and config at once,
+      so the worker can run their snippets as one batch (see resolve_batch).
+    """
+
+    def __init__(self, max_depth: int = 32, deadlines: dict = None, workers: int = 1):
+        self.max_depth = max_depth
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.workers = max(1, workers)
+        self._heap = []
+        self._pending = {}  # key -> job, for jobs that are still waiting
+        self._entries = {}  # job -> its live heap entry
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._wait_ms = deque(maxlen=500)
+        self._service_ms = deque(maxlen=500)
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.expired = 0
+        self.running = 0
+        self.batches = 0
+        self.batched_jobs = 0
+
+    def submit(self, engine, images, config, priority=OcrPriority.API, key=None, deadline=None):
+        """
+        Queues a job and returns an awaitable for its results. Call from the event loop.
+        Raises OcrQueueFull when the queue is at max_depth.
+        """
+        priority = OcrPriority(priority)
+        now = time.monotonic()
+        deadline_at = now + (deadline if deadline is not None else self.deadlines[priority])
+
+        with self._cond:
+            job = self._pending.get(key) if key is not None else None
+            if job is not None:
+                job.engine = engine
+                job.images = images
+                job.config = config
+                job.deadline = max(job.deadline, deadline_at)
+                if priority < job.priority:
+                    job.priority = priority
+                    self._push(job)
+                self.deduplicated += 1
+                return asyncio.shield(job.future)
+
+            if len(self._entries) >= self.max_depth:
+                self.rejected += 1
+                raise OcrQueueFull(self.retry_after())
+
+            loop = asyncio.get_running_loop()
+            job = OcrJob(engine, images, config, priority, deadline_at, key, loop.create_future(), loop)
+            if key is not None:
+                self._pending[key] = job
+            self._push(job)
+            self.submitted += 1
+            self._cond.notify()
+            return asyncio.shield(job.future)
+
+    def _push(self, job):
+        # re-pushing (priority upgrade) leaves the old entry behind; it's skipped when popped
+        entry = [job.priority, next(self._seq), job]
+        self._entries[job] = entry
+        heapq.heappush(self._heap, entry)
+
+    def get(self, timeout: float = None):
+        """
+        Next job to run, highest priority first. Blocks; returns None on timeout
+        or when the queue was closed. Expired jobs are failed on the way.
+        """
+        batch = self.get_batch(timeout)
+        return batch[0] if batch else None
+
+    def get_batch(self, timeout: float = None, window: float = 0.0, max_images: int = 1):
+        """
+        Like get(), but once a job is found, waits up to `window` seconds for more
+        jobs that can share its inference call (same engine, same config), until
+        they hold `max_images` snippets together. The wait is capped at the average
+        service time, so cheap engines aren't slowed down, and ends early when no
+        new job arrived for a quarter of the window. Returns a list of jobs or None.
+        """
+        end = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                job = self._pop_ready()
+                if job is not None:
+                    break
+                if self._closed:
+                    return None
+                remaining = end - time.monotonic() if end is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+            batch = [job]
+            images = len(job.images)
+            if self._service_ms:
+                # waiting longer than a whole engine call takes can't pay off
+                window = min(window, sum(self._service_ms) / len(self._service_ms) / 1000)
+            # stop early once no new job turned up for a quarter of the window:
+            # a burst that is already queued doesn't wait for the whole window
+            quiet = window / 4
+            window_end = time.monotonic() + window
+            last_growth = time.monotonic()
+            while images < max_images:
+                for other in self._compatible(job, max_images - images):
+                    self._take(other)
+                    batch.append(other)
+                    images += len(other.images)
+                    last_growth = time.monotonic()
+                now = time.monotonic()
+                remaining = min(window_end, last_growth + quiet) - now
+                if images >= max_images or remaining <= 0 or self._closed:
+                    break
+                self._cond.wait(remaining)
+
+            now = time.monotonic()
+            for queued in batch:
+                self._wait_ms.append((now - queued.enqueued_at) * 1000)
+            self.running += len(batch)
+            self.batches += 1
+            self.batched_jobs += len(batch)
+            return batch
+
+    def _take(self, job):
+        # the heap entry stays behind and is skipped when popped
+        del self._entries[job]
+        if job.key is not None and self._pending.get(job.key) is job:
+            del self._pending[job.key]
+
+    def _pop_ready(self):
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            if self._entries.get(job) is not entry:
+                continue
+            self._take(job)
+
+            now = time.monotonic()
+            if now > job.deadline:
+                self.expired += 1
+                job.resolve(error=OcrDeadlineExceeded(
+                    f"OCR job waited {now - job.enqueued_at:.1f}s, past its deadline"))
+                continue
+            return job
+        return None
+
+    def _compatible(self, job, room):
+        """Queued, unexpired jobs that can run in one call with `job`, by priority, up to `room` snippets."""
+        now = time.monotonic()
+        found = []
+        for other, entry in sorted(self._entries.items(), key=lambda item: item[1][:2]):
+            if room <= 0:
+                break
+            if other.deadline < now or len(other.images) > room:
+                continue
+            if (other.engine is job.engine or other.engine == job.engine) and other.config == job.config:
+                found.append(other)
+                room -= len(other.images)
+        return found
+
+    def done(self, job, service_seconds: float):
+        with self._cond:
+            self.running -= 1
+            self._service_ms.append(service_seconds * 1000)
+
+    def close(self):
+        """Wakes up every waiting get(); they return None from now on."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def qsize(self):
+        with self._cond:
+            return len(self._entries)
+
+    def retry_after(self) -> float:
+        """Rough time until the queue has room again, in seconds (at least 1)."""
+        service = (sum(self._service_ms) / len(self._service_ms) / 1000) if self._service_ms else 1.0
+        return max(1.0, round(len(self._entries) * service / self.workers))
+
+    def stats(self):
+        with self._cond:
+            by_priority = {p.name.lower(): 0 for p in OcrPriority}
+            for job in self._entries:
+                by_priority[OcrPriority(job.priority).name.lower()] += 1
+            return {
+                "depth": len(self._entries),
+                "max_depth": self.max_depth,
+                "depth_by_priority": by_priority,
+                "running": self.running,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "batches": self.batches,
+                "avg_batch_jobs": round(self.batched_jobs / self.batches, 2) if self.batches else 0.0,
+                "wait": summarize_ms(self._wait_ms),
+                "service": summarize_ms(self._service_ms),
+            }
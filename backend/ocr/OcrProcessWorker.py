@@ -0,0 +1,291 @@
+# backend/ocr/OcrProcessWorker.py
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backend.ocr.OcrJobQueue import OcrJobQueue, OcrPriority, resolve_batch
+
+# What a process worker gets instead of a loaded engine: the child loads (and
+# keeps) the engine itself, so the main process never holds a model.
+EngineSpec = namedtuple("EngineSpec", ["engine_type", "config"])
+
+
+def _child_main(conn, torch_threads, idle_ttl):
+    """Entry point of a worker process. Owns its own EngineRegistry."""
+    # must be set before torch is imported by the engines
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(torch_threads)
+
+    from backend.ocr.EngineRegistry import EngineRegistry
+    registry = EngineRegistry(idle_ttl=idle_ttl)
+
+    def get_engine(engine_type, config):
+        engine = registry.get_engine(engine_type, config)
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.get_num_threads() != torch_threads:
+            torch.set_num_threads(torch_threads)
+        return engine
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        kind = message[0]
+        if kind == "preload":
+            for engine_type, config in message[1]:
+                try:
+                    get_engine(engine_type, config)
+                except Exception as e:
+                    print(f"[ERROR][OcrProcessWorker] Preloading {engine_type} failed: {e}")
+            continue
+
+        _, job_id, engine_type, config, shm_name, layout = message
+        shm = None
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            images = [
+                np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+                for offset, shape, dtype in layout
+            ]
+            engine = get_engine(engine_type, config)
+            results = engine.recognize_sync(images, config)
+            del images
+            reply = ("ok", job_id, results)
+        except Exception as e:
+            traceback.print_exc()
+            reply = ("error", job_id, f"{type(e).__name__}: {e}")
+        finally:
+            if shm is not None:
+                try:
+                    shm.close()
+                except BufferError:
+                    # an engine kept a view of the snippets; the parent unlinks the block anyway
+                    pass
+        conn.send(reply)
+
+    registry.stop()
+
+
+class _ChildProcess:
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.jobs = 0
+        self.restarts = 0
+        self.busy_since = None
+        # the pipe is written by the feeder thread and by warmup()
+        self.send_lock = threading.Lock()
+
+    def send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+
+
+class OcrProcessWorker:
+    """
+    OCR worker backed by N processes, each with its own preloaded engines.
+
+    Same usage as OcrWorker: results = await ocr_worker.submit(engine, images, config),
+    except that `engine` is an EngineSpec (see `loads_engines`). Snippets are copied
+    once into a shared memory block instead of being pickled. Every child runs
+    with `torch_threads` intra-op threads, so N children don't oversubscribe the
+    cores. A child that dies is restarted; the job it was running fails. Jobs are
+    batched across streams like in OcrWorker.
+    """
+
+    loads_engines = True
+
+    def __init__(self, num_workers: int = 2, torch_threads: int = None, idle_ttl: float = 3600, start_method: str = "spawn", max_queue_depth: int = 32, batch_window: float = 0.0, max_batch: int = 32):
+        self.batch_window = batch_window
+        self.max_batch = max(1, max_batch)
+        self.num_workers = max(1, num_workers)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.idle_ttl = idle_ttl
+        self._context = multiprocessing.get_context(start_method)
+        self._task_queue = OcrJobQueue(max_depth=max_queue_depth, workers=self.num_workers)
+        self._children = [_ChildProcess(i) for i in range(self.num_workers)]
+        self._preload = {}
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._job_ids = iter(range(1, 1 << 62))
+        self._threads = []
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+
+    def start(self):
+        """Starts the worker processes (done lazily on first use)."""
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            for child in self._children:
+                self._spawn(child)
+                t = threading.Thread(target=self._feeder_loop, args=(child,), name=f"OCR-Process-Feeder-{child.index}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _spawn(self, child):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_child_main,
+            args=(child_conn, self.torch_threads, self.idle_ttl),
+            name=f"OCR-Process-{child.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        child.process = process
+        child.conn = parent_conn
+        if self._preload:
+            child.send(("preload", list(self._preload.values())))
+        print(f"[OcrProcessWorker] Started worker process {child.index} (pid {process.pid}, {self.torch_threads} torch threads)")
+
+    def _restart(self, child):
+        try:
+            child.conn.close()
+        except Exception:
+            pass
+        if child.process.is_alive():
+            child.process.kill()
+        child.process.join(1)
+        child.restarts += 1
+        if not self._stop_event.is_set():
+            print(f"[ERROR][OcrProcessWorker] Worker process {child.index} died (exit code {child.process.exitcode}), restarting")
+            self._spawn(child)
+
+    def stop(self, timeout: float = 2.0):
+        """Stop all worker processes and feeder threads."""
+        self._stop_event.set()
+        self._task_queue.close()
+        for t in self._threads:
+            t.join(timeout)
+        for child in self._children:
+            if child.process is None:
+                continue
+            try:
+                child.send(None)
+            except Exception:
+                pass
+            child.process.join(timeout)
+            if child.process.is_alive():
+                child.process.kill()
+
+    def warmup(self, specs):
+        """Has every worker process load these (engine_type, config) engines in the background."""
+        from backend.ocr.OcrFactory import engine_key
+        specs = [(engine_type, dict(config or {})) for engine_type, config in specs]
+        for engine_type, config in specs:
+            self._preload[engine_key(engine_type, config)] = (engine_type, config)
+        if not self._started:
+            self.start()  # new children get the preload list right away
+            return
+        for child in self._children:
+            try:
+                child.send(("preload", specs))
+            except Exception:
+                pass
+
+    # -------------------------
+    # Jobs
+    # -------------------------
+
+    async def submit(self, engine: EngineSpec, images: list, config: dict, priority: OcrPriority = OcrPriority.API, key=None, deadline: float = None):
+        """
+        Called from asyncio code. Returns OCR results (awaitable).
+        engine: EngineSpec(engine_type, config) of the engine to run in the worker
+        images: list of np.ndarray
+        priority, key, deadline: see OcrWorker.submit
+        """
+        if not isinstance(engine, EngineSpec):
+            raise TypeError("OcrProcessWorker.submit needs an EngineSpec, the worker processes load the engines")
+        self.start()
+        return await self._task_queue.submit(engine, images, config, priority, key, deadline)
+
+    def _feeder_loop(self, child):
+        """One thread per child: hands it one job at a time and waits for the reply."""
+        while not self._stop_event.is_set():
+            jobs = self._task_queue.get_batch(timeout=0.5, window=self.batch_window, max_images=self.max_batch)
+            if jobs is None:
+                continue
+
+            engine, config = jobs[0].engine, jobs[0].config
+            started = time.monotonic()
+            shm = None
+            try:
+                shm, layout = self._to_shared_memory([image for job in jobs for image in job.images])
+                job_id = next(self._job_ids)
+                child.busy_since = time.time()
+                child.send(("ocr", job_id, engine.engine_type, config, shm.name, layout))
+                status, reply_id, payload = self._wait_reply(child)
+                if status == "ok":
+                    resolve_batch(jobs, results=payload)
+                else:
+                    resolve_batch(jobs, error=RuntimeError(payload))
+                child.jobs += len(jobs)
+            except (EOFError, OSError, BrokenPipeError) as e:
+                resolve_batch(jobs, error=RuntimeError(f"OCR worker process {child.index} died: {e}"))
+                self._restart(child)
+            except Exception as e:
+                traceback.print_exc()
+                resolve_batch(jobs, error=e)
+            finally:
+                child.busy_since = None
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+                elapsed = time.monotonic() - started
+                for job in jobs:
+                    self._task_queue.done(job, elapsed)
+
+    def _wait_reply(self, child):
+        while not child.conn.poll(0.5):
+            if not child.process.is_alive():
+                raise EOFError(f"exit code {child.process.exitcode}")
+        return child.conn.recv()
+
+    @staticmethod
+    def _to_shared_memory(images):
+        arrays = [np.ascontiguousarray(img) for img in images]
+        size = max(1, sum(a.nbytes for a in arrays))
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        layout = []
+        offset = 0
+        for a in arrays:
+            np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf, offset=offset)[...] = a
+            layout.append((offset, a.shape, a.dtype.str))
+            offset += a.nbytes
+        return shm, layout
+
+    def stats(self):
+        return {
+            "backend": "process",
+            "torch_threads": self.torch_threads,
+            "queue_depth": self._task_queue.qsize(),
+            "queue": self._task_queue.stats(),
+            "workers": [
+                {
+                    "index": child.index,
+                    "pid": child.process.pid if child.process else None,
+                    "alive": bool(child.process and child.process.is_alive()),
+                    "jobs": child.jobs,
+                    "restarts": child.restarts,
+                    "busy_seconds": round(time.time() - child.busy_since, 3) if child.busy_since else None,
+                }
+                for child in self._children
+            ],
+        }
@@ -1,10 +1,12 @@
 # backend/ocr/ocr_worker.py
 import threading
-import queue
 import asyncio
+import time
 import traceback
 from typing import Any, Callable
 
+from backend.ocr.OcrJobQueue import OcrJobQueue, OcrPriority, resolve_batch
+
 
 class OcrWorker:
     """
@@ -12,39 +14,57 @@ class OcrWorker:
 
     Usage:
       - Instantiate once (global)
-      - Call: results = await ocr_worker.submit(engine, images, config)
+      - Call: results = await ocr_worker.submit(engine, images, config, priority=..., key=...)
+
+    Jobs are taken by priority from an OcrJobQueue (see there for dedupe,
+    deadlines and the OcrQueueFull backpressure). Queued jobs of different streams
+    that use the same engine and config are run as one engine call of up to
+    `max_batch` snippets; with `batch_window` > 0 the worker also waits that many
+    seconds for more of them.
     """
 
-    def __init__(self, num_workers: int = 1):
-        self._task_queue: queue.Queue = queue.Queue()
+    # engines are loaded by the caller (EngineRegistry) and passed to submit()
+    loads_engines = False
+
+    def __init__(self, num_workers: int = 1, max_queue_depth: int = 32, batch_window: float = 0.0, max_batch: int = 32):
+        self.batch_window = batch_window
+        self.max_batch = max(1, max_batch)
         self._threads = []
         self._stop_event = threading.Event()
         self.num_workers = max(1, num_workers)
+        self._task_queue = OcrJobQueue(max_depth=max_queue_depth, workers=self.num_workers)
 
         for i in range(self.num_workers):
             t = threading.Thread(target=self._worker_loop, name=f"OCR-Worker-{i}", daemon=True)
             t.start()
             self._threads.append(t)
 
-    async def submit(self, engine: Any, images: list, config: dict):
+    async def submit(self, engine: Any, images: list, config: dict, priority: OcrPriority = OcrPriority.API, key=None, deadline: float = None):
         """
         Called from asyncio code. Returns OCR results (awaitable).
         engine: instance returned by your factory (per-request)
         images: list of np.ndarray or image-like objects
         config: dict
+        priority: OcrPriority of the job
+        key: jobs with the same key that are still queued are run once
+        deadline: seconds the job may wait, default depends on the priority
+        Raises OcrQueueFull when the queue is full.
         """
-        loop = asyncio.get_running_loop()
-        future = loop.create_future()
-        # Put tuple (engine, images, config, future, loop) into queue for worker
-        self._task_queue.put((engine, images, config, future, loop))
-        return await future
+        return await self._task_queue.submit(engine, images, config, priority, key, deadline)
+
+    def stats(self):
+        return {
+            "backend": "thread",
+            "queue_depth": self._task_queue.qsize(),
+            "queue": self._task_queue.stats(),
+            "workers": [{"name": t.name, "alive": t.is_alive()} for t in self._threads],
+        }
 
     def stop(self, timeout: float = 2.0):
         """Stop all worker threads cleanly."""
         self._stop_event.set()
-        # Put None items to wake up threads
-        for _ in self._threads:
-            self._task_queue.put(None)
+        # wakes up the threads
+        self._task_queue.close()
         for t in self._threads:
             t.join(timeout)
 
@@ -58,16 +78,14 @@ class OcrWorker:
         """
         thread_name = threading.current_thread().name
         while not self._stop_event.is_set():
-            try:
-                task = self._task_queue.get(timeout=0.5)
-            except queue.Empty:
+            jobs = self._task_queue.get_batch(timeout=0.5, window=self.batch_window, max_images=self.max_batch)
+            if jobs is None:
                 continue
 
-            if task is None:
-                # sentinel to exit
-                break
-
-            engine, images, config, future, loop = task
+            # every job of a batch has the same engine and config
+            engine, config = jobs[0].engine, jobs[0].config
+            images = [image for job in jobs for image in job.images]
+            started = time.monotonic()
             try:
                 # Choose how to run the engine's recognize method
                 results = None
@@ -90,27 +108,12 @@ class OcrWorker:
                 else:
                     raise AttributeError("OCR engine has neither 'recognize_sync' nor 'recognize' method")
 
-                # Post the result back to the original asyncio loop/future thread-safely
-                def _set_result():
-                    if not future.done():
-                        future.set_result(results)
-
-                loop.call_soon_threadsafe(_set_result)
+                resolve_batch(jobs, results=results)
 
             except Exception as e:
                 traceback.print_exc()
-
-                def _set_exc():
-                    if not future.done():
-                        future.set_exception(e)
-
-                try:
-                    loop.call_soon_threadsafe(_set_exc)
-                except RuntimeError:
-                    # The loop may be closed; just ignore if can't set future
-                    pass
+                resolve_batch(jobs, error=e)
             finally:
-                try:
-                    self._task_queue.task_done()
-                except Exception:
-                    pass
+                elapsed = time.monotonic() - started
+                for job in jobs:
+                    self._task_queue.done(job, elapsed)
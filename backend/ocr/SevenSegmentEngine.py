@@ -0,0 +1,182 @@
+# backend/ocr/SevenSegmentEngine.py
+from .OCREngineBase import OCREngine
+import cv2
+import numpy as np
+
+# Segment layout:
+#    aaa
+#   f   b
+#    ggg
+#   e   c
+#    ddd
+# Sampling windows as (x0, x1, y0, y1) fractions of the digit cell, and whether
+# the segment is horizontal (sampled column by column) or vertical (row by row).
+SEGMENT_WINDOWS = {
+    "a": ((0.3, 0.7, 0.0, 0.2), True),
+    "b": ((0.65, 1.0, 0.15, 0.42), False),
+    "c": ((0.65, 1.0, 0.58, 0.85), False),
+    "d": ((0.3, 0.7, 0.8, 1.0), True),
+    "e": ((0.0, 0.35, 0.58, 0.85), False),
+    "f": ((0.0, 0.35, 0.15, 0.42), False),
+    "g": ((0.3, 0.7, 0.38, 0.62), True),
+}
+SEGMENT_ORDER = "abcdefg"
+
+DIGIT_SEGMENTS = {
+    "0": "abcdef",
+    "1": "bc",
+    "2": "abdeg",
+    "3": "abcdg",
+    "4": "bcfg",
+    "5": "acdfg",
+    "6": "acdefg",
+    "7": "abc",
+    "8": "abcdefg",
+    "9": "abcdfg",
+}
+# some displays draw 6, 7 and 9 with one segment less or more
+_ALTERNATIVE_SEGMENTS = [("6", "cdefg"), ("7", "abcf"), ("9", "abcfg")]
+# the regular patterns come first, so they win ties against the alternatives
+_PATTERN_DIGITS = list(DIGIT_SEGMENTS) + [digit for digit, _ in _ALTERNATIVE_SEGMENTS]
+_PATTERNS = np.array([
+    [segment in segments for segment in SEGMENT_ORDER]
+    for segments in list(DIGIT_SEGMENTS.values()) + [segments for _, segments in _ALTERNATIVE_SEGMENTS]
+], dtype=bool)
+
+
+class SevenSegmentEngine(OCREngine):
+    """
+    Reads seven-segment / LCD digits without a model.
+
+    The box is binarized (Otsu), split into characters along empty columns,
+    and every digit-sized character is classified by sampling its seven
+    segment windows. Small blobs at the baseline become ".", flat blobs in
+    the middle "-". Per-call options (ocrConfig): "invert" (True/False, default
+    auto: the minority colour is the foreground), "slant" (degrees of italic
+    to undo) and "min_gap" (px, gaps narrower than this don't split digits).
+    """
+
+    def __init__(self):
+        pass
+
+    def recognize_sync(self, images, config: dict):
+        config = config or {}
+        return [self.read(img, config) for img in images]
+
+    async def recognize(self, images, config: dict = {}):
+        return self.recognize_sync(images, config)
+
+    def read(self, img, config):
+        if img is None or img.size == 0:
+            return {"text": "", "confidence": 0.0}
+
+        mask = self.binarize(img, config.get("invert"))
+        slant = float(config.get("slant", 0) or 0)
+        if slant:
+            mask = self._deslant(mask, slant)
+
+        characters = self._split(mask, config.get("min_gap"))
+        if not characters:
+            return {"text": "", "confidence": 0.0}
+
+        top = min(y0 for _, _, y0, _ in characters)
+        bottom = max(y1 for _, _, _, y1 in characters)
+        height = bottom - top
+
+        text = []
+        confidences = []
+        for x0, x1, y0, y1 in characters:
+            char, confidence = self._classify(mask, x0, x1, y0, y1, top, bottom, height)
+            if char:
+                text.append(char)
+                confidences.append(confidence)
+
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return {"text": "".join(text), "confidence": round(confidence, 3)}
+
+    @staticmethod
+    def binarize(img, invert=None):
+        """Foreground (segments) as 1, background as 0."""
+        grey = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        _, mask = cv2.threshold(grey, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        if invert is None:
+            invert = np.count_nonzero(mask) > mask.size / 2
+        if invert:
+            mask = 1 - mask
+        return mask
+
+    @staticmethod
+    def _deslant(mask, slant):
+        h, w = mask.shape
+        shear = np.tan(np.radians(slant))
+        # shift rows so the bottom stays and the top moves back by shear * height
+        matrix = np.float32([[1, shear, -shear * h if shear < 0 else 0], [0, 1, 0]])
+        width = int(np.ceil(w + abs(shear) * h))
+        return cv2.warpAffine(mask, matrix, (width, h), flags=cv2.INTER_NEAREST)
+
+    @staticmethod
+    def _split(mask, min_gap=None):
+        """(x0, x1, y0, y1) of every character, left to right."""
+        rows = np.flatnonzero(mask.any(axis=1))
+        if rows.size == 0:
+            return []
+        if min_gap is None:
+            min_gap = max(1, int((rows[-1] - rows[0] + 1) * 0.04))
+
+        columns = np.concatenate(([0], mask.any(axis=0).view(np.int8), [0]))
+        edges = np.flatnonzero(np.diff(columns))
+        runs = []
+        for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            if runs and start - runs[-1][1] < min_gap:
+                runs[-1][1] = end
+            else:
+                runs.append([start, end])
+
+        characters = []
+        for x0, x1 in runs:
+            ys = np.flatnonzero(mask[:, x0:x1].any(axis=1))
+            characters.append((x0, x1, int(ys[0]), int(ys[-1]) + 1))
+        return characters
+
+    def _classify(self, mask, x0, x1, y0, y1, top, bottom, height):
+        w = x1 - x0
+        h = y1 - y0
+        if height <= 0:
+            return None, 0.0
+
+        if h < 0.5 * height:
+            centre = (y0 + y1) / 2 - top
+            if centre > 0.75 * height and w < 0.35 * height:
+                return ".", 1.0
+            if 0.25 * height < centre < 0.75 * height and w > h:
+                return "-", 1.0
+            # speck of noise
+            return None, 0.0
+
+        if w < 0.3 * height:
+            # only segments b and c: too narrow for a full cell
+            return "1", 1.0
+
+        cell = mask[top:bottom, x0:x1]
+        fills = np.array([self._segment_fill(cell, *SEGMENT_WINDOWS[s]) for s in SEGMENT_ORDER])
+        lit = fills > 0.5
+
+        distances = np.count_nonzero(_PATTERNS != lit, axis=1)
+        best = int(np.argmin(distances))
+        best_distance = int(distances[best])
+
+        # how clearly each segment is on or off, lowered for every segment that didn't match
+        certainty = float(np.abs(fills - 0.5).sum()) * 2 / 7
+        confidence = certainty * (1 - best_distance / 7)
+        return _PATTERN_DIGITS[best], confidence
+
+    @staticmethod
+    def _segment_fill(cell, window, horizontal):
+        h, w = cell.shape
+        fx0, fx1, fy0, fy1 = window
+        region = cell[int(fy0 * h):max(int(fy1 * h), int(fy0 * h) + 1), int(fx0 * w):max(int(fx1 * w), int(fx0 * w) + 1)]
+        if region.size == 0:
+            return 0.0
+        # a horizontal segment crosses every column of its window, a vertical one every row
+        hits = region.any(axis=0) if horizontal else region.any(axis=1)
+        return np.count_nonzero(hits) / hits.size
@@ -1,50 +1,55 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
-import io
-import asyncio
-from concurrent.futures import ThreadPoolExecutor  # <-- not ProcessPoolExecutor!
+import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
 from backend.StreamManager import StreamManager
+from backend.SingleFlight import SingleFlight
+from backend.ThumbnailCache import etag_matches
 
 router = APIRouter()
 
-# Use thread pool instead of process pool
-executor = ThreadPoolExecutor(max_workers=10)
+# Concurrent requests for the same (stream, mode) share one capture; the result
+# is served from memory for SNAPSHOT_FRESHNESS_SECONDS afterwards.
+snapshot_flights = SingleFlight(freshness=float(os.environ.get("SNAPSHOT_FRESHNESS_SECONDS", 1.0)))
 
 def configure_routes(stream_manager: StreamManager):
     global streamManager
     streamManager = stream_manager
 
-async def run_in_thread(func, *args):
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(executor, func, *args)
-
-# Helper function must be pure sync
-def grab_frame_by_id_sync(stream_id: str, mode: str):
+async def grab_frame_by_id(stream_id: str, mode: str):
     stream = streamManager.get_stream(stream_id)
     if not stream:
-        raise Exception(f"Stream with ID {stream_id} not found")
-    
+        raise HTTPException(status_code=404, detail=f"Stream with ID {stream_id} not found")
+
     if mode == "raw":
-        return asyncio.run(stream.grab_frame_raw())  # important: run async method synchronously
+        grab = stream.grab_frame_raw
     elif mode == "normal":
-        return asyncio.run(stream.grab_frame())
+        grab = stream.grab_frame
     elif mode == "computed":
-        return asyncio.run(stream.grab_computed_frame())
+        grab = stream.grab_computed_frame
     elif mode == "thumbnail":
-        return asyncio.run(stream.grab_thumbnail())
+        grab = stream.grab_thumbnail
     else:
-        raise Exception(f"Unknown mode '{mode}'")
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}'")
+
+    key = (stream_id, mode, stream.settings_version)
+    return await snapshot_flights.do(key, grab, cacheable=lambda frame: isinstance(frame, bytes))
 
 async def get_frame_response(stream_id: str, mode: str):
     try:
-        frame = await run_in_thread(grab_frame_by_id_sync, stream_id, mode)
-        if frame is None:
-            raise HTTPException(status_code=500, detail="Failed to grab frame from stream")
-        
-        return StreamingResponse(io.BytesIO(frame), media_type="image/jpeg")
+        frame = await grab_frame_by_id(stream_id, mode)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if frame is None:
+        raise HTTPException(status_code=500, detail="Failed to grab frame from stream")
+    if isinstance(frame, tuple):
+        # (message, status) from grab_computed_frame
+        raise HTTPException(status_code=frame[1], detail=frame[0])
+
+    return Response(content=frame, media_type="image/jpeg")
+
 # Routes
 @router.get("/snapshotRaw/{stream_id}")
 async def get_snapshot_raw(stream_id: str):
@@ -59,5 +64,19 @@ async def get_computed_snapshot(stream_id: str):
     return await get_frame_response(stream_id, "computed")
 
 @router.get("/thumbnail/{stream_id}")
-async def get_thumbnail(stream_id: str):
-    return await get_frame_response(stream_id, "thumbnail")
\ No newline at end of file
+async def get_thumbnail(stream_id: str, request: Request):
+    """Thumbnail from memory with an ETag; 304 if the client already has it."""
+    stream = streamManager.get_stream(stream_id)
+    if not stream:
+        raise HTTPException(status_code=404, detail=f"Stream with ID {stream_id} not found")
+    try:
+        thumbnail = await snapshot_flights.do((stream_id, "thumbnail-entry"), stream.get_thumbnail, cacheable=lambda t: False)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if thumbnail is None:
+        raise HTTPException(status_code=500, detail="Failed to grab frame from stream")
+
+    headers = {"ETag": thumbnail.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), thumbnail.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=thumbnail.data, media_type="image/jpeg", headers=headers)
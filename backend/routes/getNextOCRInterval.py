@@ -0,0 +1,39 @@
+from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from backend.StreamManager import StreamManager
+
+
+router = APIRouter(prefix="/get_next_ocr_interval")
+
+def configure_routes(stream_manager: StreamManager):
+    global streamManager
+    streamManager = stream_manager
+
+@router.get("/{id}", response_class=JSONResponse)
+def get_next_ocr_interval(id: str):
+    """
+    Current OCR interval of a stream and when it runs next. In "adaptive"
+    execution mode the interval is recomputed from the recent readings.
+    """
+    stream = streamManager.get_stream(id)
+    if not stream:
+        return JSONResponse(content={"error": "Stream not found"}, status_code=404)
+
+    mode = stream.get_scheduling_settings().get("execution_mode", "manual")
+    next_run_time = None
+    scheduler = streamManager.scheduler
+    if scheduler is not None:
+        job = scheduler.scheduler.get_job(f"ocr-job-{id}")
+        next_run_time = getattr(job, "next_run_time", None) if job else None
+
+    content = {
+        "stream_id": id,
+        "execution_mode": mode,
+        "next_run_time": next_run_time,
+    }
+    if mode == "adaptive":
+        content.update(stream.get_adaptive_interval())
+    elif mode == "interval":
+        content["cron_expression"] = stream.get_scheduling_settings().get("cron_expression")
+    return JSONResponse(content=jsonable_encoder(content))
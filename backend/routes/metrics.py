@@ -0,0 +1,119 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from backend.StreamManager import StreamManager
+from backend.globalRessources import ocr_engine_registry, ocr_worker, glyph_cache, capture_scheduler
+from backend.routes.getImage import snapshot_flights
+from backend.routes.streams import live_views
+
+router = APIRouter(prefix="/metrics")
+
+def configure_routes(stream_manager: StreamManager):
+    global streamManager
+    streamManager = stream_manager
+
+@router.get("/ocr-engines", response_class=JSONResponse)
+def get_ocr_engine_metrics():
+    """
+    Loaded OCR engines with their load time, memory footprint and idle time.
+    """
+    return JSONResponse(content=ocr_engine_registry.stats())
+
+@router.get("/ocr-worker", response_class=JSONResponse)
+def get_ocr_worker_metrics():
+    """
+    OCR worker backend (thread or process), per-worker state and the job queue:
+    depth per priority, wait and service times (ms), deduplicated, expired and rejected jobs.
+    """
+    return JSONResponse(content=ocr_worker.stats())
+
+@router.get("/preprocessing/{stream_id}", response_class=JSONResponse)
+def get_preprocessing_metrics(stream_id: str):
+    """
+    Per-stage timings (ms) of the last frame grab, full render and ROI extraction of a stream.
+    """
+    stream = streamManager.get_stream(stream_id)
+    if not stream:
+        return JSONResponse(content={"error": "Stream not found"}, status_code=404)
+    return JSONResponse(content=stream.get_preprocessing_timings())
+
+@router.get("/logger", response_class=JSONResponse)
+def get_logger_metrics():
+    """
+    Execution logger queue depth, batch write latency (ms) and rows removed by retention.
+    """
+    return JSONResponse(content=streamManager.execution_logger.get_metrics())
+
+@router.get("/websocket", response_class=JSONResponse)
+async def get_websocket_metrics():
+    """
+    Connected websocket clients with their subscriptions, queue depth and dropped/coalesced messages.
+    """
+    return JSONResponse(content=streamManager.ws_manager.stats())
+
+@router.get("/snapshots", response_class=JSONResponse)
+async def get_snapshot_metrics():
+    """
+    Snapshot route coalescing: captures started, requests that shared one and fresh in-memory hits.
+    """
+    return JSONResponse(content=snapshot_flights.stats())
+
+@router.get("/ocr-changes/{stream_id}", response_class=JSONResponse)
+def get_ocr_change_metrics(stream_id: str):
+    """
+    How often OCR was skipped entirely or only run on the boxes that changed.
+    """
+    stream = streamManager.get_stream(stream_id)
+    if not stream:
+        return JSONResponse(content={"error": "Stream not found"}, status_code=404)
+    return JSONResponse(content=stream.change_detector.stats())
+
+@router.get("/watch/{stream_id}", response_class=JSONResponse)
+def get_watch_metrics(stream_id: str):
+    """
+    "watch" mode of a stream: samples taken, OCR runs triggered and the last change score per box.
+    """
+    stream = streamManager.get_stream(stream_id)
+    if not stream:
+        return JSONResponse(content={"error": "Stream not found"}, status_code=404)
+    return JSONResponse(content=stream.motion_detector.stats())
+
+@router.get("/glyph-cache", response_class=JSONResponse)
+def get_glyph_cache_metrics():
+    """
+    Cached character cells, evictions and the cache hit rate of every stream.
+    """
+    return JSONResponse(content=glyph_cache.stats())
+
+@router.get("/capture-scheduler", response_class=JSONResponse)
+def get_capture_scheduler_metrics():
+    """
+    Frame grab thread pool: utilization, running/queued grabs per camera host and wait/service times (ms).
+    """
+    return JSONResponse(content=capture_scheduler.stats())
+
+@router.get("/capture", response_class=JSONResponse)
+async def get_capture_metrics():
+    """
+    Per stream: whether its source is open, who needs it (reads, viewers, scheduled OCR), how often it went
+    idle and the circuit breaker that stops retrying dead cameras.
+    """
+    out = {}
+    for stream_id, stream in streamManager.streams.items():
+        capture = stream.capture
+        out[stream_id] = {
+            "open": capture is not None and capture.running,
+            "connected": capture is not None and capture.connected,
+            "viewers": stream.viewers(),
+            **stream.demand.stats(),
+            "status": stream.status,
+            "breaker": stream.breaker.stats(),
+            "thumbnail": stream.thumbnails.stats(),
+        }
+    return JSONResponse(content=out)
+
+@router.get("/live-views", response_class=JSONResponse)
+async def get_live_view_metrics():
+    """
+    MJPEG live view feeds: viewers per feed, ticks, frames encoded, frames a slow viewer skipped and viewers disconnected for lagging.
+    """
+    return JSONResponse(content=live_views.stats())
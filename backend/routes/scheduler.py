@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from backend.StreamManager import StreamManager
+
+router = APIRouter(prefix="/scheduler")
+
+def configure_routes(stream_manager: StreamManager):
+    global streamManager
+    streamManager = stream_manager
+
+@router.get("/jobs", response_class=JSONResponse)
+def get_scheduled_jobs(minutes: int = Query(60, ge=1, le=24 * 60)):
+    """
+    Scheduled OCR jobs with their offset and next run, how many runs start in
+    each of the next `minutes` minutes, and the in-flight scheduled runs.
+    """
+    scheduler = streamManager.scheduler
+    if scheduler is None:
+        raise HTTPException(status_code=503, detail="Scheduler not configured")
+    load = scheduler.projected_load(minutes)
+    return JSONResponse(content=jsonable_encoder({
+        "jobs": scheduler.list_jobs(),
+        "projected_load": load,
+        "peak_runs_per_minute": max((bucket["runs"] for bucket in load), default=0),
+        "execution": scheduler.stats(),
+    }))
@@ -9,9 +9,16 @@ import re
 import io
 from typing import Optional
 from fastapi import Query
+import math
+from backend.ocr.OcrJobQueue import OcrPriority, OcrQueueFull
+from backend.MjpegBroadcaster import MjpegBroadcaster, MEDIA_TYPE as MJPEG_MEDIA_TYPE
+import os
 
 router = APIRouter(prefix="/streams")
 
+# Live views (MJPEG): viewers that don't take a frame for LIVE_VIEW_MAX_LAG_SECONDS are disconnected.
+live_views = MjpegBroadcaster(max_lag=float(os.environ.get("LIVE_VIEW_MAX_LAG_SECONDS", 5)))
+
 def configure_routes(stream_manager: StreamManager):
     global streamManager
     streamManager = stream_manager
@@ -84,17 +91,26 @@ async def update_stream(stream_id: str, stream: StreamModel):
         return JSONResponse(status_code=404, content={"error": "Stream not found"})
     
     # Update the stream handler with new values
-    stream_handler.rtsp_url = stream.stream_src
+    stream_handler.set_rtsp_url(stream.stream_src)
     print(f"Updating stream {stream_id} with URL: {stream.stream_src} and name: {stream.name}")
     stream_handler.set_streamID(stream.name)
     
     # Save the updated streams
     streamManager.store_streams()
-    stream_handler.delete_cache()
+    await stream_handler.delete_cache()
     
     return JSONResponse(status_code=200, content={"success": True})
 
 
+def queue_full(e: OcrQueueFull) -> HTTPException:
+    """429 for a full OCR queue, with a Retry-After the client can honour."""
+    return HTTPException(
+        status_code=429,
+        detail="OCR queue is full, try again later",
+        headers={"Retry-After": str(math.ceil(e.retry_after))},
+    )
+
+
 @router.get("/{stream_id}/ocr")
 async def ocr_stream(stream_id: str):
     handler: StreamHandler = streamManager.get_stream(stream_id)
@@ -118,8 +134,10 @@ async def ocr_stream(stream_id: str):
 
     if exec_mode == "on_api_call":
         try:
-            results = await handler.run_ocr()
+            results = await handler.run_ocr(priority=OcrPriority.API)
             return {"results": results, "cached": False, "timestamp": handler.last_ocr_timestamp}
+        except OcrQueueFull as e:
+            raise queue_full(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"OCR failed: {e}")
     if exec_mode == "manual":
@@ -135,6 +153,22 @@ async def ocr_stream(stream_id: str):
             raise HTTPException(status_code=404, detail="No OCR results available")
         return {"results": results, "cached": True, "timestamp": handler.last_ocr_timestamp}
 
+@router.get("/{stream_id}/ocr/history", response_class=JSONResponse)
+def get_ocr_history(
+    stream_id: str,
+    limit: int = Query(100, ge=1, le=10000),
+    since: Optional[int] = Query(None, description="Only results at or after this unix timestamp"),
+    until: Optional[int] = Query(None, description="Only results at or before this unix timestamp"),
+):
+    """
+    Get the stored OCR results of a stream, newest first.
+    """
+    handler: StreamHandler = streamManager.get_stream(stream_id)
+    if handler is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+
+    return JSONResponse(content={"stream_id": stream_id, "history": handler.getOcrHistory(limit=limit, since=since, until=until)})
+
 @router.post("/{stream_id}/ocr/run", response_class=JSONResponse)
 async def trigger_ocr_run(stream_id: str):
     handler: StreamHandler = streamManager.get_stream(stream_id)
@@ -142,8 +176,10 @@ async def trigger_ocr_run(stream_id: str):
         raise HTTPException(status_code=404, detail="Stream not found")
     
     try:
-        results = await handler.run_ocr(True)
+        results = await handler.run_ocr(True, priority=OcrPriority.INTERACTIVE)
         return JSONResponse(content={"results": results, "cached": False, "timestamp": handler.last_ocr_timestamp})
+    except OcrQueueFull as e:
+        raise queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR failed: {e}")
     
@@ -186,12 +222,14 @@ async def ocr_stream(
             
     if exec_mode == "on_api_call":
         try:
-            results = await handler.run_ocr()
+            results = await handler.run_ocr(priority=OcrPriority.API)
             frame = await handler.show_ocr_results(results, color=color)
             if frame is None:
                 raise HTTPException(status_code=500, detail="Failed to grab frame from stream")
             
             return StreamingResponse(io.BytesIO(frame), media_type="image/jpeg")
+        except OcrQueueFull as e:
+            raise queue_full(e)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"OCR failed: {e}")
     else:
@@ -206,6 +244,27 @@ async def ocr_stream(
         
         return StreamingResponse(io.BytesIO(frame), media_type="image/jpeg")
 
+@router.get("/{stream_id}/live")
+async def get_live_view(
+    stream_id: str,
+    fps: float = Query(5, gt=0, le=25, description="Frames per second"),
+    width: Optional[int] = Query(None, ge=16, le=3840, description="Scale frames down to this width"),
+    quality: int = Query(80, ge=10, le=95, description="JPEG quality"),
+    processed: bool = Query(False, description="Rotated/cropped frame with the selection boxes drawn in"),
+):
+    """
+    Live view as multipart/x-mixed-replace MJPEG, e.g. for an <img> tag. Viewers with the
+    same parameters share one encoded frame per tick.
+    """
+    handler = streamManager.get_stream(stream_id)
+    if handler is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return StreamingResponse(
+        live_views.stream(handler, fps=fps, width=width, quality=quality, processed=processed),
+        media_type=MJPEG_MEDIA_TYPE,
+        headers={"Cache-Control": "no-store"},
+    )
+
 @router.post("/{id}/ocr-settings", response_class=JSONResponse)
 def set_settings_by_id(id: str, settings: dict = Body(...)):
     """
@@ -266,14 +325,36 @@ def set_scheduling_settings(stream_id: str, settings: dict = Body(...)):
 def get_stream_logs(
     stream_id: str,
     level: Optional[str] = Query(None, description="Filter logs by level (e.g., INFO, ERROR)"),
-    limit: int = 1000,
+    limit: Optional[int] = Query(None, description="Max rows per page (default 1000, max 50000). For ndjson: max rows overall, all if omitted"),
+    since: Optional[int] = Query(None, description="Only logs at or after this unix timestamp"),
+    until: Optional[int] = Query(None, description="Only logs at or before this unix timestamp"),
+    q: Optional[str] = Query(None, description="Only logs whose message contains this text (case-insensitive)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    total: bool = Query(True, description="Count matching rows (capped)"),
+    format: str = Query("json", description="json, or ndjson to stream one log per line"),
 ):
     """
-    Get logs for a specific stream.
+    Get logs for a specific stream, newest first, filtered and paginated server side.
     """
     stream = streamManager.get_stream(stream_id)
     if not stream:
         return JSONResponse(content={"error": "Stream not found"}, status_code=404)
 
-    logs = streamManager.execution_logger.get_logs(stream_id, limit=limit)
+    logger = streamManager.execution_logger
+    try:
+        if cursor is not None:
+            logger.decode_cursor(cursor)
+        if format == "ndjson":
+            return StreamingResponse(
+                logger.iter_logs_ndjson(stream_id, limit=limit, level=level, since=since, until=until, q=q, cursor=cursor),
+                media_type="application/x-ndjson",
+            )
+        if format != "json":
+            return JSONResponse(content={"error": "format must be json or ndjson"}, status_code=400)
+        logs = logger.get_logs(
+            stream_id, limit=limit or 1000, level=level, since=since, until=until, q=q,
+            cursor=cursor, with_total=total,
+        )
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
     return JSONResponse(content={"logs": logs})
\ No newline at end of file
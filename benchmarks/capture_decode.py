@@ -0,0 +1,138 @@
+"""
+Cost of grabbing stills from an H.264 source: the old PIL path against
+keyframe-only decoding with a direct BGR conversion.
+
+    python -m benchmarks.capture_decode [--width 1920] [--height 1080] [--seconds 20] [--gop 50] [--repeat 10]
+
+A synthetic meter video (digits that change every second over a noisy
+background) is encoded with libx264 into a temporary file. "still" is one
+snapshot: open, decode the first frame, convert to BGR. "session" decodes
+the whole video like a CaptureSession does and converts the last frame,
+reported as CPU ms per second of video.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import av
+import cv2
+import numpy as np
+
+from backend.FrameDecoder import decode_keyframes, enable_threading, to_bgr
+
+
+def write_fixture(path, width, height, seconds, gop, fps=25):
+    rng = np.random.default_rng(0)
+    background = rng.integers(60, 120, (height, width, 3), dtype=np.uint8)
+    with av.open(path, "w") as container:
+        stream = container.add_stream("libx264", rate=fps)
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = "yuv420p"
+        stream.options = {"g": str(gop), "preset": "veryfast"}
+        for i in range(seconds * fps):
+            image = background.copy()
+            cv2.putText(image, f"{12345 + i // fps:07d}", (width // 8, height // 2),
+                        cv2.FONT_HERSHEY_SIMPLEX, width / 400, (255, 255, 255), max(1, width // 200))
+            for packet in stream.encode(av.VideoFrame.from_ndarray(image, format="bgr24")):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+
+
+def pil_bgr(frame):
+    return cv2.cvtColor(np.array(frame.to_image(), dtype=np.uint8), cv2.COLOR_RGB2BGR)
+
+
+def still_pil(path, max_width):
+    # the path StreamHandler used before: first decoded frame through PIL
+    with av.open(path) as container:
+        for packet in container.demux(video=0):
+            for frame in packet.decode():
+                return pil_bgr(frame)
+
+
+def still_keyframe(path, max_width):
+    with av.open(path) as container:
+        for frame in decode_keyframes(container):
+            return to_bgr(frame, max_width)
+
+
+def session_all_frames(path, max_width):
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        frames = 0
+        for frame in container.decode(stream):
+            frames += 1
+        pil_bgr(frame)
+    return frames
+
+
+def session_threaded(path, max_width):
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        enable_threading(stream)
+        frames = 0
+        for frame in container.decode(stream):
+            frames += 1
+        to_bgr(frame, max_width)
+    return frames
+
+
+def session_keyframes(path, max_width):
+    with av.open(path) as container:
+        frames = 0
+        for frame in decode_keyframes(container):
+            frames += 1
+        to_bgr(frame, max_width)
+    return frames
+
+
+def measure(fn, path, repeat, max_width=None):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = fn(path, max_width)
+        times.append((time.process_time() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--seconds", type=int, default=20)
+    parser.add_argument("--gop", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-width", type=int, default=640, help="width of the downscaled variants")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "meter.mp4")
+        write_fixture(path, args.width, args.height, args.seconds, args.gop)
+
+        print(f"{args.width}x{args.height}, {args.seconds}s, keyframe every {args.gop} frames, median CPU time")
+        print(f"{'still':<26}{'ms':>10}")
+        for name, fn, max_width in [
+            ("pil (before)", still_pil, None),
+            ("keyframe + bgr24", still_keyframe, None),
+            (f"keyframe + bgr24 @{args.max_width}", still_keyframe, args.max_width),
+        ]:
+            ms, _ = measure(fn, path, args.repeat, max_width)
+            print(f"{name:<26}{ms:>10.1f}")
+
+        print(f"{'session':<26}{'ms/s video':>10}{'frames':>10}")
+        for name, fn in [
+            ("all frames (before)", session_all_frames),
+            ("all frames, threaded", session_threaded),
+            ("keyframes only", session_keyframes),
+        ]:
+            ms, frames = measure(fn, path, max(1, args.repeat // 5))
+            print(f"{name:<26}{ms / args.seconds:>10.1f}{frames:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Throughput and latency of the OCR worker with and without cross-stream batching.
+
+    python -m benchmarks.ocr_batching [--streams 12] [--boxes 2] [--rounds 20] [--jitter-ms 30] [--engines model,sevensegment,easyocr]
+
+Every round, --streams streams submit their --boxes snippets, like cron jobs
+firing in the same minute; each one after a random delay of up to --jitter-ms,
+the spread of their frame grabs. Latency is per submit() call, from
+submission to result. "model" is a stand-in for a batched recognizer: a fixed
+cost per call (--call-ms) plus a small cost per snippet (--snippet-ms).
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from backend.ocr.OcrFactory import get_ocr_engine
+from backend.ocr.OcrWorker import OcrWorker
+from benchmarks.ocr_engines import make_fixtures
+
+
+class ModelEngine:
+    def __init__(self, call_ms, snippet_ms):
+        self.call_ms = call_ms
+        self.snippet_ms = snippet_ms
+
+    def recognize_sync(self, images, config):
+        time.sleep((self.call_ms + self.snippet_ms * len(images)) / 1000)
+        return [{"text": "", "confidence": 1.0} for _ in images]
+
+
+async def run(worker, engine, config, fixtures, streams, boxes, rounds, jitter):
+    rng = random.Random(0)
+    latencies = []
+
+    async def one(stream, delay):
+        await asyncio.sleep(delay)
+        images = [fixtures[(stream * boxes + i) % len(fixtures)][0] for i in range(boxes)]
+        start = time.perf_counter()
+        await worker.submit(engine, images, config, key=(stream,))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(one(stream, rng.uniform(0, jitter)) for stream in range(streams)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "snippets_per_s": streams * boxes * rounds / elapsed,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)],
+        "avg_batch_jobs": worker.stats()["queue"]["avg_batch_jobs"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=12)
+    parser.add_argument("--boxes", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=30)
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--call-ms", type=float, default=15)
+    parser.add_argument("--snippet-ms", type=float, default=1)
+    parser.add_argument("--engines", default="model,sevensegment,easyocr")
+    args = parser.parse_args()
+
+    fixtures = make_fixtures(64)
+    configs = {
+        "sevensegment": {},
+        "easyocr": {"mode": "recognize", "allowlist": "0123456789."},
+    }
+    variants = [
+        ("unbatched", 0.0, 1),
+        ("no-wait", 0.0, args.max_batch),  # only batches what is already queued
+        ("batched", args.window_ms / 1000, args.max_batch),
+    ]
+
+    print(f"{'engine':<14}{'mode':<11}{'snippets/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'jobs/batch':>12}")
+    for engine_type in args.engines.split(","):
+        config = configs.get(engine_type, {})
+        try:
+            engine = ModelEngine(args.call_ms, args.snippet_ms) if engine_type == "model" else get_ocr_engine(engine_type, config)
+        except Exception as e:
+            print(f"{engine_type:<14} skipped: {e}")
+            continue
+        for name, window, max_batch in variants:
+            worker = OcrWorker(num_workers=1, max_queue_depth=args.streams * 2, batch_window=window, max_batch=max_batch)
+            try:
+                row = asyncio.run(run(worker, engine, config, fixtures, args.streams, args.boxes, args.rounds, args.jitter_ms / 1000))
+            finally:
+                worker.stop()
+            print(f"{engine_type:<14}{name:<11}{row['snippets_per_s']:>12.1f}{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['avg_batch_jobs']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Latency and accuracy of the OCR engines on synthetic meter displays.
+
+    python -m benchmarks.ocr_engines [--count 200] [--engines sevensegment,easyocr]
+
+Every fixture is one selection box showing a random meter reading, rendered
+as a seven-segment display in LCD or LED colours with varying size, blur and
+noise. Accuracy is the share of boxes read exactly right.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.ocr.OcrFactory import get_ocr_engine
+from benchmarks.seven_segment import render_seven_segment
+
+
+def make_fixtures(count, seed=0):
+    rng = random.Random(seed)
+    fixtures = []
+    for i in range(count):
+        digits = rng.randint(3, 6)
+        value = str(rng.randint(0, 10 ** digits - 1)).zfill(digits)
+        if rng.random() < 0.5:
+            point = rng.randint(1, digits - 1)
+            value = value[:point] + "." + value[point:]
+        image = render_seven_segment(
+            value,
+            digit_height=rng.choice((20, 32, 48)),
+            lcd=rng.random() < 0.5,
+            noise=rng.choice((0, 6, 12)),
+            blur=rng.choice((0, 0.8)),
+            seed=i,
+        )
+        fixtures.append((image, value))
+    return fixtures
+
+
+def bench(engine_type, fixtures, config):
+    start = time.perf_counter()
+    engine = get_ocr_engine(engine_type, config)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    correct = 0
+    for image, expected in fixtures:
+        start = time.perf_counter()
+        result = engine.recognize_sync([image], config)[0]
+        timings.append((time.perf_counter() - start) * 1000)
+        correct += result["text"].replace(" ", "") == expected
+
+    timings.sort()
+    return {
+        "engine": engine_type,
+        "load_ms": load_ms,
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1],
+        "accuracy": correct / len(fixtures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--engines", default="sevensegment,easyocr")
+    args = parser.parse_args()
+
+    fixtures = make_fixtures(args.count)
+    configs = {
+        "sevensegment": {},
+        "easyocr": {"mode": "recognize", "allowlist": "0123456789."},
+    }
+
+    print(f"{'engine':<14}{'load ms':>10}{'median ms':>12}{'p95 ms':>10}{'accuracy':>10}")
+    for engine_type in args.engines.split(","):
+        try:
+            row = bench(engine_type, fixtures, configs.get(engine_type, {}))
+        except Exception as e:
+            print(f"{engine_type:<14} skipped: {e}")
+            continue
+        print(f"{row['engine']:<14}{row['load_ms']:>10.1f}{row['median_ms']:>12.3f}{row['p95_ms']:>10.3f}{row['accuracy']:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Synthetic seven-segment meter displays, the fixtures of the OCR engine
+benchmark and of the seven-segment tests.
+"""
+import cv2
+import numpy as np
+
+from backend.ocr.SevenSegmentEngine import DIGIT_SEGMENTS
+
+
+def render_seven_segment(text, digit_height=40, lcd=True, noise=0, blur=0, seed=0):
+    """BGR image of `text` (digits, "." and "-") drawn as a seven-segment display."""
+    h = digit_height
+    w = h // 2
+    t = max(2, h // 8)  # segment thickness
+    gap = max(1, t // 3)
+    advance = w + h // 4
+    segments = {
+        "a": (gap, 0, w - gap, t),
+        "b": (w - t, gap, w, h // 2 - gap),
+        "c": (w - t, h // 2 + gap, w, h - gap),
+        "d": (gap, h - t, w - gap, h),
+        "e": (0, h // 2 + gap, t, h - gap),
+        "f": (0, gap, t, h // 2 - gap),
+        "g": (gap, h // 2 - t // 2, w - gap, h // 2 + t - t // 2),
+    }
+
+    margin = h // 4
+    canvas = np.zeros((h + 2 * margin, margin * 2 + advance * len(text)), dtype=np.uint8)
+    x = margin
+    for char in text:
+        if char == ".":
+            cv2.rectangle(canvas, (x, margin + h - t), (x + t - 1, margin + h - 1), 1, -1)
+            x += t + h // 4
+            continue
+        lit = "g" if char == "-" else DIGIT_SEGMENTS[char]
+        for segment in lit:
+            x0, y0, x1, y1 = segments[segment]
+            cv2.rectangle(canvas, (x + x0, margin + y0), (x + x1 - 1, margin + y1 - 1), 1, -1)
+        x += advance
+
+    image = (canvas * 200 + 30) if not lcd else (220 - canvas * 180)
+    image = image.astype(np.float32)
+    if blur:
+        image = cv2.GaussianBlur(image, (0, 0), blur)
+    if noise:
+        image += np.random.default_rng(seed).normal(0, noise, image.shape)
+    return cv2.cvtColor(np.clip(image, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
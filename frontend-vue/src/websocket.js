@@ -6,6 +6,38 @@ const connectionStatus = ref('disconnected')
 let reconnectTimeout = null
 let connectionTimeout = null
 
+// stream id -> number of components showing it; the server only counts
+// subscribed clients as viewers and keeps their captures open
+const watchedStreams = new Map()
+
+function sendSubscription() {
+  const ws = socket.value
+  if (!ws || ws.readyState !== WebSocket.OPEN) return // sent again on open
+  if (watchedStreams.size) {
+    ws.send(JSON.stringify({ type: 'subscribe', streams: [...watchedStreams.keys()] }))
+  } else {
+    ws.send(JSON.stringify({ type: 'unsubscribe' }))
+  }
+}
+
+// Marks a stream as shown until the returned function is called
+function watchStream(streamId) {
+  watchedStreams.set(streamId, (watchedStreams.get(streamId) || 0) + 1)
+  sendSubscription()
+  let released = false
+  return () => {
+    if (released) return
+    released = true
+    const count = watchedStreams.get(streamId) - 1
+    if (count > 0) {
+      watchedStreams.set(streamId, count)
+    } else {
+      watchedStreams.delete(streamId)
+    }
+    sendSubscription()
+  }
+}
+
 function connect() {
   if (socket.value) return // already connecting or connected
 
@@ -30,6 +62,7 @@ function connect() {
       clearTimeout(reconnectTimeout)
       connectionTimeout = null
       reconnectTimeout = null
+      sendSubscription()
     }
 
     ws.onclose = () => {
@@ -76,6 +109,7 @@ export function useWebSocket() {
   return {
     socket,
     connectionStatus,
-    reconnect: connect
+    reconnect: connect,
+    watchStream
   }
 }
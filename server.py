@@ -1,7 +1,9 @@
 import asyncio
-from backend.backendServer import HttpServer
 
+# The import stays under the main guard: OCR worker processes are spawned and
+# re-import this file, they must not build a second server.
 if __name__ == "__main__":
+    from backend.backendServer import HttpServer
     import uvicorn
     config = uvicorn.Config(HttpServer, host="0.0.0.0", port=5000, reload=False)
     server = uvicorn.Server(config)
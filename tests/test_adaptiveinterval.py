@@ -0,0 +1,48 @@
+import unittest
+
+from backend.AdaptiveInterval import adaptive_interval
+
+
+T0 = 1_700_000_000
+
+
+def readings(*points, confidence=0.9):
+    """History entries from (seconds after T0, value) pairs, newest first like the result store."""
+    return [
+        {"aggregate": {"timestamp": T0 + t, "value": v, "confidence": confidence}}
+        for t, v in reversed(points)
+    ]
+
+
+class TestAdaptiveInterval(unittest.TestCase):
+    def test_starts_at_the_minimum(self):
+        self.assertEqual(adaptive_interval([], T0 + 1000)[0], 60)
+        self.assertEqual(adaptive_interval(readings((0, 1.0)), T0 + 1000)[0], 60)
+
+    def test_reads_twice_per_typical_change(self):
+        history = readings((0, 1), (600, 2), (1200, 3), (1800, 4))
+        self.assertEqual(adaptive_interval(history, T0 + 1900)[0], 300)
+
+    def test_fast_meter_goes_down_to_the_minimum(self):
+        history = readings((0, 1), (60, 2), (120, 3), (180, 4))
+        self.assertEqual(adaptive_interval(history, T0 + 200, min_interval=30)[0], 30)
+
+    def test_quiet_meter_backs_off_up_to_the_maximum(self):
+        history = readings((0, 1), (600, 2), (1200, 3), (1500, 3), (3000, 3))
+        seconds, reason = adaptive_interval(history, T0 + 1200 + 4000)
+        self.assertEqual(seconds, 2000)
+        self.assertIn("no change", reason)
+        self.assertEqual(adaptive_interval(history, T0 + 1200 + 6 * 3600)[0], 3600)
+
+    def test_small_changes_can_be_ignored(self):
+        history = readings((0, 1.0), (600, 1.01), (1200, 1.02))
+        self.assertEqual(adaptive_interval(history, T0 + 1300)[0], 300)
+        self.assertEqual(adaptive_interval(history, T0 + 1300, min_change=0.05)[0], 650)
+
+    def test_unsure_reading_is_retried_soon(self):
+        history = readings((0, 1), (3600, 1), confidence=0.2)
+        self.assertEqual(adaptive_interval(history, T0 + 7200), (60, "last reading was unsure"))
+
+
+if __name__ == "__main__":
+    unittest.main()
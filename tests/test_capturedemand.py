@@ -0,0 +1,120 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from backend.CaptureDemand import CaptureDemand
+from backend.StreamHandler import StreamHandler
+from backend.WebSocketManager import WebSocketManager
+
+
+class TestCaptureDemand(unittest.TestCase):
+    def test_leases_are_counted(self):
+        demand = CaptureDemand(grace=10, warmup=5)
+        self.assertFalse(demand.wanted(now=100))
+
+        demand.acquire("read")
+        demand.acquire("read")
+        demand.release("read")
+        self.assertTrue(demand.wanted())
+        self.assertEqual(demand.reasons, ["read"])
+        demand.release("read")
+        self.assertEqual(demand.stats()["leases"], {})
+
+    def test_grace_period_after_last_demand(self):
+        demand = CaptureDemand(grace=10, warmup=5)
+        self.assertTrue(demand.wanted(now=100, viewers=1))
+        self.assertTrue(demand.wanted(now=109))
+        self.assertEqual(demand.reasons, [])
+        self.assertFalse(demand.wanted(now=110))
+
+    def test_hold_releases_on_error(self):
+        demand = CaptureDemand(grace=0, warmup=0)
+        with self.assertRaises(RuntimeError):
+            with demand.hold("read"):
+                raise RuntimeError("no frame")
+        self.assertEqual(demand.stats()["leases"], {})
+
+    def test_scheduled_run_warms_up(self):
+        demand = CaptureDemand(grace=0, warmup=5)
+        self.assertFalse(demand.wanted(now=100, next_run=110))
+        self.assertTrue(demand.wanted(now=105, next_run=110))
+        self.assertEqual(demand.reasons, ["scheduled"])
+
+
+class FakeSession:
+    def __init__(self):
+        self.running = False
+        self.connected = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+
+class TestDemandDrivenCapture(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.ws_manager = MagicMock()
+        self.ws_manager.viewers.return_value = 0
+        self.handler = StreamHandler(MagicMock(), "cam", "rtsp://camera/stream", {}, {}, {}, [], ws_manager=self.ws_manager)
+        self.handler.demand = CaptureDemand(grace=30, warmup=15)
+        self.session = FakeSession()
+        self.handler._capture_session = MagicMock(side_effect=self._session)
+
+    def _session(self, url, options=None):
+        self.handler.capture = self.session
+        return self.session
+
+    async def test_capture_follows_viewers_with_grace_period(self):
+        with patch("backend.CaptureDemand.time.time", return_value=1000):
+            await self.handler.update_capture()
+        self.assertFalse(self.session.running)
+
+        self.ws_manager.viewers.return_value = 1
+        with patch("backend.CaptureDemand.time.time", return_value=1000):
+            await self.handler.update_capture()
+        self.assertTrue(self.session.running)
+
+        self.ws_manager.viewers.return_value = 0
+        with patch("backend.CaptureDemand.time.time", return_value=1020):
+            await self.handler.update_capture()
+        self.assertTrue(self.session.running)
+        with patch("backend.CaptureDemand.time.time", return_value=1031):
+            await self.handler.update_capture()
+        self.assertFalse(self.session.running)
+        self.assertEqual(self.handler.demand.stats()["idles"], 1)
+
+    async def test_unsubscribed_dashboard_does_not_keep_capture_open(self):
+        ws_manager = self.handler.ws_manager = WebSocketManager()
+        websocket = MagicMock()
+        with patch("builtins.print"):
+            await ws_manager.register(websocket)  # a dashboard tab that never subscribed
+            try:
+                with patch("backend.CaptureDemand.time.time", return_value=1000):
+                    await self.handler.update_capture()
+                self.assertFalse(self.session.running)
+                self.assertEqual(self.handler.thumbnail_receivers(), 1)
+
+                ws_manager.subscribe(websocket, streams=["cam"])
+                with patch("backend.CaptureDemand.time.time", return_value=1000):
+                    await self.handler.update_capture()
+                self.assertTrue(self.session.running)
+            finally:
+                await ws_manager.unregister(websocket)
+
+    async def test_capture_opens_ahead_of_scheduled_ocr(self):
+        self.handler.scheduler = MagicMock()
+        self.handler.scheduler.next_run_time.return_value = datetime.fromtimestamp(1100, timezone.utc)
+
+        with patch("backend.CaptureDemand.time.time", return_value=1000):
+            await self.handler.update_capture()
+        self.assertFalse(self.session.running)
+        with patch("backend.CaptureDemand.time.time", return_value=1090):
+            await self.handler.update_capture()
+        self.assertTrue(self.session.running)
+        self.assertEqual(self.handler.demand.reasons, ["scheduled"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from backend.CaptureScheduler import CaptureScheduler, capture_host, host_limits_from_env
+
+
+class TestCaptureScheduler(unittest.IsolatedAsyncioTestCase):
+    def test_capture_host(self):
+        self.assertEqual(capture_host("rtsp://user:pw@10.0.0.5:554/ch01"), "10.0.0.5")
+        self.assertEqual(capture_host("/data/meter.mp4"), "local")
+        self.assertEqual(capture_host("file:///data/meter.mp4"), "local")
+        self.assertEqual(host_limits_from_env("nvr=4, 10.0.0.5=1,"), {"nvr": 4, "10.0.0.5": 1})
+
+    async def test_per_host_limit(self):
+        scheduler = CaptureScheduler(workers=8, per_host=2, host_limits={"slow-nvr": 1})
+        active = {"nvr": 0, "slow-nvr": 0}
+        peak = {"nvr": 0, "slow-nvr": 0}
+        lock = threading.Lock()
+
+        def grab(host):
+            with lock:
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+            time.sleep(0.02)
+            with lock:
+                active[host] -= 1
+            return host
+
+        results = await asyncio.gather(*(
+            scheduler.run(f"{host}-{i}", f"rtsp://{host}/ch{i}", grab, host)
+            for host in ("nvr", "slow-nvr") for i in range(4)
+        ))
+
+        self.assertEqual(results.count("nvr"), 4)
+        self.assertEqual(peak, {"nvr": 2, "slow-nvr": 1})
+        stats = scheduler.stats()
+        self.assertEqual((stats["completed"], stats["running"], stats["queued"]), (8, 0, 0))
+        self.assertGreater(stats["wait"]["max_ms"], 10)
+
+    async def test_streams_are_served_round_robin(self):
+        scheduler = CaptureScheduler(workers=1, per_host=1)
+        order = []
+        release = threading.Event()
+
+        def blocker():
+            release.wait(1)
+
+        first = asyncio.create_task(scheduler.run("busy", "rtsp://nvr/1", blocker))
+        await asyncio.sleep(0.01)
+        # one stream queues three grabs before another queues one
+        tasks = [asyncio.create_task(scheduler.run("busy", "rtsp://nvr/1", order.append, "busy")) for _ in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(scheduler.run("quiet", "rtsp://nvr/2", order.append, "quiet")))
+        await asyncio.sleep(0.01)
+
+        release.set()
+        await asyncio.gather(first, *tasks)
+        self.assertEqual(order, ["busy", "quiet", "busy", "busy"])
+
+    async def test_cancelled_waiter_gives_up_its_place(self):
+        scheduler = CaptureScheduler(workers=1, per_host=1)
+        release = threading.Event()
+        running = asyncio.create_task(scheduler.run("a", "rtsp://nvr/1", release.wait, 1))
+        await asyncio.sleep(0.01)
+        waiting = asyncio.create_task(scheduler.run("b", "rtsp://nvr/2", lambda: "b"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+
+        self.assertEqual(scheduler.stats()["queued"], 0)
+        release.set()
+        await running
+        self.assertEqual(await scheduler.run("c", "rtsp://nvr/3", lambda: "c"), "c")
+        self.assertEqual(scheduler.stats()["running"], 0)
+
+    def test_session_slots_per_host(self):
+        scheduler = CaptureScheduler(sessions_per_host=1, host_limits={"big-nvr": 2})
+        self.assertTrue(scheduler.acquire_session("rtsp://nvr/1"))
+        self.assertTrue(scheduler.acquire_session("rtsp://big-nvr/1"))
+        self.assertTrue(scheduler.acquire_session("rtsp://big-nvr/2"))
+        # a session that is stopped while it waits gives up
+        stopped = threading.Event()
+        threading.Timer(0.05, stopped.set).start()
+        self.assertFalse(scheduler.acquire_session("rtsp://nvr/2", cancelled=stopped.is_set, poll=0.01))
+
+        scheduler.release_session("rtsp://nvr/1")
+        self.assertTrue(scheduler.acquire_session("rtsp://nvr/2", cancelled=lambda: True))
+        # local files don't count against any host
+        self.assertTrue(all(scheduler.acquire_session("/data/meter.mp4") for _ in range(10)))
+        self.assertEqual(scheduler.stats()["hosts"]["nvr"]["sessions"], 1)
+        self.assertEqual(scheduler.stats()["session_waits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
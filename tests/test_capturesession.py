@@ -0,0 +1,221 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import av
+import numpy as np
+
+from backend.CaptureScheduler import CaptureScheduler
+from backend.CaptureSession import CaptureSession
+from backend.FrameDecoder import decode_keyframes, decode_still, to_bgr
+
+
+def write_test_video(path, frames=200, width=64, height=48, gop=None):
+    with av.open(path, "w") as container:
+        stream = container.add_stream("libx264", rate=10)
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = "yuv420p"
+        if gop:
+            stream.options = {"g": str(gop)}
+        for i in range(frames):
+            frame = av.VideoFrame.from_ndarray(np.full((height, width, 3), i % 256, np.uint8), format="bgr24")
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+
+
+class EndlessContainer:
+    """Stands in for an RTSP source: hands out frames until it is closed."""
+
+    def __init__(self):
+        self.streams = MagicMock()
+        self.closed = threading.Event()
+
+    def decode(self, stream):
+        while not self.closed.wait(0.01):
+            yield MagicMock()
+
+    def close(self):
+        self.closed.set()
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestCaptureSession(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.video = os.path.join(cls.tmpdir, "stream.mp4")
+        write_test_video(cls.video)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        self.print_patcher = patch("builtins.print")
+        self.print_patcher.start()
+        self.addCleanup(self.print_patcher.stop)
+
+    def test_read_returns_readonly_bgr_frame(self):
+        session = CaptureSession(self.video)
+        self.addCleanup(session.stop)
+
+        frame, timestamp = session.read(timeout=5)
+
+        self.assertEqual(frame.shape, (48, 64, 3))
+        self.assertEqual(frame.dtype, np.uint8)
+        self.assertFalse(frame.flags.writeable)
+        self.assertIsNotNone(timestamp)
+
+    def test_session_stays_open_between_reads(self):
+        session = CaptureSession(self.video)
+        self.addCleanup(session.stop)
+
+        session.read(timeout=5)
+        session.read(timeout=5)
+
+        self.assertTrue(session.running)
+
+    def test_peek_never_blocks_or_connects(self):
+        session = CaptureSession(self.video)
+        self.addCleanup(session.stop)
+
+        self.assertEqual(session.peek(), (None, None))
+        self.assertFalse(session.running)
+
+    def test_ended_source_drops_its_frame(self):
+        session = CaptureSession(self.video, min_backoff=10)
+        self.addCleanup(session.stop)
+
+        session.start()
+        # the file is decoded to its end quickly, after that no stale frame is handed out
+        deadline = time.monotonic() + 5
+        while session.last_error != "stream ended" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(session.peek(), (None, None))
+
+    def test_unreachable_source_fails_fast_with_reason(self):
+        session = CaptureSession(os.path.join(self.tmpdir, "missing.mp4"), min_backoff=0.05)
+        self.addCleanup(session.stop)
+
+        start = time.monotonic()
+        with self.assertRaises(ConnectionError) as ctx:
+            session.read(timeout=5)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertIn("No such file", str(ctx.exception))
+        self.assertFalse(session.connected)
+
+    def test_unresponsive_source_is_bounded_by_open_timeout(self):
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        self.addCleanup(server.close)
+        # accepts the connection but never answers the RTSP handshake
+        session = CaptureSession(f"rtsp://127.0.0.1:{server.getsockname()[1]}/meter", options={"rtsp_transport": "tcp"},
+                                 open_timeout=0.3, min_backoff=10)
+        self.addCleanup(session.stop)
+
+        start = time.monotonic()
+        with self.assertRaises(ConnectionError):
+            session.read(timeout=5)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_idle_session_closes_source(self):
+        session = CaptureSession(self.video, idle_timeout=0.05, min_backoff=0.01)
+        self.addCleanup(session.stop)
+
+        session.read(timeout=5)
+        time.sleep(0.5)
+
+        self.assertFalse(session.running)
+        # reading again transparently reopens it
+        frame, _ = session.read(timeout=5)
+        self.assertIsNotNone(frame)
+
+    def test_keyframes_only_session(self):
+        session = CaptureSession(self.video, keyframes_only=True, max_width=32)
+        self.addCleanup(session.stop)
+
+        frame, _ = session.read(timeout=5)
+        self.assertEqual(frame.shape, (24, 32, 3))
+
+    def test_sessions_to_one_host_wait_for_a_free_connection(self):
+        slots = CaptureScheduler(sessions_per_host=2)
+        sessions = [CaptureSession(f"rtsp://nvr/ch{i}", name=f"ch{i}", slots=slots) for i in range(3)]
+        sessions.append(CaptureSession("rtsp://other-nvr/ch0", slots=slots))
+
+        with patch("backend.CaptureSession.av.open", side_effect=lambda *args, **kwargs: EndlessContainer()):
+            try:
+                for session in sessions:
+                    session.start()
+                self.assertTrue(wait_until(lambda: sum(s.connected for s in sessions) == 3))
+                time.sleep(0.1)
+                nvr = sessions[:3]
+                self.assertEqual(sum(s.connected for s in nvr), 2)
+                self.assertTrue(sessions[3].connected)  # other hosts are not affected
+                self.assertEqual(slots.stats()["hosts"]["nvr"]["sessions"], 2)
+                self.assertEqual(slots.stats()["hosts"]["nvr"]["sessions_waiting"], 1)
+
+                waiting = next(s for s in nvr if not s.connected)
+                next(s for s in nvr if s.connected).stop()
+                self.assertTrue(wait_until(lambda: waiting.connected))
+                self.assertEqual(slots.stats()["hosts"]["nvr"]["sessions"], 2)
+            finally:
+                for session in sessions:
+                    session.stop()
+
+        self.assertNotIn("nvr", slots.stats()["hosts"])
+        self.assertEqual(slots.stats()["session_waits"], 1)
+
+
+class TestFrameDecoder(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.video = os.path.join(cls.tmpdir, "gop.mp4")
+        write_test_video(cls.video, frames=100, gop=25)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def test_only_keyframes_are_decoded(self):
+        with av.open(self.video) as container:
+            keyframes = sum(1 for packet in container.demux(video=0) if packet.is_keyframe)
+        with av.open(self.video) as container:
+            frames = list(decode_keyframes(container))
+        self.assertEqual(len(frames), keyframes)
+        self.assertLess(len(frames), 100 // 2)
+        self.assertTrue(all(frame.key_frame for frame in frames))
+
+    def test_still_is_the_first_frame_in_bgr(self):
+        frame = decode_still(self.video)
+        self.assertEqual(frame.shape, (48, 64, 3))
+        self.assertEqual(frame.dtype, np.uint8)
+        self.assertLess(abs(int(frame.mean())), 3)  # frame 0 is black
+
+    def test_to_bgr_scales_down_in_the_same_pass(self):
+        with av.open(self.video) as container:
+            frame = next(decode_keyframes(container))
+        self.assertEqual(to_bgr(frame, max_width=32).shape, (24, 32, 3))
+        self.assertEqual(to_bgr(frame, max_width=640).shape, (48, 64, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+
+from backend.CircuitBreaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from backend.StreamHandler import StreamHandler, StreamStatus
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, min_backoff=10)
+        breaker.failure(now=0)
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.failure(now=1)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow(now=5))
+        self.assertEqual(breaker.retry_after(now=5), 6)
+        self.assertEqual(breaker.stats()["rejected"], 1)
+
+    def test_half_open_probe_backs_off_exponentially(self):
+        breaker = CircuitBreaker(failure_threshold=1, min_backoff=10, max_backoff=25)
+        breaker.failure(now=0)
+
+        self.assertTrue(breaker.allow(now=10))
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow(now=11))  # only one probe at a time
+        breaker.failure(now=12)
+        self.assertEqual(breaker.retry_at, 32)
+
+        self.assertTrue(breaker.allow(now=32))
+        breaker.failure(now=33)
+        self.assertEqual(breaker.backoff, 25)
+
+    def test_successful_probe_closes(self):
+        breaker = CircuitBreaker(failure_threshold=1, min_backoff=10)
+        breaker.failure(now=0)
+        self.assertTrue(breaker.allow(now=10))
+        breaker.success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow(now=10))
+
+    def test_lost_probe_is_replaced(self):
+        breaker = CircuitBreaker(failure_threshold=1, min_backoff=10)
+        breaker.failure(now=0)
+        self.assertTrue(breaker.allow(now=10))
+        self.assertTrue(breaker.allow(now=20))
+
+
+class FakeSession:
+    def __init__(self):
+        self.connected = False
+        self.running = False
+        self.fail = None
+        self.reads = 0
+        self.frame = np.zeros((4, 4, 3), np.uint8)
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def peek(self):
+        return None, None
+
+    def read(self, timeout):
+        self.start()
+        self.reads += 1
+        if self.fail:
+            raise self.fail
+        return self.frame, 123.0
+
+
+class TestStreamBreaker(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.handler = StreamHandler(MagicMock(), "cam", "rtsp://camera/stream", {}, {}, {}, [], ws_manager=AsyncMock())
+        self.handler.breaker = CircuitBreaker(failure_threshold=2, min_backoff=60)
+        self.session = FakeSession()
+        self.handler._capture_session = MagicMock(return_value=self.session)
+
+    async def grab(self):
+        return await self.handler._grabFrameFromStream(self.handler.rtsp_url)
+
+    async def test_dead_camera_serves_last_good_frame(self):
+        good = await self.grab()
+
+        self.session.fail = TimeoutError("no frame")
+        for _ in range(2):
+            with self.assertRaises(TimeoutError):
+                await self.grab()
+        self.assertEqual(self.handler.breaker.state, OPEN)
+        self.assertEqual(self.handler.status, StreamStatus.TIMEOUT)
+
+        # while open: no read attempt, the last good frame with its old timestamp
+        frame = await self.grab()
+        self.assertIs(frame, good)
+        self.assertEqual(self.session.reads, 3)
+        self.assertEqual(self.handler.lastFrameTimestamp, 123.0)
+        await self.handler.update_status(StreamStatus.OK)
+        self.assertEqual(self.handler.status, StreamStatus.TIMEOUT)
+
+    async def test_without_a_frame_open_breaker_fails_fast(self):
+        self.session.fail = ConnectionError("refused")
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                await self.grab()
+        self.assertEqual(self.handler.status, StreamStatus.NO_CONNECTION)
+        with self.assertRaisesRegex(ConnectionError, "unreachable"):
+            await self.grab()
+        self.assertEqual(self.session.reads, 2)
+
+    async def test_open_breaker_pauses_the_session(self):
+        self.handler.capture = self.session
+        self.handler.viewers = MagicMock(return_value=0)
+        self.handler.demand.acquire("live")  # somebody wants the capture all along
+        self.session.fail = ConnectionError("refused")
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                await self.grab()
+        self.assertFalse(self.session.running)
+
+        # the demand doesn't reopen it while the breaker is open ...
+        await self.handler.update_capture()
+        self.assertFalse(self.session.running)
+        self.session.start()  # e.g. a read that raced the trip
+        await self.handler.update_capture()
+        self.assertFalse(self.session.running)
+
+        # ... but does once the backoff has passed
+        self.handler.breaker.retry_at = time.time() - 1
+        await self.handler.update_capture()
+        self.assertTrue(self.session.running)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from backend.ocr.EasyOcrEngine import EasyOCREngine
+
+
+def make_engine():
+    engine = EasyOCREngine.__new__(EasyOCREngine)
+    engine.reader = MagicMock()
+    engine.reader.character = "0123456789.abc"
+    engine.reader.lang_char = "0123456789.abc"
+    engine.reader.device = "cpu"
+    return engine
+
+
+def fake_get_text(character, imgH, imgW, recognizer, converter, image_list, ignore_char, *args):
+    # one prediction per line: its position in the batch as text
+    return [(box, str(i), 0.5 + i / 10) for i, (box, _) in enumerate(image_list)]
+
+
+class TestEasyOcrRecognitionMode(unittest.TestCase):
+    def setUp(self):
+        self.images = [np.zeros((20, 60, 3), dtype=np.uint8), np.zeros((30, 30), dtype=np.uint8)]
+
+    def test_default_mode_runs_detection(self):
+        engine = make_engine()
+        engine.reader.readtext.return_value = [(None, "12", 0.9)]
+        results = engine.recognize_sync(self.images, {})
+        self.assertEqual(engine.reader.readtext.call_count, 2)
+        self.assertEqual(results[0], {"text": "12", "confidence": 0.9})
+
+    def test_all_boxes_go_through_one_recognizer_batch(self):
+        engine = make_engine()
+        with patch("backend.ocr.EasyOcrEngine.get_text", side_effect=fake_get_text) as get_text:
+            results = engine.recognize_sync(self.images, {"mode": "recognize"})
+
+        get_text.assert_called_once()
+        image_list = get_text.call_args[0][5]
+        self.assertEqual(len(image_list), 2)
+        self.assertTrue(all(crop.shape[0] == 64 for _, crop in image_list))
+        engine.reader.readtext.assert_not_called()
+        self.assertEqual(results, [{"text": "0", "confidence": 0.5}, {"text": "1", "confidence": 0.6}])
+
+    def test_grid_cells_are_joined_per_row(self):
+        engine = make_engine()
+        with patch("backend.ocr.EasyOcrEngine.get_text", side_effect=fake_get_text) as get_text:
+            results = engine.recognize_sync(self.images[:1], {"mode": "recognize", "grid": [2, 3]})
+
+        self.assertEqual(len(get_text.call_args[0][5]), 6)
+        self.assertEqual(results[0]["text"], "012 345")
+        self.assertEqual(results[0]["confidence"], 0.75)
+
+    def test_allowlist_ignores_other_characters(self):
+        engine = make_engine()
+        with patch("backend.ocr.EasyOcrEngine.get_text", side_effect=fake_get_text) as get_text:
+            engine.recognize_sync(self.images, {"mode": "recognize", "allowlist": "0123456789."})
+        self.assertEqual(set(get_text.call_args[0][6]), set("abc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from backend.ocr.EngineRegistry import EngineRegistry
+
+
+class TestEngineRegistry(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.print_patcher = patch("builtins.print")
+        self.print_patcher.start()
+        self.addCleanup(self.print_patcher.stop)
+
+        self.factory = MagicMock(side_effect=lambda engine_type, config: object())
+        self.registry = EngineRegistry(factory=self.factory, idle_ttl=60, sweep_interval=0)
+
+    def test_engine_is_loaded_once_and_shared(self):
+        a = self.registry.get_engine("easyocr", {"language": "en"})
+        b = self.registry.get_engine("easyocr", {"language": "en"})
+        self.assertIs(a, b)
+        self.factory.assert_called_once()
+
+    def test_per_call_options_do_not_force_reload(self):
+        a = self.registry.get_engine("easyocr", {"language": "en"})
+        b = self.registry.get_engine("easyocr", {"language": "en", "allowlist": "0123456789"})
+        self.assertIs(a, b)
+
+    def test_different_language_loads_new_engine(self):
+        a = self.registry.get_engine("easyocr", {"language": "en"})
+        b = self.registry.get_engine("easyocr", {"language": "de"})
+        self.assertIsNot(a, b)
+        self.assertEqual(self.factory.call_count, 2)
+
+    async def test_async_get_returns_cached_engine(self):
+        a = await self.registry.get_engine_async("easyocr", {})
+        b = await self.registry.get_engine_async("easyocr", {})
+        self.assertIs(a, b)
+        self.factory.assert_called_once()
+
+    def test_idle_engines_are_evicted(self):
+        with patch("backend.ocr.EngineRegistry.time.time", return_value=1000.0):
+            self.registry.get_engine("easyocr", {})
+        with patch("backend.ocr.EngineRegistry.time.time", return_value=1061.0):
+            evicted = self.registry.evict()
+        self.assertEqual(len(evicted), 1)
+        self.assertEqual(self.registry.stats()["engines"], [])
+
+    @patch("backend.ocr.EngineRegistry._rss_bytes")
+    def test_memory_budget_evicts_least_recently_used(self, mock_rss):
+        # every load grows the process by 100 MB
+        rss = {"value": 0}
+
+        def grow():
+            return rss["value"]
+
+        def factory(engine_type, config):
+            rss["value"] += 100 * 1024 * 1024
+            return object()
+
+        mock_rss.side_effect = grow
+        registry = EngineRegistry(factory=factory, idle_ttl=0, memory_budget_mb=150, sweep_interval=0)
+
+        registry.get_engine("easyocr", {"language": "en"})
+        registry.get_engine("easyocr", {"language": "de"})
+
+        languages = [e["language"] for e in registry.stats()["engines"]]
+        self.assertEqual(languages, ["de"])
+
+    def test_warmup_loads_in_background(self):
+        t = self.registry.warmup([("easyocr", {"language": "en"}), ("easyocr", {"language": "fr"})])
+        t.join(2)
+        self.assertEqual(self.factory.call_count, 2)
+        self.assertEqual(len(self.registry.stats()["engines"]), 2)
+
+    def test_warmup_survives_failing_engine(self):
+        self.factory.side_effect = ValueError("Unsupported OCR engine")
+        t = self.registry.warmup([("nope", {})])
+        t.join(2)
+        self.assertEqual(self.registry.stats()["engines"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from backend.ExecutionLogger import ExecutionLogger
+
+
+class TestExecutionLoggerWriter(unittest.TestCase):
+    def setUp(self):
+        self.print_patcher = patch("builtins.print")
+        self.print_patcher.start()
+        self.addCleanup(self.print_patcher.stop)
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = os.path.join(self.tmpdir.name, "logs.db")
+
+    def make_logger(self, **kwargs):
+        logger = ExecutionLogger(MagicMock(), db_path=self.db_path, **kwargs)
+        self.addCleanup(logger.stop)
+        return logger
+
+    def count(self, stream_id):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT count(*) FROM logs WHERE stream_id = ?", (stream_id,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_writes_are_batched(self):
+        logger = self.make_logger()
+        # queue everything before the worker can pick it up
+        with logger.queue.mutex:
+            for i in range(50):
+                logger.queue.queue.append(("a", "INFO", f"line {i}"))
+                logger.queue.unfinished_tasks += 1
+            logger.queue.not_empty.notify()
+        logger.flush()
+
+        metrics = logger.get_metrics()
+        self.assertEqual(metrics["rows_written"], 50)
+        self.assertEqual(metrics["batches_written"], 1)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(self.count("a"), 50)
+
+    def test_retention_caps_entries_per_stream(self):
+        logger = self.make_logger(retention_every_rows=1, max_entries_per_stream=5)
+        for i in range(12):
+            logger.info("a", f"line {i}")
+        logger.info("b", "other stream")
+        logger.flush()
+
+        self.assertEqual(self.count("a"), 5)
+        self.assertEqual(self.count("b"), 1)
+        self.assertEqual(logger.get_metrics()["rows_pruned"], 7)
+
+        logs = logger.get_logs("a")["logs"]
+        self.assertEqual({log["message"] for log in logs}, {f"line {i}" for i in range(7, 12)})
+
+    def test_stream_timestamp_index_exists(self):
+        logger = self.make_logger()
+        logger.flush()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM logs WHERE stream_id = ? ORDER BY timestamp DESC", ("a",)
+            ).fetchall()
+        finally:
+            conn.close()
+        self.assertIn("idx_logs_stream_timestamp", " ".join(str(row) for row in plan))
+
+
+class TestExecutionLoggerQueries(unittest.TestCase):
+    def setUp(self):
+        self.print_patcher = patch("builtins.print")
+        self.print_patcher.start()
+        self.addCleanup(self.print_patcher.stop)
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.logger = ExecutionLogger(MagicMock(), db_path=os.path.join(self.tmpdir.name, "logs.db"))
+        self.addCleanup(self.logger.stop)
+
+        rows = []
+        for i in range(30):
+            level = "ERROR" if i % 3 == 0 else "INFO"
+            rows.append(("a", level, f"frame {i} 100%_done" if i == 7 else f"frame {i}", 1000 + i // 2))
+        rows.append(("b", "INFO", "frame 0", 1000))
+        conn = sqlite3.connect(self.logger.db_path)
+        with conn:
+            conn.executemany("INSERT INTO logs (stream_id, level, message, timestamp) VALUES (?, ?, ?, ?)", rows)
+        conn.close()
+
+    def messages(self, page):
+        return [log["message"] for log in page["logs"]]
+
+    def test_cursor_pages_cover_everything_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page = self.logger.get_logs("a", limit=7, cursor=cursor)
+            seen.extend(log["id"] for log in page["logs"])
+            self.assertEqual(page["total"], 30)
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_filters(self):
+        errors = self.logger.get_logs("a", level="error")
+        self.assertEqual(errors["total"], 10)
+        self.assertTrue(all(log["level"] == "ERROR" for log in errors["logs"]))
+
+        window = self.logger.get_logs("a", since=1002, until=1003)
+        self.assertEqual(self.messages(window), ["frame 7 100%_done", "frame 6", "frame 5", "frame 4"])
+
+        # % and _ are matched literally
+        self.assertEqual(self.messages(self.logger.get_logs("a", q="0%_D")), ["frame 7 100%_done"])
+        self.assertEqual(self.logger.get_logs("a", q="%")["total"], 1)
+
+    def test_total_is_optional_and_capped(self):
+        self.assertIsNone(self.logger.get_logs("a", with_total=False)["total"])
+        with patch.object(ExecutionLogger, "TOTAL_COUNT_CAP", 10):
+            page = self.logger.get_logs("a", limit=5)
+        self.assertEqual(page["total"], 10)
+        self.assertTrue(page["total_capped"])
+
+    def test_iso_is_filled(self):
+        log = self.logger.get_logs("b")["logs"][0]
+        self.assertEqual(log["iso"], datetime.fromtimestamp(1000).isoformat())
+
+    def test_ndjson_streams_all_pages(self):
+        lines = "".join(self.logger.iter_logs_ndjson("a", level="INFO", page_size=4)).splitlines()
+        self.assertEqual(len(lines), 20)
+        self.assertEqual(json.loads(lines[0])["message"], "frame 29")
+
+        limited = "".join(self.logger.iter_logs_ndjson("a", limit=6, page_size=4)).splitlines()
+        self.assertEqual(len(limited), 6)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.logger.get_logs("a", cursor="nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import cv2
+import numpy as np
+
+from backend.ocr.GlyphCache import GlyphCache, glyph_hash, split_cells
+from backend.ocr.OcrJobQueue import OcrJobQueue, OcrPriority
+from backend.ocr.SevenSegmentEngine import SevenSegmentEngine
+from backend.StreamHandler import StreamHandler
+from benchmarks.seven_segment import render_seven_segment
+
+
+def meter_box(text, **kwargs):
+    """A rendered reading trimmed so the box holds exactly len(text) cells."""
+    image = render_seven_segment(text, **kwargs)
+    h = kwargs.get("digit_height", 40)
+    margin, advance = h // 4, h // 2 + h // 4
+    return image[:, margin - h // 8:margin - h // 8 + advance * len(text)]
+
+
+def digit_cells(text, **kwargs):
+    """Character cells of a rendered reading, one per digit."""
+    return split_cells(meter_box(text, **kwargs), len(text))
+
+
+class TestGlyphHash(unittest.TestCase):
+    def test_same_digit_hashes_alike_through_noise(self):
+        clean = glyph_hash(digit_cells("8")[0])
+        noisy = glyph_hash(digit_cells("8", noise=8, seed=3)[0])
+        distance = np.unpackbits(np.frombuffer(clean, np.uint8) ^ np.frombuffer(noisy, np.uint8)).sum()
+        self.assertLessEqual(distance, 8)
+
+    def test_different_digits_are_far_apart(self):
+        hashes = [np.frombuffer(glyph_hash(cell), np.uint8) for cell in digit_cells("0123456789")]
+        for i in range(10):
+            for j in range(i + 1, 10):
+                self.assertGreater(np.unpackbits(hashes[i] ^ hashes[j]).sum(), 16, f"{i} vs {j}")
+
+    def test_blank_cell_has_no_hash(self):
+        self.assertIsNone(glyph_hash(np.full((40, 20, 3), 200, np.uint8)))
+
+
+class TestGlyphCache(unittest.TestCase):
+    def test_hits_misses_and_near_matches(self):
+        cache = GlyphCache()
+        ns = cache.namespace("sevensegment", {})
+        key = glyph_hash(digit_cells("5")[0])
+
+        self.assertIsNone(cache.lookup("s1", ns, key))
+        cache.store(ns, key, {"text": "5", "confidence": 0.9})
+        self.assertEqual(cache.lookup("s1", ns, key), {"text": "5", "confidence": 0.9})
+        self.assertEqual(cache.lookup("s2", ns, glyph_hash(digit_cells("5", noise=8, seed=1)[0]))["text"], "5")
+        # other engine config, other namespace
+        self.assertIsNone(cache.lookup("s1", cache.namespace("sevensegment", {"slant": 10}), key))
+
+        streams = cache.stats()["streams"]
+        self.assertEqual(streams["s1"], {"hits": 1, "misses": 2, "hit_rate": 0.333})
+        self.assertEqual(streams["s2"]["hits"], 1)
+
+    def test_lru_eviction_and_low_confidence(self):
+        cache = GlyphCache(max_entries=2, tolerance=0)
+        keys = [bytes([i]) * 96 for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.store("ns", key, {"text": str(i), "confidence": 1.0})
+            if i == 1:
+                cache.lookup("s", "ns", keys[0])  # keeps 0 fresh
+        self.assertIsNotNone(cache.lookup("s", "ns", keys[0]))
+        self.assertIsNone(cache.lookup("s", "ns", keys[1]))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache.store("ns", bytes([9]) * 96, {"text": "?", "confidence": 0.1})
+        self.assertIsNone(cache.lookup("s", "ns", bytes([9]) * 96))
+
+
+class TestGlyphCacheInRunOcr(unittest.IsolatedAsyncioTestCase):
+    async def test_only_unseen_cells_go_to_the_engine(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, "frame.png")
+        box = {"id": 1, "box_top": 0, "box_left": 5, "box_width": 120, "box_height": 60}
+        handler = StreamHandler(
+            MagicMock(), "meter", path, {},
+            {"ocrEngine": "sevensegment", "ocrConfig": {"digits": 4}}, {}, [box], ws_manager=AsyncMock(),
+        )
+        handler.getOcrResult = MagicMock(return_value={})
+        handler.storeOcrResult = MagicMock(side_effect=lambda results, image_fingerprint: {"results": results})
+
+        engine = SevenSegmentEngine()
+        cache = GlyphCache()
+        calls = []
+
+        async def submit(_engine, images, config, **kwargs):
+            calls.append(len(images))
+            return engine.recognize_sync(images, config)
+
+        async def read(text):
+            cv2.imwrite(path, render_seven_segment(text))
+            with patch("backend.StreamHandler.ocr_worker") as worker, \
+                 patch("backend.StreamHandler.ocr_engine_registry") as registry, \
+                 patch("backend.StreamHandler.glyph_cache", cache):
+                worker.submit = submit
+                registry.get_engine_async = AsyncMock(return_value=engine)
+                return (await handler.run_ocr(True))["results"][0]["text"]
+
+        self.assertEqual(await read("1234"), "1234")
+        self.assertEqual(calls, [4])
+        self.assertEqual(await read("4321"), "4321")
+        self.assertEqual(await read("3412"), "3412")
+        # every digit was seen in the first reading
+        self.assertEqual(calls, [4])
+        self.assertEqual(await read("1250"), "1250")
+        self.assertEqual(calls, [4, 2])
+        self.assertEqual(cache.stats()["streams"]["meter"]["hits"], 10)
+
+    async def test_overlapping_runs_with_different_cells_keep_their_results(self):
+        handler = StreamHandler(MagicMock(), "meter", "unused.png", {}, {}, {}, [], ws_manager=AsyncMock())
+        engine = SevenSegmentEngine()
+        jobs = OcrJobQueue()
+        config = {"digits": 4}
+
+        with patch("backend.StreamHandler.ocr_worker") as worker, \
+             patch("backend.StreamHandler.glyph_cache", GlyphCache()):
+            worker.submit = jobs.submit
+            # e.g. a scheduled run and an API call on the same box, while the first is still queued
+            first = asyncio.create_task(handler._recognize(
+                engine, "sevensegment", [meter_box("1234")], config, OcrPriority.SCHEDULED, ("meter", (0,))))
+            second = asyncio.create_task(handler._recognize(
+                engine, "sevensegment", [meter_box("5608")], config, OcrPriority.API, ("meter", (0,))))
+            await asyncio.sleep(0.01)
+
+            self.assertEqual(jobs.qsize(), 2)
+            while (job := jobs.get(0)) is not None:
+                job.resolve(result=engine.recognize_sync(job.images, job.config))
+            first_results, second_results = await asyncio.gather(first, second)
+
+        self.assertEqual(first_results[0]["text"], "1234")
+        self.assertEqual(second_results[0]["text"], "5608")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from backend.CaptureDemand import CaptureDemand
+from backend.Frame import Frame
+from backend.MjpegBroadcaster import MjpegBroadcaster, encode_part, BOUNDARY
+
+
+class FakeStream:
+    def __init__(self):
+        self.id = "cam"
+        self.demand = CaptureDemand(grace=0, warmup=0)
+        self.image = np.zeros((48, 64, 3), np.uint8)
+        self.timestamp = 1.0
+        self.reads = 0
+
+    async def live_frame(self, processed=False, since=None):
+        self.reads += 1
+        if self.timestamp == since:
+            return None
+        return Frame(self.image, self.timestamp)
+
+
+def decode_part(part):
+    header, _, body = part.partition(b"\r\n\r\n")
+    return header, cv2.imdecode(np.frombuffer(body[:-2], np.uint8), cv2.IMREAD_COLOR)
+
+
+class TestMjpegBroadcaster(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.print_patcher = patch("builtins.print")
+        self.print_patcher.start()
+        self.addCleanup(self.print_patcher.stop)
+        self.stream = FakeStream()
+
+    def test_part_is_scaled_jpeg(self):
+        header, image = decode_part(encode_part(np.zeros((480, 640, 3), np.uint8), width=320, quality=50))
+        self.assertTrue(header.startswith(f"--{BOUNDARY}\r\nContent-Type: image/jpeg".encode()))
+        self.assertEqual(image.shape, (240, 320, 3))
+
+    async def test_viewers_share_one_encode_per_new_frame(self):
+        broadcaster = MjpegBroadcaster()
+        a = broadcaster.stream(self.stream, fps=50)
+        b = broadcaster.stream(self.stream, fps=50)
+
+        first_a, first_b = await asyncio.gather(anext(a), anext(b))
+        self.assertIs(first_a, first_b)
+        self.assertEqual(self.stream.demand.held("live"), 1)
+
+        # unchanged frames aren't encoded again
+        await asyncio.sleep(0.1)
+        self.assertGreater(broadcaster.stats()["feeds"][0]["ticks"], 2)
+        self.assertEqual(broadcaster.stats()["feeds"][0]["encodes"], 1)
+
+        self.stream.timestamp = 2.0
+        await asyncio.gather(anext(a), anext(b))
+        feed = broadcaster.stats()["feeds"][0]
+        self.assertEqual(feed["viewers"], 2)
+        self.assertEqual(feed["encodes"], 2)
+
+        await a.aclose()
+        await b.aclose()
+        await asyncio.sleep(0.05)
+        self.assertEqual(broadcaster.stats()["feeds"], [])
+        self.assertEqual(self.stream.demand.held("live"), 0)
+
+    async def test_slow_viewer_is_disconnected(self):
+        broadcaster = MjpegBroadcaster(max_lag=0.05)
+        slow = broadcaster.stream(self.stream, fps=50)
+        fast = broadcaster.stream(self.stream, fps=50)
+        await asyncio.gather(anext(slow), anext(fast))
+
+        # the slow viewer stops reading, new frames keep coming
+        for i in range(10):
+            self.stream.timestamp = 10.0 + i
+            await anext(fast)
+        self.assertEqual(broadcaster.stats()["disconnected_slow"], 1)
+
+        # its response ends with the closing boundary
+        self.assertEqual(await anext(slow), f"--{BOUNDARY}--\r\n".encode())
+        with self.assertRaises(StopAsyncIteration):
+            await anext(slow)
+        await fast.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
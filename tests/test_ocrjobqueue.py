@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from backend.ocr.OcrJobQueue import OcrDeadlineExceeded, OcrJobQueue, OcrPriority, OcrQueueFull
+from backend.ocr.OcrWorker import OcrWorker
+
+
+class TestOcrJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_jobs_run_by_priority(self):
+        jobs = OcrJobQueue()
+        jobs.submit("e", ["cron"], {}, OcrPriority.SCHEDULED)
+        jobs.submit("e", ["poll"], {}, OcrPriority.API)
+        jobs.submit("e", ["click"], {}, OcrPriority.INTERACTIVE)
+        jobs.submit("e", ["poll2"], {}, OcrPriority.API)
+
+        order = [jobs.get(0).images[0] for _ in range(4)]
+        self.assertEqual(order, ["click", "poll", "poll2", "cron"])
+        self.assertIsNone(jobs.get(0))
+
+    async def test_pending_jobs_with_the_same_key_are_collapsed(self):
+        jobs = OcrJobQueue()
+        first = jobs.submit("e", ["old"], {}, OcrPriority.SCHEDULED, key=("s1", (0,)))
+        jobs.submit("e", ["other"], {}, OcrPriority.API, key=("s2", (0,)))
+        second = jobs.submit("e", ["new"], {}, OcrPriority.INTERACTIVE, key=("s1", (0,)))
+
+        self.assertEqual(jobs.qsize(), 2)
+        job = jobs.get(0)
+        # newest images, upgraded priority
+        self.assertEqual(job.images, ["new"])
+        self.assertEqual(job.priority, OcrPriority.INTERACTIVE)
+        job.resolve(result=["text"])
+        jobs.done(job, 0.01)
+
+        self.assertEqual(await first, ["text"])
+        self.assertEqual(await second, ["text"])
+        self.assertEqual(jobs.stats()["deduplicated"], 1)
+        self.assertEqual(jobs.get(0).images, ["other"])
+
+        # once a job has started, the same key queues a new one
+        jobs.submit("e", ["again"], {}, key=("s1", (0,)))
+        self.assertEqual(jobs.qsize(), 1)
+        self.assertEqual(jobs.get(0).images, ["again"])
+
+    async def test_cancelled_first_caller_does_not_cancel_joined_callers(self):
+        jobs = OcrJobQueue()
+        first = asyncio.ensure_future(jobs.submit("e", ["old"], {}, key=("s1", (0,))))
+        second = jobs.submit("e", ["new"], {}, key=("s1", (0,)))
+        await asyncio.sleep(0)
+        first.cancel()  # e.g. its HTTP client went away
+        await asyncio.sleep(0)
+
+        job = jobs.get(0)
+        self.assertFalse(job.future.cancelled())
+        job.resolve(result=["text"])
+        self.assertEqual(await second, ["text"])
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+    async def test_joined_job_takes_over_the_newer_engine(self):
+        jobs = OcrJobQueue()
+        jobs.submit("easyocr", ["old"], {"mode": "detect"}, key=("s1", (0,)))
+        jobs.submit("sevensegment", ["new"], {}, key=("s1", (0,)))
+
+        job = jobs.get(0)
+        self.assertEqual((job.engine, job.images, job.config), ("sevensegment", ["new"], {}))
+
+    async def test_stale_jobs_are_dropped(self):
+        jobs = OcrJobQueue()
+        stale = jobs.submit("e", ["stale"], {}, deadline=0.01)
+        jobs.submit("e", ["fresh"], {}, OcrPriority.SCHEDULED)
+        await asyncio.sleep(0.02)
+
+        self.assertEqual(jobs.get(0).images, ["fresh"])
+        with self.assertRaises(OcrDeadlineExceeded):
+            await stale
+        self.assertEqual(jobs.stats()["expired"], 1)
+
+    async def test_full_queue_is_rejected_with_retry_after(self):
+        jobs = OcrJobQueue(max_depth=2)
+        jobs.submit("e", [1], {}, key="k")
+        jobs.submit("e", [2], {})
+        with self.assertRaises(OcrQueueFull) as raised:
+            jobs.submit("e", [3], {})
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        # joining a queued job doesn't need room
+        jobs.submit("e", [4], {}, key="k")
+        stats = jobs.stats()
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["depth_by_priority"]["api"], 2)
+
+    async def test_close_wakes_up_waiting_workers(self):
+        jobs = OcrJobQueue()
+        got = []
+        t = threading.Thread(target=lambda: got.append(jobs.get()))
+        t.start()
+        time.sleep(0.02)
+        jobs.close()
+        t.join(1)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(got, [None])
+
+
+class _SlowEngine:
+    def __init__(self):
+        self.calls = []
+
+    def recognize_sync(self, images, config):
+        self.calls.append(list(images))
+        time.sleep(0.05)
+        return [{"text": str(img), "confidence": 1.0} for img in images]
+
+
+class TestOcrWorkerQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_interactive_job_overtakes_queued_cron_jobs(self):
+        worker = OcrWorker(num_workers=1, max_batch=1)
+        engine = _SlowEngine()
+        try:
+            busy = asyncio.ensure_future(worker.submit(engine, ["busy"], {}))
+            await asyncio.sleep(0.01)  # the worker picks up "busy"
+            crons = [asyncio.ensure_future(worker.submit(engine, [f"cron{i}"], {}, priority=OcrPriority.SCHEDULED)) for i in range(3)]
+            await asyncio.sleep(0)
+            click = asyncio.ensure_future(worker.submit(engine, ["click"], {}, priority=OcrPriority.INTERACTIVE))
+            await asyncio.gather(busy, click, *crons)
+
+            self.assertEqual([c[0] for c in engine.calls], ["busy", "click", "cron0", "cron1", "cron2"])
+            stats = worker.stats()["queue"]
+            self.assertEqual(stats["depth"], 0)
+            self.assertGreater(stats["service"]["avg_ms"], 0)
+        finally:
+            worker.stop()
+
+    async def test_jobs_of_different_streams_share_one_engine_call(self):
+        worker = OcrWorker(num_workers=1, batch_window=0.05, max_batch=4)
+        engine = _SlowEngine()
+        try:
+            results = await asyncio.gather(
+                worker.submit(engine, ["a1", "a2"], {"grid": [1, 2]}, key=("a", (0, 1))),
+                worker.submit(engine, ["b1"], {"grid": [1, 2]}, key=("b", (0,))),
+                worker.submit(engine, ["c1"], {"grid": [1, 3]}, key=("c", (0,))),  # other config
+                worker.submit(engine, ["d1", "d2"], {"grid": [1, 2]}, key=("d", (0, 1))),  # no room left
+            )
+
+            self.assertEqual([[r["text"] for r in result] for result in results], [["a1", "a2"], ["b1"], ["c1"], ["d1", "d2"]])
+            self.assertEqual(engine.calls, [["a1", "a2", "b1"], ["c1"], ["d1", "d2"]])
+            self.assertEqual(worker.stats()["queue"]["batches"], 3)
+        finally:
+            worker.stop()
+
+    async def test_a_failed_batch_fails_every_job(self):
+        class Broken:
+            def recognize_sync(self, images, config):
+                raise ValueError("model crashed")
+
+        worker = OcrWorker(num_workers=1, batch_window=0.05)
+        try:
+            results = await asyncio.gather(
+                worker.submit(Broken(), [1], {}),
+                worker.submit(Broken(), [2], {}),
+                return_exceptions=True,
+            )
+            self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        finally:
+            worker.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
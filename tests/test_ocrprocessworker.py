@@ -0,0 +1,56 @@
+import os
+import signal
+import unittest
+from unittest.mock import patch
+
+from backend.ocr.OcrProcessWorker import EngineSpec, OcrProcessWorker
+from benchmarks.seven_segment import render_seven_segment
+
+
+class TestOcrProcessWorker(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.print_patcher = patch("builtins.print")
+        cls.print_patcher.start()
+        cls.worker = OcrProcessWorker(num_workers=2, torch_threads=1)
+        cls.worker.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.worker.stop()
+        cls.print_patcher.stop()
+
+    async def test_results_come_back_in_order(self):
+        images = [render_seven_segment("12.5"), render_seven_segment("907")]
+        results = await self.worker.submit(EngineSpec("sevensegment", {}), images, {})
+        self.assertEqual([r["text"] for r in results], ["12.5", "907"])
+
+    async def test_engine_errors_are_raised(self):
+        with self.assertRaises(RuntimeError):
+            await self.worker.submit(EngineSpec("missing", {}), [render_seven_segment("1")], {})
+
+    async def test_requires_engine_spec(self):
+        with self.assertRaises(TypeError):
+            await self.worker.submit(object(), [], {})
+
+    async def test_dead_worker_is_restarted(self):
+        child = self.worker._children[0]
+        os.kill(child.process.pid, signal.SIGKILL)
+        child.process.join(5)
+
+        spec = EngineSpec("sevensegment", {})
+        outcomes = []
+        for _ in range(4):
+            try:
+                outcomes.append((await self.worker.submit(spec, [render_seven_segment("42")], {}))[0]["text"])
+            except RuntimeError:
+                outcomes.append("failed")
+
+        self.assertLessEqual(outcomes.count("failed"), 1)
+        self.assertEqual(outcomes[-1], "42")
+        self.assertEqual(child.restarts, 1)
+        self.assertTrue(child.process.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
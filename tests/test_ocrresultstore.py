@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from backend.OcrResultStore import OcrResultStore
+from backend.StreamHandler import StreamHandler
+
+
+def entry(value, timestamp, results=None):
+    return {
+        "results": results or [{"text": str(value), "confidence": 0.9}],
+        "aggregate": {"value": value, "confidence": 0.9, "timestamp": timestamp, "image-fingerprint": "abc"},
+    }
+
+
+class TestOcrResultStore(unittest.TestCase):
+    def setUp(self):
+        self.print_patcher = patch("builtins.print")
+        self.print_patcher.start()
+        self.addCleanup(self.print_patcher.stop)
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = os.path.join(self.tmpdir.name, "ocr.db")
+        self.json_path = os.path.join(self.tmpdir.name, "ocr.json")
+
+    def make_store(self):
+        store = OcrResultStore(self.db_path, self.json_path)
+        self.addCleanup(store.stop)
+        return store
+
+    def test_store_and_read_latest(self):
+        store = self.make_store()
+        store.store("a", entry(1.0, 100))
+        store.store("a", entry(2.0, 200))
+        store.store("b", entry(5.0, 150))
+        store.flush()
+
+        self.assertEqual(store.latest("a"), entry(2.0, 200))
+        self.assertEqual(store.latest("b")["aggregate"]["value"], 5.0)
+        self.assertIsNone(store.latest("missing"))
+
+    def test_history_is_newest_first_and_filterable(self):
+        store = self.make_store()
+        for ts in (100, 200, 300, 400):
+            store.store("a", entry(ts / 100, ts))
+        store.flush()
+
+        history = store.history("a", limit=10)
+        self.assertEqual([e["aggregate"]["timestamp"] for e in history], [400, 300, 200, 100])
+
+        history = store.history("a", limit=10, since=200, until=300)
+        self.assertEqual([e["aggregate"]["timestamp"] for e in history], [300, 200])
+
+        self.assertEqual(len(store.history("a", limit=1)), 1)
+
+    def test_migrates_legacy_json_once(self):
+        with open(self.json_path, "w") as f:
+            json.dump({"a": entry(42.0, 123), "b": entry(7.0, 456)}, f)
+
+        store = self.make_store()
+
+        self.assertEqual(store.latest("a"), entry(42.0, 123))
+        self.assertEqual(store.latest("b")["aggregate"]["value"], 7.0)
+        self.assertFalse(os.path.exists(self.json_path))
+        self.assertTrue(os.path.exists(self.json_path + ".migrated"))
+
+
+class TestStreamHandlerResultCache(unittest.TestCase):
+    def setUp(self):
+        self.store = MagicMock()
+        self.store.latest.return_value = entry(10.0, 100)
+        self.handler = StreamHandler(MagicMock(), "test", "rtsp://example.com/stream", {}, {}, {}, [], result_store=self.store)
+        self.handler.schedulingSettings = {"allow_decreasing_values": True}
+
+    def test_latest_result_is_read_from_store_once(self):
+        self.handler.getOcrResult()
+        self.handler.getOcrResult()
+        self.store.latest.assert_called_once_with("test")
+
+    def test_stored_result_updates_cache_without_reading_back(self):
+        stored = self.handler.storeOcrResult([{"text": "12.5", "confidence": 0.8}])
+
+        self.store.store.assert_called_once_with("test", stored)
+        self.assertEqual(self.handler.getOcrResult()["aggregate"]["value"], 12.5)
+        self.store.latest.assert_not_called()
+
+
+class TestStreamHandlerRecentResults(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store = MagicMock()
+        self.store.history.return_value = [entry(20.0, 200), entry(10.0, 100)]
+        self.handler = StreamHandler(MagicMock(), "test", "rtsp://example.com/stream", {}, {}, {}, [], result_store=self.store)
+        self.handler.schedulingSettings = {"allow_decreasing_values": True}
+
+    async def test_results_are_loaded_off_the_event_loop_once(self):
+        with patch("backend.StreamHandler.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            await self.handler.load_ocr_results()
+            await self.handler.load_ocr_results()
+
+        to_thread.assert_called_once()
+        self.store.history.assert_called_once_with("test", limit=20)
+        self.assertEqual(self.handler.getOcrResult()["aggregate"]["value"], 20.0)
+        self.handler.get_adaptive_interval()
+        self.store.latest.assert_not_called()
+        self.store.history.assert_called_once()
+
+    async def test_stored_results_extend_the_loaded_history(self):
+        await self.handler.load_ocr_results()
+        self.handler.storeOcrResult([{"text": "30", "confidence": 0.9}])
+
+        with patch("backend.StreamHandler.adaptive_interval", return_value=(60, "test")) as interval:
+            self.handler.get_adaptive_interval()
+
+        history = interval.call_args[0][0]
+        self.assertEqual([item["aggregate"]["value"] for item in history], [30.0, 20.0, 10.0])
+        self.store.history.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from backend.PreprocessingPlan import PreprocessingPlan
+
+
+def reference_pipeline(image, settings):
+    """The original full-frame pipeline: rotate everything, adjust everything, then crop."""
+    frame = image
+    if settings["rotation"] != 0:
+        h, w = frame.shape[:2]
+        matrix = cv2.getRotationMatrix2D((w // 2, h // 2), settings["rotation"], 1.0)
+        frame = cv2.warpAffine(frame, matrix, (w, h))
+    frame = cv2.convertScaleAbs(frame, alpha=settings["contrast"], beta=settings["brightness"])
+    h, w, _ = frame.shape
+    top = min(settings["crop_top"], h)
+    bottom = max(h - settings["crop_bottom"], 0)
+    left = min(settings["crop_left"], w)
+    right = max(w - settings["crop_right"], 0)
+    return frame[top:bottom, left:right]
+
+
+class TestPreprocessingPlan(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.default_rng(1).integers(0, 255, (121, 160, 3), dtype=np.uint8)
+        self.image.flags.writeable = False
+        self.boxes = [
+            {"id": 1, "box_left": 5, "box_top": 3, "box_width": 30, "box_height": 20},
+            {"id": 2, "box_left": 100, "box_top": 80, "box_width": 80, "box_height": 50},
+            {"id": 3, "box_left": 400, "box_top": 400, "box_width": 10, "box_height": 10},
+        ]
+
+    def settings(self, rotation=0, contrast=1.0, brightness=0):
+        return {
+            "rotation": rotation, "contrast": contrast, "brightness": brightness,
+            "crop_top": 4, "crop_bottom": 7, "crop_left": 9, "crop_right": 2,
+        }
+
+    def assertMatchesReference(self, settings, tolerance=0):
+        plan = PreprocessingPlan(settings, self.boxes)
+        expected = reference_pipeline(self.image, settings)
+
+        rendered = plan.render(self.image)
+        self.assertEqual(rendered.shape, expected.shape)
+        self.assertLessEqual(np.abs(rendered.astype(int) - expected).max(), tolerance)
+
+        for box, roi in zip(self.boxes, plan.extract_rois(self.image)):
+            expected_roi = expected[box["box_top"]:box["box_top"] + box["box_height"],
+                                    box["box_left"]:box["box_left"] + box["box_width"]]
+            self.assertEqual(roi.shape, expected_roi.shape)
+            if roi.size:
+                self.assertLessEqual(np.abs(roi.astype(int) - expected_roi).max(), tolerance)
+
+    def test_right_angles_match_full_frame_pipeline_exactly(self):
+        for rotation in (0, 90, 180, 270, -90):
+            with self.subTest(rotation=rotation):
+                self.assertMatchesReference(self.settings(rotation=rotation))
+
+    def test_contrast_lut_matches_convert_scale_abs_exactly(self):
+        for contrast, brightness in ((1.7, -20.5), (0.5, 30), (2.1, -3.3)):
+            with self.subTest(contrast=contrast, brightness=brightness):
+                self.assertMatchesReference(self.settings(rotation=90, contrast=contrast, brightness=brightness))
+
+    def test_arbitrary_angle_matches_within_interpolation_rounding(self):
+        self.assertMatchesReference(self.settings(rotation=33.5, contrast=1.3, brightness=5), tolerance=2)
+
+    def test_unrotated_unadjusted_rois_are_views(self):
+        plan = PreprocessingPlan(self.settings(), self.boxes)
+        roi = plan.extract_rois(self.image)[0]
+        self.assertTrue(np.shares_memory(roi, self.image))
+
+    def test_render_is_writable(self):
+        plan = PreprocessingPlan(self.settings(), self.boxes)
+        self.assertTrue(plan.render(self.image).flags.writeable)
+
+    def test_source_boxes_map_back_to_source_coordinates(self):
+        plan = PreprocessingPlan(self.settings(rotation=180), self.boxes)
+        source_boxes = plan.source_boxes(self.image.shape)
+
+        # box 1 covers x 14..43, y 7..26 of the rotated frame; 180 degrees around (80, 60)
+        # maps x -> 160 - x and y -> 120 - y
+        self.assertEqual(source_boxes[0], (117, 94, 147, 114))
+        x0, y0, x1, y1 = source_boxes[0]
+        expected = reference_pipeline(self.image, self.settings(rotation=180))[3:23, 5:35]
+        self.assertTrue((cv2.rotate(self.image[y0:y1, x0:x1], cv2.ROTATE_180) == expected).all())
+        # box 3 is outside of the frame
+        self.assertEqual(source_boxes[2], (0, 0, 0, 0))
+
+    def test_timings_are_recorded(self):
+        plan = PreprocessingPlan(self.settings(rotation=90), self.boxes)
+        plan.render(self.image)
+        plan.extract_rois(self.image)
+        self.assertIn("total_ms", plan.timings["render"])
+        self.assertEqual(plan.timings["rois"]["pixels"], 30 * 20 + 49 * 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
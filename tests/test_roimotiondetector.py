@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from backend.RoiMotionDetector import RoiMotionDetector
+
+
+def box(value, noise_seed=None):
+    """A 20x60 box filled with `value`, optionally with +-2 grey levels of noise."""
+    img = np.full((20, 60, 3), value, dtype=np.int16)
+    if noise_seed is not None:
+        img += np.random.default_rng(noise_seed).integers(-2, 3, img.shape, dtype=np.int16)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+class TestRoiMotionDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = RoiMotionDetector(threshold=8, settle=2, min_interval=10)
+
+    def observe(self, snippets, now):
+        """observe() followed by acknowledge(), like a watch step whose OCR run succeeds."""
+        due = self.detector.observe(snippets, now=now)
+        if due:
+            self.detector.acknowledge()
+        return due
+
+    def test_first_sample_reads_a_baseline(self):
+        self.assertTrue(self.observe([box(50)], now=0))
+        self.assertFalse(self.observe([box(50)], now=1))
+
+    def test_noise_does_not_trigger(self):
+        self.observe([box(50)], now=0)
+        for t in range(1, 30):
+            self.assertFalse(self.observe([box(50, noise_seed=t)], now=t))
+        self.assertEqual(self.detector.triggers, 1)
+
+    def test_change_triggers_once_it_settled(self):
+        self.observe([box(50), box(50)], now=0)
+        self.assertFalse(self.observe([box(50), box(120)], now=20))
+        self.assertFalse(self.observe([box(50), box(120)], now=21))
+        self.assertTrue(self.observe([box(50), box(120)], now=22))
+        # the new picture is the background now
+        self.assertFalse(self.observe([box(50), box(120)], now=40))
+        self.assertIsNone(self.detector._pending_since)
+
+    def test_unacknowledged_change_fires_again(self):
+        self.observe([box(50)], now=0)
+        self.assertFalse(self.detector.observe([box(120)], now=20))
+        self.assertTrue(self.detector.observe([box(120)], now=22))  # OCR run fails, no acknowledge()
+        self.assertFalse(self.detector.observe([box(120)], now=25))
+        self.assertTrue(self.detector.observe([box(120)], now=32))
+        self.detector.acknowledge()
+        self.assertFalse(self.detector.observe([box(120)], now=50))
+        self.assertEqual(self.detector.triggers, 2)
+
+    def test_constant_movement_is_read_every_min_interval(self):
+        self.observe([box(0)], now=0)
+        fired = [t for t in range(20, 60) if self.observe([box(t * 20 % 250)], now=t)]
+        self.assertEqual(len(fired), 3)
+        self.assertTrue(all(b - a >= 10 for a, b in zip(fired, fired[1:])))
+
+    def test_reset_starts_over(self):
+        self.observe([box(50)], now=0)
+        self.detector.reset()
+        self.assertTrue(self.observe([box(50)], now=20))
+
+
+if __name__ == "__main__":
+    unittest.main()
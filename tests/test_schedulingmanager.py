@@ -1,6 +1,11 @@
+import asyncio
 import unittest
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, AsyncMock, patch
+from apscheduler.triggers.cron import CronTrigger
+from backend.OffsetCronTrigger import OffsetCronTrigger, stable_offset
 from backend.SchedulingManager import SchedulingManager
+from backend.CaptureDemand import CaptureDemand
 
 
 class TestSchedulingManager(unittest.IsolatedAsyncioTestCase):
@@ -13,6 +18,7 @@ class TestSchedulingManager(unittest.IsolatedAsyncioTestCase):
         # Mock StreamManager and StreamHandler
         self.streamManager = MagicMock()
         self.streamHandler = AsyncMock()
+        self.streamHandler.demand = CaptureDemand(grace=0, warmup=0)
         self.streamManager.get_stream.return_value = self.streamHandler
 
         # Patch AsyncIOScheduler to avoid starting a real scheduler
@@ -37,6 +43,9 @@ class TestSchedulingManager(unittest.IsolatedAsyncioTestCase):
         args, kwargs = self.mockScheduler.add_job.call_args
         self.assertEqual(kwargs["id"], f"ocr-job-{uid}")
         self.assertEqual(kwargs["replace_existing"], True)
+        self.assertEqual((kwargs["coalesce"], kwargs["max_instances"]), (True, 1))
+        # offset stays within the one minute interval
+        self.assertLess(args[1].offset.total_seconds(), 60)
 
     def test_add_job_invalid(self):
         # Invalid cron expression should be caught
@@ -72,6 +81,79 @@ class TestSchedulingManager(unittest.IsolatedAsyncioTestCase):
         self.streamManager.get_stream.assert_called_once_with("123")
         self.streamHandler.run_ocr.assert_awaited_once()
 
+    async def test_scheduled_runs_are_capped(self):
+        manager = SchedulingManager(self.streamManager, max_concurrent=2)
+        in_flight = 0
+        peak = 0
+
+        async def run_ocr(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        self.streamHandler.run_ocr = run_ocr
+        await asyncio.gather(*(manager.executeScheduling(f"ocr-job-{i}") for i in range(6)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(manager.stats()["completed"], 6)
+
+    async def test_adaptive_job_reschedules_itself(self):
+        self.streamHandler.get_scheduling_settings = MagicMock(return_value={"execution_mode": "adaptive"})
+        self.streamHandler.get_adaptive_interval = MagicMock(return_value={"interval_seconds": 120})
+
+        await self.manager.executeAdaptive("123")
+
+        self.streamHandler.run_ocr.assert_awaited_once()
+        args, kwargs = self.mockScheduler.add_job.call_args
+        self.assertEqual(args[0], self.manager.executeAdaptive)
+        self.assertEqual(kwargs["id"], "ocr-job-123")
+        # late runs still fire, or nothing would reschedule the stream
+        self.assertIsNone(kwargs["misfire_grace_time"])
+        self.assertTrue(kwargs["coalesce"])
+        delay = (args[1].run_date - datetime.now().astimezone()).total_seconds()
+        self.assertAlmostEqual(delay, 120, delta=5)
+
+        # switched to another mode in the meantime: no new run
+        self.mockScheduler.add_job.reset_mock()
+        self.streamHandler.get_scheduling_settings.return_value = {"execution_mode": "manual"}
+        await self.manager.executeAdaptive("123")
+        self.mockScheduler.add_job.assert_not_called()
+
+
+class TestOffsetCronTrigger(unittest.TestCase):
+    def test_offset_is_stable_and_below_the_spread(self):
+        self.assertEqual(stable_offset("stream-a", 300), stable_offset("stream-a", 300))
+        offsets = {stable_offset(f"stream-{i}", 300) for i in range(20)}
+        self.assertTrue(all(0 <= o < 300 for o in offsets))
+        self.assertGreater(len(offsets), 10)
+        self.assertEqual(stable_offset("stream-a", 0), 0)
+
+    def test_fires_offset_after_the_cron_time(self):
+        trigger = OffsetCronTrigger(CronTrigger.from_crontab("*/5 * * * *", timezone=timezone.utc), 90)
+        now = datetime(2025, 1, 1, 0, 0, 30, tzinfo=timezone.utc)
+        first = trigger.get_next_fire_time(None, now)
+        self.assertEqual(first, datetime(2025, 1, 1, 0, 1, 30, tzinfo=timezone.utc))
+        self.assertEqual(trigger.get_next_fire_time(first, first), datetime(2025, 1, 1, 0, 6, 30, tzinfo=timezone.utc))
+
+    def test_offset_never_exceeds_the_interval(self):
+        trigger = OffsetCronTrigger.from_crontab("* * * * *", "stream-a", max_offset=300)
+        self.assertLess(trigger.offset.total_seconds(), 60)
+
+
+class TestProjectedLoad(unittest.TestCase):
+    def test_streams_with_the_same_cron_are_spread(self):
+        with patch("builtins.print"):
+            manager = SchedulingManager(MagicMock(), max_offset=300)
+            for i in range(10):
+                manager.add_job("*/5 * * * *", f"stream-{i}")
+            load = manager.projected_load(60)
+
+        self.assertEqual(sum(bucket["runs"] for bucket in load), 120)
+        # without offsets every run would start in the same 12 minutes
+        self.assertGreater(len(load), 12)
+        self.assertLess(max(bucket["runs"] for bucket in load), 10)
+
 
 if __name__ == "__main__":
     unittest.main()
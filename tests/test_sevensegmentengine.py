@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from backend.ocr.OcrFactory import get_ocr_engine
+from backend.ocr.SevenSegmentEngine import SevenSegmentEngine
+from benchmarks.seven_segment import render_seven_segment
+
+
+class TestSevenSegmentEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = SevenSegmentEngine()
+
+    def read(self, image, config=None):
+        return self.engine.recognize_sync([image], config or {})[0]
+
+    def test_reads_every_digit(self):
+        result = self.read(render_seven_segment("0123456789"))
+        self.assertEqual(result["text"], "0123456789")
+        self.assertGreater(result["confidence"], 0.8)
+
+    def test_led_and_lcd_polarity(self):
+        self.assertEqual(self.read(render_seven_segment("4071", lcd=False))["text"], "4071")
+        self.assertEqual(self.read(render_seven_segment("4071", lcd=True))["text"], "4071")
+
+    def test_decimal_point_and_minus(self):
+        self.assertEqual(self.read(render_seven_segment("-12.5"))["text"], "-12.5")
+
+    def test_noisy_and_blurred(self):
+        image = render_seven_segment("38.06", digit_height=24, noise=12, blur=1.0, seed=3)
+        self.assertEqual(self.read(image)["text"], "38.06")
+
+    def test_empty_boxes(self):
+        self.assertEqual(self.read(np.zeros((0, 0, 3), dtype=np.uint8)), {"text": "", "confidence": 0.0})
+        self.assertEqual(self.read(np.full((20, 40, 3), 255, dtype=np.uint8))["text"], "")
+
+    def test_registered_in_factory(self):
+        self.assertIsInstance(get_ocr_engine("sevensegment", {}), SevenSegmentEngine)
+
+
+if __name__ == "__main__":
+    unittest.main()
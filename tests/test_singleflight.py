@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+
+from backend.SingleFlight import SingleFlight
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = 0
+
+        async def grab():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return b"jpeg"
+
+        results = await asyncio.gather(*(flights.do(("a", "normal"), grab) for _ in range(10)))
+        self.assertEqual(results, [b"jpeg"] * 10)
+        self.assertEqual(calls, 1)
+        self.assertEqual(flights.stats()["shared"], 9)
+
+        # nothing is kept without a freshness window
+        await flights.do(("a", "normal"), grab)
+        self.assertEqual(calls, 2)
+
+    async def test_fresh_results_are_served_from_memory(self):
+        flights = SingleFlight(freshness=0.05)
+        calls = 0
+
+        async def grab():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        self.assertEqual(await flights.do("k", grab), 1)
+        self.assertEqual(await flights.do("k", grab), 1)
+        self.assertEqual(await flights.do("other", grab), 2)
+        await asyncio.sleep(0.06)
+        self.assertEqual(await flights.do("k", grab), 3)
+
+    async def test_failures_reach_all_waiters_and_are_not_cached(self):
+        flights = SingleFlight(freshness=10)
+        calls = 0
+
+        async def grab():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("no stream")
+
+        results = await asyncio.gather(flights.do("k", grab), flights.do("k", grab), return_exceptions=True)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(calls, 1)
+
+        with self.assertRaises(RuntimeError):
+            await flights.do("k", grab)
+        self.assertEqual(calls, 2)
+
+    async def test_cancelled_caller_does_not_cancel_shared_call(self):
+        flights = SingleFlight()
+
+        async def grab():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.create_task(flights.do("k", grab))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.do("k", grab))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
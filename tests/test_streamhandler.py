@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import time
 
 from backend.StreamHandler import StreamHandler
@@ -65,5 +65,179 @@ class TestDeltaTracking(unittest.TestCase):
         self.handler.getOcrResult.return_value = {"aggregate": {"value": 100, "timestamp": 150}}
         self.assertFalse(self.handler.delta_tracking(new_value=80, increase=10, timespan_seconds=60))
 
+
+class TestOcrPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        import os
+        import tempfile
+        import cv2
+        import numpy as np
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.image = np.random.default_rng(0).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        self.path = os.path.join(self.tmpdir.name, "frame.png")
+        cv2.imwrite(self.path, self.image)
+
+        self.boxes = [
+            {"id": 1, "box_top": 10, "box_left": 20, "box_width": 30, "box_height": 15},
+            {"id": 2, "box_top": 50, "box_left": 100, "box_width": 40, "box_height": 20},
+            {"id": 3, "box_top": 500, "box_left": 500, "box_width": 10, "box_height": 10},
+        ]
+        self.logger = MagicMock()
+        self.handler = StreamHandler(self.logger, "test", self.path, {}, {}, {}, self.boxes, ws_manager=AsyncMock())
+        self.handler.getOcrResult = MagicMock(return_value={})
+        self.handler.storeOcrResult = MagicMock(side_effect=lambda results, image_fingerprint: {"results": results})
+
+    async def test_snippets_are_raw_arrays(self):
+        snippets = await self.handler.grab_snippets()
+
+        self.assertEqual(len(snippets), 3)
+        self.assertTrue((snippets[0] == self.image[10:25, 20:50]).all())
+        self.assertTrue((snippets[1] == self.image[50:70, 100:140]).all())
+        self.assertEqual(snippets[2].size, 0)
+
+    async def test_run_ocr_sends_arrays_to_worker(self):
+        with patch("backend.StreamHandler.ocr_worker") as worker, \
+             patch("backend.StreamHandler.ocr_engine_registry") as registry:
+            registry.get_engine_async = AsyncMock(return_value=MagicMock())
+            worker.submit = AsyncMock(return_value=[{"text": "1", "confidence": 0.9}, {"text": "2", "confidence": 0.8}])
+
+            result = await self.handler.run_ocr()
+
+        images = worker.submit.call_args[0][1]
+        self.assertEqual([img.shape for img in images], [(15, 30, 3), (20, 40, 3)])
+        self.assertTrue((images[0] == self.image[10:25, 20:50]).all())
+        # the box outside of the frame gets an empty result, order is preserved
+        self.assertEqual([r["text"] for r in result["results"]], ["1", "2", ""])
+
+    async def run_ocr_on(self, image, worker_results):
+        import cv2
+        cv2.imwrite(self.path, image)
+        with patch("backend.StreamHandler.ocr_worker") as worker, \
+             patch("backend.StreamHandler.ocr_engine_registry") as registry:
+            registry.get_engine_async = AsyncMock(return_value=MagicMock())
+            worker.submit = AsyncMock(return_value=worker_results)
+            result = await self.handler.run_ocr()
+        self.handler.getOcrResult = MagicMock(return_value=result)
+        return worker, result
+
+    async def test_only_changed_boxes_are_sent_to_worker(self):
+        import numpy as np
+        await self.run_ocr_on(self.image, [{"text": "1", "confidence": 0.9}, {"text": "2", "confidence": 0.8}])
+
+        # sensor noise everywhere, new content in box 2 only
+        noisy = np.clip(self.image.astype(int) + np.random.default_rng(1).integers(-3, 4, self.image.shape), 0, 255).astype(np.uint8)
+        noisy[50:70, 100:140] = 255 - noisy[50:70, 100:140]
+        worker, result = await self.run_ocr_on(noisy, [{"text": "3", "confidence": 0.7}])
+
+        images = worker.submit.call_args[0][1]
+        self.assertEqual([img.shape for img in images], [(20, 40, 3)])
+        self.assertEqual([r["text"] for r in result["results"]], ["1", "3", ""])
+        self.assertEqual(self.handler.change_detector.stats()["partial"], 1)
+
+    async def test_noise_alone_skips_ocr(self):
+        import numpy as np
+        await self.run_ocr_on(self.image, [{"text": "1", "confidence": 0.9}, {"text": "2", "confidence": 0.8}])
+
+        noisy = np.clip(self.image.astype(int) + 2, 0, 255).astype(np.uint8)
+        worker, result = await self.run_ocr_on(noisy, [])
+
+        worker.submit.assert_not_called()
+        self.assertEqual([r["text"] for r in result["results"]], ["1", "2", ""])
+        stats = self.handler.change_detector.stats()
+        self.assertEqual((stats["runs"], stats["skipped"]), (2, 1))
+
+    async def test_watch_mode_runs_ocr_on_changes_only(self):
+        import cv2
+        self.handler.schedulingSettings = {"execution_mode": "watch", "watch_settle": 0, "watch_min_interval": 0}
+        self.handler.run_ocr = AsyncMock()
+
+        await self.handler.watch_step()  # baseline
+        await self.handler.watch_step()
+        self.assertEqual(self.handler.run_ocr.await_count, 1)
+
+        changed = self.image.copy()
+        changed[10:25, 20:50] = 255 - changed[10:25, 20:50]
+        cv2.imwrite(self.path, changed)
+        await self.handler.watch_step()
+        self.assertEqual(self.handler.run_ocr.await_count, 2)
+        self.assertEqual(self.handler.motion_detector.stats()["samples"], 3)
+
+    async def test_watch_mode_retries_a_change_whose_ocr_failed(self):
+        from backend.ocr.OcrJobQueue import OcrQueueFull
+        self.handler.schedulingSettings = {"execution_mode": "watch", "watch_settle": 0, "watch_min_interval": 0}
+        self.handler.run_ocr = AsyncMock(side_effect=[OcrQueueFull(1), {}])
+
+        await self.handler.watch_step()  # baseline read hits a full queue
+        await self.handler.watch_step()  # same picture: the pending read is retried
+        await self.handler.watch_step()
+        self.assertEqual(self.handler.run_ocr.await_count, 2)
+        self.assertEqual(self.handler.motion_detector.stats()["triggers"], 1)
+
+    async def test_watch_mode_refreshes_the_thumbnail_from_its_samples(self):
+        import asyncio
+        self.handler.schedulingSettings = {"execution_mode": "watch", "watch_fps": 100}
+        self.handler.run_ocr = AsyncMock()
+        self.handler.load_ocr_results = AsyncMock()
+
+        routine = asyncio.create_task(self.handler.routine())
+        await asyncio.sleep(0.1)
+        routine.cancel()
+
+        self.assertIsNotNone(self.handler.thumbnails.entry)
+        updates = [c.args[0] for c in self.handler.ws_manager.broadcast.await_args_list
+                   if c.args[0]["type"] == "stream/thumbnail_update"]
+        # one refresh per THUMBNAIL_INTERVAL, not one per sample
+        self.assertEqual(len(updates), 1)
+        self.assertGreater(self.handler.motion_detector.stats()["samples"], 1)
+
+    async def test_live_frame_renders_new_frames_quietly(self):
+        self.handler.lastFrameTimestamp = 5.0
+        self.handler._grab_source_frame = AsyncMock(return_value=self.image)
+
+        frame = await self.handler.live_frame(processed=True)
+        self.assertEqual(frame.timestamp, 5.0)
+        # boxes are drawn onto a copy, the source frame stays untouched
+        self.assertFalse((frame.image == self.image).all())
+        self.logger.info.assert_not_called()
+        self.logger.debug.assert_not_called()
+
+        with patch.object(self.handler, "get_preprocessing_plan") as plan:
+            self.assertIsNone(await self.handler.live_frame(processed=True, since=5.0))
+        plan.assert_not_called()
+
+    async def test_rejected_reading_is_read_again(self):
+        del self.handler.storeOcrResult, self.handler.getOcrResult
+        self.handler.schedulingSettings = {
+            "allow_decreasing_values": True, "delta_tracking": True,
+            "delta_amount": 10, "delta_timespan": 60, "delta_timespan_unit": "seconds",
+        }
+        self.handler._latest_ocr = {
+            "results": [{"text": "100", "confidence": 0.9}, {"text": "", "confidence": 0.0}, {"text": "", "confidence": 0.0}],
+            "aggregate": {"value": 100.0, "confidence": 0.9, "timestamp": 990, "image-fingerprint": "old"},
+        }
+        worker_results = [{"text": "1", "confidence": 0.9}, {"text": "50", "confidence": 0.9}]
+
+        # 10s after the last reading only ~1.7 may be added: 150 is blocked
+        with patch("time.time", return_value=1000.0):
+            worker, result = await self.run_ocr_on(self.image, worker_results)
+        worker.submit.assert_awaited_once()
+        self.assertEqual(result["aggregate"]["value"], 100.0)
+
+        # same picture 10 minutes later: read again, and now it fits the allowance
+        del self.handler.getOcrResult
+        with patch("time.time", return_value=1600.0):
+            worker, result = await self.run_ocr_on(self.image, worker_results)
+        worker.submit.assert_awaited_once()
+        self.assertEqual(result["aggregate"]["value"], 150.0)
+
+    async def test_box_changes_force_a_full_run(self):
+        await self.run_ocr_on(self.image, [{"text": "1", "confidence": 0.9}, {"text": "2", "confidence": 0.8}])
+        self.handler.set_boxes(self.boxes)
+        worker, _ = await self.run_ocr_on(self.image, [{"text": "1", "confidence": 0.9}, {"text": "2", "confidence": 0.8}])
+        self.assertEqual(len(worker.submit.call_args[0][1]), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
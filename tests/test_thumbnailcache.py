@@ -0,0 +1,94 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import cv2
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.ThumbnailCache import ThumbnailCache, etag_matches
+from backend.StreamHandler import StreamHandler
+from backend.routes import getImage
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "thumbnails", "cam.jpg")
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+        self.assertTrue(etag_matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches("*", '"abc"'))
+        self.assertFalse(etag_matches('"abd"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+    def test_put_is_written_to_disk_and_loaded_after_restart(self):
+        cache = ThumbnailCache(self.path)
+        entry = cache.put(b"jpeg-1")
+        self.assertIs(cache.get(), entry)
+        self.assertTrue(wait_for(lambda: os.path.exists(self.path)))
+
+        restarted = ThumbnailCache(self.path)
+        self.assertEqual(restarted.get().data, b"jpeg-1")
+        self.assertEqual(restarted.get().etag, entry.etag)
+
+    def test_stale_thumbnail_is_not_served(self):
+        cache = ThumbnailCache(self.path, max_age=60)
+        entry = cache.put(b"jpeg")
+        self.assertIsNone(cache.get(now=entry.created + 61))
+
+    def test_clear_removes_disk_copy(self):
+        cache = ThumbnailCache(self.path)
+        cache.put(b"jpeg")
+        self.assertTrue(wait_for(lambda: os.path.exists(self.path)))
+        self.assertTrue(cache.clear())
+        self.assertIsNone(cache.get())
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestThumbnailRoute(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        image = np.random.default_rng(0).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        self.source = os.path.join(self.tmpdir.name, "frame.png")
+        cv2.imwrite(self.source, image)
+
+        self.handler = StreamHandler(MagicMock(), "cam", self.source, {}, {}, {}, [], ws_manager=AsyncMock())
+        self.handler.thumbnails = ThumbnailCache(os.path.join(self.tmpdir.name, "cam.jpg"))
+        manager = MagicMock()
+        manager.get_stream.side_effect = lambda stream_id: self.handler if stream_id == "cam" else None
+        getImage.configure_routes(manager)
+        app = FastAPI()
+        app.include_router(getImage.router)
+        self.client = TestClient(app)
+
+    def test_thumbnail_is_encoded_once_and_revalidated(self):
+        first = self.client.get("/thumbnail/cam")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["content-type"], "image/jpeg")
+        etag = first.headers["etag"]
+
+        second = self.client.get("/thumbnail/cam", headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(self.handler.thumbnails.encodes, 1)
+
+    def test_unknown_stream(self):
+        self.assertEqual(self.client.get("/thumbnail/nope").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from backend.WebSocketManager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self, blocked=False):
+        self.sent = []
+        self.closed = False
+        self.unblock = asyncio.Event()
+        if not blocked:
+            self.unblock.set()
+
+    async def send_json(self, message):
+        await self.unblock.wait()
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+async def settle():
+    await asyncio.sleep(0.01)
+
+
+class TestWebSocketManager(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.print_patcher = patch("builtins.print")
+        self.print_patcher.start()
+        self.addCleanup(self.print_patcher.stop)
+        self.manager = WebSocketManager(max_queue=3)
+
+    async def asyncTearDown(self):
+        for websocket in list(self.manager.connections):
+            await self.manager.unregister(websocket)
+
+    async def test_slow_client_does_not_block_others(self):
+        slow = FakeWebSocket(blocked=True)
+        fast = FakeWebSocket()
+        await self.manager.register(slow)
+        await self.manager.register(fast)
+
+        await asyncio.wait_for(self.manager.broadcast({"type": "stream/ocr_status", "stream_id": "a"}), 0.1)
+        await settle()
+
+        self.assertEqual(len(fast.sent), 1)
+        self.assertEqual(slow.sent, [])
+
+    async def test_subscriptions_filter_streams_and_types(self):
+        websocket = FakeWebSocket()
+        await self.manager.register(websocket, streams=["a"])
+        await self.manager.broadcast({"type": "logger/log", "stream_id": "a"})
+        await self.manager.broadcast({"type": "logger/log", "stream_id": "b"})
+
+        self.manager.handle_client_message(websocket, {"type": "subscribe", "types": ["stream/status_update"]})
+        await self.manager.broadcast({"type": "logger/log", "stream_id": "b"})
+        await self.manager.broadcast({"type": "stream/status_update", "stream_id": "b"})
+        await settle()
+
+        self.assertEqual(websocket.sent, [
+            {"type": "logger/log", "stream_id": "a"},
+            {"type": "stream/status_update", "stream_id": "b"},
+        ])
+
+    async def test_viewers_count_clients_showing_a_stream(self):
+        await self.manager.register(FakeWebSocket())
+        await self.manager.register(FakeWebSocket(), streams=["a"])
+        await self.manager.register(FakeWebSocket(), types=["logger/log"])
+
+        # the unfiltered client gets every stream, but only subscriptions by id count as viewers
+        self.assertEqual(self.manager.viewers("a"), 1)
+        self.assertEqual(self.manager.viewers("b"), 0)
+        self.assertEqual(self.manager.receivers("a"), 2)
+        self.assertEqual(self.manager.receivers("b"), 1)
+
+    async def test_thumbnail_updates_are_coalesced_and_logs_dropped(self):
+        websocket = FakeWebSocket(blocked=True)
+        client = await self.manager.register(websocket)
+        await settle()  # the writer now waits on the first send
+
+        self.manager.publish({"type": "stream/thumbnail_update", "stream_id": "a", "n": 0})
+        await settle()
+        for n in range(1, 4):
+            self.manager.publish({"type": "stream/thumbnail_update", "stream_id": "a", "n": n})
+        for n in range(5):
+            self.manager.publish({"type": "logger/log", "stream_id": "a", "n": n})
+
+        self.assertEqual(client.coalesced, 2)
+        self.assertEqual(client.dropped, 3)
+        websocket.unblock.set()
+        await settle()
+
+        self.assertEqual([(m["type"], m["n"]) for m in websocket.sent], [
+            ("stream/thumbnail_update", 0),
+            ("stream/thumbnail_update", 3),
+            ("logger/log", 3),
+            ("logger/log", 4),
+        ])
+
+    async def test_client_that_cannot_keep_up_is_disconnected(self):
+        websocket = FakeWebSocket(blocked=True)
+        await self.manager.register(websocket)
+        for n in range(5):
+            self.manager.publish({"type": "stream/ocr_status", "stream_id": "a", "n": n})
+        await settle()
+
+        self.assertNotIn(websocket, self.manager.connections)
+        self.assertTrue(websocket.closed)
+        self.assertEqual(self.manager.stats()["disconnected_slow"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()